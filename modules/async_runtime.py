@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional, TypeVar
+
+logger = logging.getLogger('voice_typing')
+
+T = TypeVar('T')
+
+# NOTE: One event loop on one background thread runs every transcription job, so concurrent
+# requests (chunks, hedges, retries) wait on sockets instead of each holding a thread.
+# Cancelling the Future returned by submit() cancels the task, which closes the HTTP request
+# it is waiting on. The app and the services share one runtime, see shared_runtime().
+
+# Runtime returned by shared_runtime(), created on first use
+_shared: Optional['AsyncRuntime'] = None
+_shared_lock = threading.Lock()
+
+
+class AsyncRuntime:
+    """Background thread running an asyncio event loop that jobs are submitted to."""
+
+    def __init__(self, name: str = 'async-runtime') -> None:
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def _run(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            # Let cancelled jobs run their cleanup before the loop goes away
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> 'Future[T]':
+        """
+        Schedule a coroutine on the loop from any thread
+
+        Returns:
+            Future of the result. Cancelling it cancels the coroutine.
+        """
+        if not self.running:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """
+        Run a coroutine on the loop and wait for its result
+
+        Raises:
+            RuntimeError: If called from the loop itself (it would wait on itself forever)
+        """
+        if self.running and _running_loop() is self.loop:
+            coroutine.close()
+            raise RuntimeError(f"{self.name}.run() called from its own event loop, await the coroutine instead")
+        return self.submit(coroutine).result(timeout)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Cancel the pending jobs and stop the loop"""
+        if not self.running:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning("Async runtime did not stop cleanly")
+        self._thread = None
+
+
+def shared_runtime() -> AsyncRuntime:
+    """Runtime shared by the app's processing jobs and the services' blocking entry points"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = AsyncRuntime()
+        _shared.start()
+        return _shared
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def close_on_loop(client: Any, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """
+    Close an async client (anything with aclose()) on the event loop that owns its connections
+
+    Async connections can only be closed by their own loop. A running loop closes the client in
+    the background, a stopped one is run until the client is closed. The connections of a closed
+    loop can't be closed cleanly anymore, they are released when the client is garbage collected.
+    """
+    if loop is None:
+        return
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    elif not loop.is_closed():
+        try:
+            loop.run_until_complete(client.aclose())
+        except RuntimeError as e:  # Called from a thread already running another loop
+            logger.debug(f"Could not close async client on its stopped event loop: {e}")
+    else:
+        logger.debug("Event loop of an async client is closed, its connections are released when it's collected")
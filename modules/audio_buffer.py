@@ -0,0 +1,226 @@
+import struct
+from typing import Optional, Union
+
+import numpy as np
+import soundfile as sf
+
+# NOTE: Recordings are kept as PCM_16 in memory, which is exactly what ends up in the WAV
+# payload, so the validator and the transcribers can use the samples without any decode step.
+# At 16-22 kHz mono this is ~2-2.6 MB per minute, so the default memory limit covers
+# well over the ~10 minute upload limit before anything is written to disk.
+
+PCM_16_MAX = 32768.0
+
+
+def wav_header(num_frames: int, samplerate: int, channels: int = 1) -> bytes:
+    """Builds a 44 byte RIFF/WAVE header for PCM_16 data."""
+    block_align = channels * 2
+    data_size = num_frames * block_align
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, samplerate, samplerate * block_align, block_align, 16,
+        b'data', data_size
+    )
+
+
+def to_pcm16(block: np.ndarray) -> np.ndarray:
+    """Converts an audio block to int16, clipping out-of-range float input.
+
+    Rounds the same way libsndfile does when writing float data to a PCM_16 file (floor).
+    """
+    if block.dtype == np.int16:
+        return block
+    scaled = np.floor(block * PCM_16_MAX)
+    return np.clip(scaled, -PCM_16_MAX, PCM_16_MAX - 1).astype(np.int16)
+
+
+class CaptureBuffer:
+    """Preallocated, growable in-memory PCM_16 buffer that spills to disk past a size limit."""
+
+    def __init__(self, samplerate: int, channels: int = 1,
+                 initial_seconds: float = 30.0,
+                 max_memory_bytes: Optional[int] = None,
+                 spill_filename: str = 'temp_audio.wav') -> None:
+        """
+        Args:
+            samplerate: Sample rate of the captured audio
+            channels: Number of channels of the captured audio
+            initial_seconds: Capacity to preallocate, the buffer doubles when it fills up
+            max_memory_bytes: Size past which audio is moved to `spill_filename` (None = never)
+            spill_filename: WAV file used once the memory limit is exceeded
+        """
+        self.samplerate = samplerate
+        self.channels = channels
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_filename = spill_filename
+        self._data = np.empty((max(1, int(initial_seconds * samplerate)), channels), dtype=np.int16)
+        self._frames = 0
+        self._spill_file: Optional[sf.SoundFile] = None
+        self._spilled = False
+
+    @property
+    def frames(self) -> int:
+        return self._frames
+
+    @property
+    def duration(self) -> float:
+        return self._frames / self.samplerate
+
+    @property
+    def spilled(self) -> bool:
+        return self._spilled
+
+    def append(self, block: np.ndarray) -> None:
+        """Appends a (frames, channels) or (frames,) block of float32 or int16 samples."""
+        pcm = to_pcm16(block).reshape(-1, self.channels)
+        count = len(pcm)
+
+        if self._spill_file is not None:
+            self._spill_file.write(pcm)
+            self._frames += count
+            return
+
+        end = self._frames + count
+        if end > len(self._data):
+            capacity = len(self._data)
+            while capacity < end:
+                capacity *= 2
+            grown = np.empty((capacity, self.channels), dtype=np.int16)
+            grown[:self._frames] = self._data[:self._frames]
+            self._data = grown
+
+        self._data[self._frames:end] = pcm
+        self._frames = end
+
+        if self.max_memory_bytes is not None and self._frames * self.channels * 2 > self.max_memory_bytes:
+            self._spill()
+
+    def _spill(self) -> None:
+        """Moves the buffered audio to disk, later blocks are written straight to the file."""
+        print(f"Capture buffer exceeded {self.max_memory_bytes} bytes, spilling to {self.spill_filename}")
+        self._spill_file = sf.SoundFile(self.spill_filename, mode='w',
+                                        samplerate=self.samplerate,
+                                        channels=self.channels,
+                                        subtype='PCM_16',
+                                        format='WAV')
+        self._spill_file.write(self._data[:self._frames])
+        self._spilled = True
+        self._data = np.empty((0, self.channels), dtype=np.int16)
+
+    def close(self) -> None:
+        """Finalizes the spill file, if any. The buffer remains readable."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def view(self) -> np.ndarray:
+        """Returns the captured samples as an int16 (frames, channels) array.
+
+        This is a zero-copy view while the audio is in memory, once spilled the file is read back.
+        """
+        if self.spilled:
+            self.close()
+            data, _ = sf.read(self.spill_filename, dtype='int16', always_2d=True)
+            return data
+        return self._data[:self._frames]
+
+    def to_wav_bytes(self) -> bytes:
+        """Returns the captured audio as a complete WAV file in memory."""
+        pcm = self.view()
+        return wav_header(len(pcm), self.samplerate, self.channels) + pcm.tobytes()
+
+    def get_payload(self) -> Union[bytes, str]:
+        """Returns WAV bytes while in memory, or the spill file path once spilled."""
+        if self.spilled:
+            self.close()
+            return self.spill_filename
+        return self.to_wav_bytes()
+
+
+class RingBuffer:
+    """Fixed-size PCM_16 ring buffer fed by an always-open input stream.
+
+    Positions are absolute frame counts since the buffer was created, so a recording can
+    mark where it started and later read everything written since (up to the capacity).
+    """
+
+    def __init__(self, capacity_frames: int, channels: int = 1) -> None:
+        self.capacity = max(1, capacity_frames)
+        self.channels = channels
+        self._data = np.zeros((self.capacity, channels), dtype=np.int16)
+        self.total_written = 0
+
+    def write(self, block: np.ndarray) -> None:
+        """Writes a block, overwriting the oldest frames once full."""
+        pcm = to_pcm16(block).reshape(-1, self.channels)
+        if len(pcm) > self.capacity:
+            # Only the newest frames fit
+            self.total_written += len(pcm) - self.capacity
+            pcm = pcm[-self.capacity:]
+        start = self.total_written % self.capacity
+        first = min(len(pcm), self.capacity - start)
+        self._data[start:start + first] = pcm[:first]
+        self._data[:len(pcm) - first] = pcm[first:]
+        self.total_written += len(pcm)
+
+    def read_since(self, position: int) -> np.ndarray:
+        """Returns a copy of the frames written since `position`, oldest first."""
+        position = max(position, self.total_written - self.capacity, 0)
+        count = self.total_written - position
+        if count <= 0:
+            return np.empty((0, self.channels), dtype=np.int16)
+        start = position % self.capacity
+        indices = (start + np.arange(count)) % self.capacity
+        return self._data[indices]
+
+
+class BlockQueue:
+    """Preallocated single-producer/single-consumer queue of audio frames.
+
+    push() never allocates, locks or blocks, so it is safe to call from the real-time audio
+    callback. The consumer thread pops everything pending at once. Each index is only
+    advanced by one side, which keeps the queue consistent without a lock.
+    """
+
+    def __init__(self, capacity_frames: int, channels: int = 1, dtype: Union[str, type] = np.int16) -> None:
+        self.capacity = max(1, capacity_frames)
+        self.channels = channels
+        self._data = np.zeros((self.capacity, channels), dtype=dtype)
+        self.total_written = 0  # Only advanced by the producer
+        self.total_read = 0  # Only advanced by the consumer
+
+    @property
+    def pending(self) -> int:
+        """Frames pushed but not popped yet"""
+        return self.total_written - self.total_read
+
+    def push(self, block: np.ndarray) -> bool:
+        """Copies a (frames, channels) block into the queue.
+
+        Returns:
+            bool: False if the queue is full and the block was dropped
+        """
+        frames = len(block)
+        if frames > self.capacity - self.pending:
+            return False
+        start = self.total_written % self.capacity
+        first = min(frames, self.capacity - start)
+        self._data[start:start + first] = block[:first]
+        self._data[:frames - first] = block[first:]
+        self.total_written += frames
+        return True
+
+    def pop(self) -> Optional[np.ndarray]:
+        """Returns a copy of all pending frames, oldest first, or None if the queue is empty."""
+        count = self.pending
+        if count <= 0:
+            return None
+        start = self.total_read % self.capacity
+        first = min(count, self.capacity - start)
+        if first == count:
+            frames = self._data[start:start + count].copy()
+        else:
+            frames = np.concatenate([self._data[start:], self._data[:count - first]])
+        self.total_read += count
+        return frames
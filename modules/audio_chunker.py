@@ -0,0 +1,81 @@
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+from modules.audio_dsp import frame_energies
+
+# NOTE: Used to get recordings past the provider upload limit (25 MB for OpenAI). Chunks are cut
+# at the quietest point near each target boundary and overlap slightly, so a word that straddles
+# a cut is heard in full by at least one chunk. The duplicated words are removed when merging.
+
+# Length of the frames used to find low-energy split points
+FRAME_S = 0.03
+
+
+def find_split_points(samples: np.ndarray, samplerate: int, target_s: float,
+                      search_s: float = 5.0, frame_s: float = FRAME_S) -> List[int]:
+    """
+    Find sample indices to split a recording into chunks of roughly `target_s` seconds
+
+    Each split is placed at the lowest-energy frame within the `search_s` seconds before the
+    target boundary, so cuts land in pauses rather than in the middle of words and no chunk
+    is longer than `target_s`.
+
+    Returns:
+        Sorted split indices (excluding 0 and the end of the recording)
+    """
+    frame_len = max(1, int(frame_s * samplerate))
+    energies = frame_energies(samples, samplerate, frame_s)
+    target = int(target_s * samplerate)
+    search = int(search_s * samplerate)
+
+    points: List[int] = []
+    previous = 0
+    while len(samples) - previous > target:
+        ideal = previous + target
+        lo = max(previous + frame_len, ideal - search) // frame_len
+        hi = min(len(energies), ideal // frame_len)
+        best_frame = lo + int(np.argmin(energies[lo:hi])) if hi > lo else ideal // frame_len
+        point = best_frame * frame_len + frame_len // 2
+        points.append(point)
+        previous = point
+    return points
+
+
+def chunk_ranges(num_samples: int, split_points: List[int], overlap: int) -> List[Tuple[int, int]]:
+    """Turn split points into (start, end) sample ranges that overlap by `overlap` samples around each cut."""
+    bounds = [0] + list(split_points) + [num_samples]
+    half = overlap // 2
+    return [
+        (max(0, bounds[i] - half) if i > 0 else 0,
+         min(num_samples, bounds[i + 1] + half) if i + 1 < len(bounds) - 1 else num_samples)
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", '', word.lower())
+
+
+def merge_transcripts(texts: List[str], max_overlap_words: int = 12) -> str:
+    """
+    Join chunk transcripts, dropping words repeated across chunk boundaries
+
+    The longest run of words (up to `max_overlap_words`) that ends one transcript and starts the
+    next is only kept once. Comparison ignores case and punctuation.
+    """
+    merged: List[str] = []
+    for text in texts:
+        words = text.split()
+        if not words:
+            continue
+        tail = [_normalize_word(w) for w in merged[-max_overlap_words:]]
+        head = [_normalize_word(w) for w in words[:max_overlap_words]]
+        overlap = 0
+        for size in range(min(len(tail), len(head)), 0, -1):
+            if tail[-size:] == head[:size] and any(head[:size]):
+                overlap = size
+                break
+        merged.extend(words[overlap:])
+    return ' '.join(merged)
@@ -0,0 +1,149 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from modules.audio_buffer import PCM_16_MAX, to_pcm16
+
+# NOTE: Devices are opened at their native rate/channel count, which avoids host API resampling
+# and format conversion surprises. Everything the recorder keeps is converted here, block by block,
+# to the (smaller) upload format: mono PCM_16 at the target rate (16 kHz by default).
+
+# Taps of the anti-aliasing low-pass filter applied before downsampling
+LOWPASS_TAPS = 63
+
+
+def downmix(block: np.ndarray) -> np.ndarray:
+    """Averages a (frames, channels) block into a float32 mono (frames,) array in [-1.0, 1.0]."""
+    samples = block.astype(np.float32)
+    if block.dtype == np.int16:
+        samples /= PCM_16_MAX
+    if samples.ndim == 1:
+        return samples
+    if samples.shape[1] == 1:
+        return samples[:, 0]
+    return samples.mean(axis=1)
+
+
+def lowpass_kernel(cutoff: float, taps: int = LOWPASS_TAPS) -> np.ndarray:
+    """Windowed-sinc low-pass FIR kernel.
+
+    Args:
+        cutoff: Cutoff frequency as a fraction of the input sample rate (0.0 to 0.5)
+        taps: Number of taps (odd)
+    """
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+class StreamResampler:
+    """Streaming resampler (low-pass FIR + linear interpolation) that keeps state between blocks."""
+
+    def __init__(self, input_rate: int, output_rate: int) -> None:
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.step = input_rate / output_rate  # Input samples advanced per output sample
+        self.kernel: Optional[np.ndarray] = None
+        if output_rate < input_rate:
+            # Cut a bit below the output Nyquist frequency to avoid aliasing
+            self.kernel = lowpass_kernel(0.45 * output_rate / input_rate)
+            self._history = np.zeros(len(self.kernel) - 1, dtype=np.float32)
+        self._previous: Optional[float] = None  # Last filtered sample of the previous block
+        self._position = 0.0  # Position of the next output sample relative to the block start
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resamples a float32 mono block, returning however many output samples are ready."""
+        if len(samples) == 0:
+            return np.empty(0, dtype=np.float32)
+
+        if self.kernel is not None:
+            padded = np.concatenate([self._history, samples])
+            filtered = np.convolve(padded, self.kernel, mode='valid').astype(np.float32)
+            self._history = padded[-(len(self.kernel) - 1):]
+        else:
+            filtered = samples
+
+        if self._previous is None:
+            self._previous = float(filtered[0])
+
+        # Index -1 is the last sample of the previous block, so interpolation spans block boundaries
+        source = np.concatenate([[self._previous], filtered])
+        last_index = len(filtered) - 1
+        count = int(np.floor((last_index - self._position) / self.step)) + 1 if self._position <= last_index else 0
+        positions = self._position + self.step * np.arange(count)
+        output = np.interp(positions, np.arange(-1, len(filtered)), source).astype(np.float32)
+
+        self._position = self._position + self.step * count - len(filtered)
+        self._previous = float(filtered[-1])
+        return output
+
+
+class CaptureConverter:
+    """Converts native device blocks to the capture format: int16 at the target rate and channel count."""
+
+    def __init__(self, input_rate: int, input_channels: int,
+                 output_rate: int, output_channels: int = 1) -> None:
+        self.input_rate = input_rate
+        self.input_channels = input_channels
+        self.output_rate = output_rate
+        self.output_channels = output_channels
+        self.resamplers = [StreamResampler(input_rate, output_rate) for _ in range(output_channels)] \
+            if input_rate != output_rate else []
+
+    @property
+    def passthrough(self) -> bool:
+        """True when blocks already are in the capture format (only dtype conversion needed)"""
+        return self.input_rate == self.output_rate and self.input_channels == self.output_channels
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Converts a (frames, input_channels) block to an int16 (frames, output_channels) block."""
+        if self.passthrough:
+            return to_pcm16(block).reshape(-1, self.output_channels)
+
+        block = block.reshape(len(block), -1)
+        if self.output_channels == 1:
+            channels = [downmix(block)]
+        else:
+            # Keep the first channels, repeating the last one if the device has fewer
+            channels = [downmix(block[:, min(i, block.shape[1] - 1)]) for i in range(self.output_channels)]
+
+        if self.resamplers:
+            channels = [resampler.process(samples) for resampler, samples in zip(self.resamplers, channels)]
+
+        return to_pcm16(np.stack(channels, axis=1))
+
+
+def frame_energies(samples: np.ndarray, samplerate: int, frame_s: float) -> np.ndarray:
+    """Mean energy of consecutive non-overlapping frames of a mono float signal."""
+    frame_len = max(1, int(frame_s * samplerate))
+    count = len(samples) // frame_len
+    if count == 0:
+        return np.zeros(0, dtype=np.float64)
+    frames = samples[:count * frame_len].reshape(count, frame_len).astype(np.float64)
+    return np.mean(np.square(frames), axis=1)
+
+
+def find_speech_bounds(pcm: np.ndarray, samplerate: int, threshold: float,
+                       margin_s: float = 0.5, frame_s: float = 0.02) -> Optional[Tuple[int, int]]:
+    """
+    Find the sample range to keep once leading/trailing silence is trimmed
+
+    Args:
+        pcm: int16 (frames,) or (frames, channels) recording
+        samplerate: Sample rate of the recording
+        threshold: Frame RMS below which audio counts as silence
+        margin_s: Silence kept before the first and after the last loud frame
+        frame_s: Length of the analysis frames
+
+    Returns:
+        (start, end) sample indices, or None if no frame is above the threshold
+    """
+    mono = downmix(pcm)
+    frame_len = max(1, int(frame_s * samplerate))
+    loud = np.flatnonzero(frame_energies(mono, samplerate, frame_s) >= threshold ** 2)
+    if len(loud) == 0:
+        return None
+    margin = int(margin_s * samplerate)
+    start = max(0, int(loud[0]) * frame_len - margin)
+    end = min(len(mono), (int(loud[-1]) + 1) * frame_len + margin)
+    return start, end
@@ -0,0 +1,73 @@
+import io
+import logging
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger('voice_typing')
+
+# NOTE: Compressed uploads are encoded block by block while recording, so the payload is ready
+# the moment recording stops. Rough sizes for 60 seconds of 16 kHz mono speech:
+# - WAV (PCM_16): ~1.9 MB
+# - FLAC (lossless): ~0.9-1.2 MB
+# - Ogg/Opus (lossy, tuned for speech): ~0.1-0.2 MB
+# All providers we support accept these formats.
+
+# upload_format setting -> (soundfile format, soundfile subtype)
+UPLOAD_FORMATS = {
+    'wav': ('WAV', 'PCM_16'),
+    'flac': ('FLAC', 'PCM_16'),
+    'ogg': ('OGG', 'OPUS'),
+}
+
+# Sample rates supported by the Opus encoder
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def resolve_upload_format(upload_format: str, samplerate: int) -> str:
+    """Returns the upload format to use, falling back to FLAC if Ogg/Opus is not usable."""
+    if upload_format not in UPLOAD_FORMATS:
+        logger.warning(f"Unknown upload format '{upload_format}', using WAV")
+        return 'wav'
+
+    if upload_format == 'ogg':
+        if 'OPUS' not in sf.available_subtypes('OGG'):
+            logger.warning("Ogg/Opus is not supported by the installed libsndfile, using FLAC")
+            return 'flac'
+        if samplerate not in OPUS_SAMPLE_RATES:
+            logger.warning(f"Opus does not support {samplerate} Hz, using FLAC")
+            return 'flac'
+
+    return upload_format
+
+
+class StreamingEncoder:
+    """Encodes PCM_16 blocks into an in-memory compressed file as they are recorded."""
+
+    def __init__(self, samplerate: int, channels: int = 1, upload_format: str = 'flac') -> None:
+        self.upload_format = resolve_upload_format(upload_format, samplerate)
+        file_format, subtype = UPLOAD_FORMATS[self.upload_format]
+        self._output = io.BytesIO()
+        self._file: Optional[sf.SoundFile] = sf.SoundFile(
+            self._output, mode='w',
+            samplerate=samplerate,
+            channels=channels,
+            format=file_format,
+            subtype=subtype
+        )
+        self._payload: Optional[bytes] = None
+
+    def write(self, pcm: np.ndarray) -> None:
+        """Encodes an int16 block"""
+        if self._file is not None:
+            self._file.write(pcm)
+
+    def finish(self) -> bytes:
+        """Flushes the encoder and returns the complete encoded file (idempotent)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._payload = self._output.getvalue()
+            self._output = io.BytesIO()
+        return self._payload or b''
@@ -1,5 +1,5 @@
 import re
-from typing import List, Dict, Optional, NamedTuple
+from typing import List, Dict, Optional, NamedTuple, Tuple
 import sounddevice as sd
 
 class DeviceIdentifier(NamedTuple):
@@ -85,6 +85,22 @@ def get_input_devices() -> List[Dict[str, any]]:
 
     return list(seen_devices.values())
 
+def get_native_input_format(device_id: Optional[int] = None) -> Tuple[int, int]:
+    """Returns (sample_rate, channels) the input device natively runs at.
+
+    Uses the active input device when no ID is given.
+    """
+    if device_id is None:
+        device_id = sd.default.device[0]
+        if device_id is None or device_id < 0:
+            device_id = get_default_device_id()
+
+    # Prefer the deduplicated device list, fall back to the exact device variant
+    device = next((d for d in get_input_devices() if d['id'] == device_id), None) or get_device_by_id(device_id)
+    if device is None:
+        raise ValueError(f"Input device with ID {device_id} not found")
+    return int(device['default_samplerate']), int(device['max_input_channels'])
+
 def get_default_device_id() -> int:
     """Returns the system default input device ID"""
     device = sd.query_devices(None, kind='input')
@@ -0,0 +1,102 @@
+from typing import Tuple
+
+import numpy as np
+import soundfile as sf
+
+from modules.audio_buffer import PCM_16_MAX, to_pcm16
+
+# NOTE: Both analysis paths below must give the same verdict. The running sums are kept on the
+# PCM_16 samples (exactly what gets written to the WAV), so they match a full read of the file.
+# Speech is counted on fixed-length analysis frames rather than callback blocks, whose size varies
+# (warm-up pre-roll, resampler output), so the frame counts don't depend on the device.
+
+# Length of the analysis frames speech is detected on
+ANALYSIS_FRAME_S = 0.02
+
+
+class RecordingStats:
+    """Running statistics of a recording, updated block by block from the audio callback."""
+
+    def __init__(self, samplerate: int, silence_threshold: float) -> None:
+        self.samplerate = samplerate
+        self.silence_threshold = silence_threshold
+        self.sample_count = 0
+        self.sum_squares = 0  # Exact integer sum of squared PCM_16 samples
+        self.peak = 0.0
+        self.frame_size = max(1, int(round(samplerate * ANALYSIS_FRAME_S)))
+        self.frame_count = 0  # Complete analysis frames
+        self.speech_frame_count = 0  # Analysis frames above the silence threshold
+        self._partial_frame = np.empty(0, dtype=np.int64)  # Samples of the frame in progress
+
+    def update(self, block: np.ndarray) -> None:
+        """Adds a block of float32 or int16 samples (any block size)."""
+        pcm = to_pcm16(block).astype(np.int64).ravel()
+        if pcm.size == 0:
+            return
+        self.sample_count += pcm.size
+        self.sum_squares += int(np.dot(pcm, pcm))
+        self.peak = max(self.peak, float(np.max(np.abs(pcm))) / PCM_16_MAX)
+
+        samples = np.concatenate([self._partial_frame, pcm])
+        complete = len(samples) // self.frame_size * self.frame_size
+        self._partial_frame = samples[complete:]
+        if complete:
+            frames = samples[:complete].reshape(-1, self.frame_size)
+            frame_rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / self.frame_size) / PCM_16_MAX
+            self.frame_count += len(frames)
+            self.speech_frame_count += int(np.count_nonzero(frame_rms >= self.silence_threshold))
+
+    @property
+    def duration(self) -> float:
+        return self.sample_count / self.samplerate
+
+    @property
+    def rms(self) -> float:
+        if self.sample_count == 0:
+            return 0.0
+        return float(np.sqrt(self.sum_squares / self.sample_count)) / PCM_16_MAX
+
+    @property
+    def speech_ratio(self) -> float:
+        """Fraction of the analysis frames above the silence threshold"""
+        if self.frame_count == 0:
+            return 0.0
+        return self.speech_frame_count / self.frame_count
+
+
+def evaluate_recording(duration: float, rms: float,
+                       silence_threshold: float, min_duration: float) -> Tuple[bool, str]:
+    """Decides whether a recording is worth transcribing.
+
+    Returns:
+        Tuple[bool, str]: (is_valid, reason_if_invalid)
+    """
+    if duration < min_duration:
+        return False, f"Recording too short ({duration:.1f}s < {min_duration}s)"
+
+    # Check if mostly silence
+    if rms < silence_threshold:
+        db_value = 20 * np.log10(max(1e-10, rms))
+        return False, f"Recording contains mostly silence (RMS: {rms:.4f} / {db_value:.1f}dB < threshold: {silence_threshold:.4f})"
+
+    return True, ""
+
+
+def analyze_audio_file(filename: str, silence_threshold: float, min_duration: float) -> Tuple[bool, str]:
+    """Analyzes a finished audio file by reading it completely (fallback path).
+
+    Returns:
+        Tuple[bool, str]: (is_valid, reason_if_invalid)
+    """
+    try:
+        with sf.SoundFile(filename) as audio_file:
+            duration = len(audio_file) / audio_file.samplerate
+            if duration < min_duration:
+                return evaluate_recording(duration, 0.0, silence_threshold, min_duration)
+
+            audio_data = audio_file.read()
+            rms = float(np.sqrt(np.mean(np.square(audio_data))))
+            return evaluate_recording(duration, rms, silence_threshold, min_duration)
+
+    except Exception as e:
+        return False, f"Error analyzing audio: {str(e)}"
@@ -0,0 +1,89 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from modules.audio_buffer import BlockQueue
+
+logger = logging.getLogger('voice_typing')
+
+# NOTE: The PortAudio callback runs on a real-time thread. Anything slow there (locks held by
+# the UI, disk writes, GIL contention) makes the device drop input. The callback only pushes
+# raw blocks onto a BlockQueue; conversion, analysis, level updates and writes happen here.
+
+
+class CaptureWorker:
+    """Consumer thread taking audio off a BlockQueue and handing it to `process_fn`."""
+
+    def __init__(self, queue: BlockQueue,
+                 process_fn: Callable[[np.ndarray], None],
+                 poll_interval: float = 0.01,
+                 name: str = 'capture') -> None:
+        """
+        Args:
+            queue: Queue filled by the audio callback
+            process_fn: Called on the worker thread with every batch of pending frames
+            poll_interval: Seconds between checks of the queue (the callback never signals)
+            name: Thread name
+        """
+        self.queue = queue
+        self.process_fn = process_fn
+        self.poll_interval = poll_interval
+        self.name = name
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._progress = threading.Condition()
+        self._processed = 0  # queue.total_read once the popped frames were processed
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._process_pending()
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        # Whatever was captured before stopping still belongs to the recording
+        self._process_pending()
+
+    def _process_pending(self) -> None:
+        frames = self.queue.pop()
+        if frames is not None:
+            try:
+                self.process_fn(frames)
+            except Exception as e:
+                logger.error(f"Capture worker error: {e}")
+        with self._progress:
+            self._processed = self.queue.total_read
+            self._progress.notify_all()
+
+    def drain(self, timeout: float = 1.0) -> bool:
+        """Wait until every frame pushed so far has been processed.
+
+        Returns:
+            bool: False if the worker did not catch up within the timeout
+        """
+        target = self.queue.total_written
+        if not self.running:
+            return self._processed >= target
+        self._wake.set()
+        with self._progress:
+            return self._progress.wait_for(lambda: self._processed >= target, timeout)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Process the remaining frames and stop the thread"""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.warning("Capture worker did not stop cleanly")
+            self._thread = None
@@ -1,6 +1,8 @@
 import logging
+import time
+import httpx
 import litellm
-from typing import Any, cast
+from typing import Any, Optional, cast
 
 # Get logger
 logger = logging.getLogger('voice_typing')
@@ -11,6 +13,38 @@ logging.getLogger('LiteLLM').setLevel(logging.CRITICAL + 1)
 # see: https://github.com/BerriAI/litellm/issues/9424
 # and: https://github.com/BerriAI/litellm/issues/9432
 
+# Shared connection pool for OpenAI-compatible providers: litellm builds its clients with
+# `client_session`, so connections opened by warm_up_llm() are reused by clean_transcription().
+_http_client = httpx.Client(limits=httpx.Limits(keepalive_expiry=300.0))
+litellm.client_session = _http_client
+
+# Default endpoints of the providers whose requests go through `_http_client`
+LLM_API_BASES = {
+    'openai': 'https://api.openai.com/v1',
+}
+
+
+def warm_up_llm(model: str) -> Optional[float]:
+    """
+    Open a pooled connection to the LLM provider ahead of cleaning (DNS, TCP and TLS)
+
+    Returns:
+        Seconds the warm-up request took, or None if the provider's connections can't be pre-warmed
+    """
+    try:
+        _, provider, _, api_base = litellm.get_llm_provider(model)
+        base_url = api_base or LLM_API_BASES.get(provider)
+        if not base_url:
+            return None
+        start = time.perf_counter()
+        _http_client.head(base_url, timeout=5.0)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Pre-warmed {provider} LLM connection, warm-up took {elapsed * 1000:.0f} ms")
+        return elapsed
+    except Exception as e:
+        logger.debug(f"Could not pre-warm LLM connection for {model}: {e}")
+        return None
+
 def clean_transcription(text: str, model: str, timeout: float = 45.0) -> str:
     """
     Cleans and corrects voice-to-text transcription using LLM models.
@@ -0,0 +1,156 @@
+import asyncio
+import functools
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from modules.async_runtime import shared_runtime
+
+logger = logging.getLogger('voice_typing')
+
+# NOTE: A hedged request sends the same audio to a second provider when the first one is slower
+# than it usually is (its latency percentile), and keeps whichever answer arrives first. Only the
+# slow tail pays for a second request. hedged_call_async cancels the loser, closing its
+# connection. hedged_call runs blocking functions in threads, which can't be interrupted: the
+# losing one is abandoned and its result is discarded when it completes (or it never starts).
+# Latencies are kept per second of audio: a long dictation is expected to take longer, and is only
+# hedged when it's slow for its length.
+
+# Latencies kept per provider
+HISTORY_SIZE = 50
+# Latencies needed before the percentile is trusted (the default delay is used until then)
+MIN_SAMPLES = 5
+# Shortest audio duration latencies are scaled by (the request overhead dominates shorter clips)
+MIN_AUDIO_S = 1.0
+
+
+class LatencyTracker:
+    """Recent request latencies per second of audio for each provider, used to compute the hedge delay."""
+
+    def __init__(self, history_size: int = HISTORY_SIZE) -> None:
+        self.history_size = history_size
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, latency: float, audio_seconds: float) -> None:
+        """Record the latency of a request for `audio_seconds` of audio"""
+        with self._lock:
+            history = self._latencies.setdefault(provider, deque(maxlen=self.history_size))
+            history.append(latency / max(audio_seconds, MIN_AUDIO_S))
+
+    def percentile(self, provider: str, percentile: float, audio_seconds: float) -> Optional[float]:
+        """Latency below which `percentile` (0.0 to 1.0) of the recent requests completed, scaled
+        to `audio_seconds` of audio, or None without enough history"""
+        with self._lock:
+            history = sorted(self._latencies.get(provider, ()))
+        if len(history) < MIN_SAMPLES:
+            return None
+        index = min(len(history) - 1, max(0, int(round(percentile * len(history))) - 1))
+        return history[index] * max(audio_seconds, MIN_AUDIO_S)
+
+
+class HedgeStats:
+    """Counts of hedged requests and which provider won them."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.hedged = 0
+        self.wins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, hedged: bool, winner: str) -> None:
+        with self._lock:
+            self.requests += 1
+            if hedged:
+                self.hedged += 1
+                self.wins[winner] = self.wins.get(winner, 0) + 1
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+    def summary(self) -> str:
+        wins = ', '.join(f"{name} {count}" for name, count in sorted(self.wins.items())) or 'none'
+        return f"hedged {self.hedged}/{self.requests} requests ({self.hedge_rate:.0%}), wins: {wins}"
+
+
+def hedged_call(primary: Tuple[str, Callable[[], Any]],
+                secondary: Tuple[str, Callable[[], Any]],
+                delay: float) -> Tuple[Any, str, bool]:
+    """
+    Blocking version of hedged_call_async, running the functions in threads of the shared AsyncRuntime
+
+    Args:
+        primary: (name, function) of the preferred request
+        secondary: (name, function) of the backup request
+        delay: Seconds to wait for the primary before hedging
+
+    Returns:
+        Tuple of (result, winner name, whether the secondary was started)
+
+    Raises:
+        Exception: The primary's error if both requests fail
+    """
+    return shared_runtime().run(hedged_call_async(
+        (primary[0], functools.partial(asyncio.to_thread, primary[1])),
+        (secondary[0], functools.partial(asyncio.to_thread, secondary[1])),
+        delay
+    ))
+
+
+async def hedged_call_async(primary: Tuple[str, Callable[[], Awaitable[Any]]],
+                            secondary: Tuple[str, Callable[[], Awaitable[Any]]],
+                            delay: float) -> Tuple[Any, str, bool]:
+    """
+    Run `primary`, and also `secondary` if the primary hasn't answered after `delay` seconds
+
+    The first successful result wins and the other request is cancelled. If one request fails
+    the other is still awaited, and the secondary is started right away when the primary fails
+    before the delay.
+
+    Args:
+        primary: (name, coroutine function) of the preferred request
+        secondary: (name, coroutine function) of the backup request
+        delay: Seconds to wait for the primary before hedging
+
+    Returns:
+        Tuple of (result, winner name, whether the secondary was started)
+
+    Raises:
+        Exception: The primary's error if both requests fail
+    """
+    names: Dict[asyncio.Task, str] = {}
+
+    def submit(name: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.ensure_future(fn())
+        names[task] = name
+        return task
+
+    primary_task = submit(*primary)
+    pending = {primary_task}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done and primary_task.exception() is None:
+            return primary_task.result(), primary[0], False
+
+        if not done:
+            logger.info(f"{primary[0]} has not answered after {delay:.1f}s, hedging with {secondary[0]}")
+        else:
+            logger.warning(f"{primary[0]} failed ({primary_task.exception()}), trying {secondary[0]}")
+        pending.add(submit(*secondary))
+        errors: Dict[str, BaseException] = {}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if pending:
+                        logger.info(f"{names[task]} won the hedged request, cancelling "
+                                    f"{', '.join(names[t] for t in pending)}")
+                    return task.result(), names[task], True
+                errors[names[task]] = task.exception()
+        raise errors.get(primary[0]) or next(iter(errors.values()))
+    finally:
+        # Also reached when the caller is cancelled: nothing keeps running in the background
+        for task in pending:
+            task.cancel()
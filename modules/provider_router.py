@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger('voice_typing')
+
+# NOTE: Each provider has a circuit breaker. It opens after repeated failures (or a high recent
+# error rate, once the recent requests include as many failures), which takes the provider out
+# of rotation so dictations go straight to the next provider in the priority list instead of
+# waiting on a provider in the middle of an incident.
+# An open circuit is only closed again once a background probe request succeeds.
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'  # A probe request is in flight
+
+# Weight of the newest sample in the latency and error rate averages
+EWMA_ALPHA = 0.3
+# Consecutive failures that open the circuit
+FAILURE_THRESHOLD = 3
+# Recent error rate that opens the circuit, once the recent requests include at least the
+# failure threshold's number of failures (a couple of failures after a few successes is a blip)
+ERROR_RATE_THRESHOLD = 0.5
+# Requests the recent failures are counted over
+RECENT_WINDOW = 10
+# Seconds between probes of a provider with an open circuit
+PROBE_INTERVAL = 30.0
+
+
+class ProviderHealth:
+    """Latency and failure statistics of one provider."""
+
+    def __init__(self) -> None:
+        self.state = CLOSED
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.recent: Deque[bool] = deque(maxlen=RECENT_WINDOW)  # Whether each recent request failed
+        self.opened_at: Optional[float] = None
+
+    def summary(self) -> str:
+        latency = f"{self.ewma_latency:.2f}s" if self.ewma_latency is not None else "n/a"
+        return (f"{self.state}, latency {latency}, error rate {self.error_rate:.0%}, "
+                f"{self.failures} failures ({self.timeouts} timeouts) in {self.requests} requests")
+
+
+class ProviderRouter:
+    """Orders providers by priority and health, with a circuit breaker per provider."""
+
+    def __init__(self, probe_fn: Optional[Callable[[str], None]] = None,
+                 failure_threshold: int = FAILURE_THRESHOLD,
+                 probe_interval: float = PROBE_INTERVAL,
+                 alpha: float = EWMA_ALPHA) -> None:
+        """
+        Args:
+            probe_fn: Sends a small test request to a provider, raising if it fails
+            failure_threshold: Consecutive failures that open a provider's circuit
+            probe_interval: Seconds between probes of a provider with an open circuit
+            alpha: Weight of the newest sample in the moving averages
+        """
+        self.probe_fn = probe_fn
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.alpha = alpha
+        self._health: Dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._probes: Dict[str, threading.Thread] = {}
+
+    def health(self, provider: str) -> ProviderHealth:
+        with self._lock:
+            return self._health.setdefault(provider, ProviderHealth())
+
+    def is_available(self, provider: str) -> bool:
+        return self.health(provider).state == CLOSED
+
+    def order(self, providers: List[str]) -> List[str]:
+        """
+        Providers to try, in priority order, skipping those with an open circuit
+
+        If every circuit is open the full list is returned: trying a broken provider
+        is still better than failing without a request.
+        """
+        available = [p for p in providers if self.is_available(p)]
+        return available or list(providers)
+
+    def record_success(self, provider: str, latency: float) -> None:
+        health = self.health(provider)
+        with self._lock:
+            health.requests += 1
+            health.consecutive_failures = 0
+            health.recent.append(False)
+            health.error_rate *= 1 - self.alpha
+            health.ewma_latency = latency if health.ewma_latency is None else (
+                self.alpha * latency + (1 - self.alpha) * health.ewma_latency)
+
+    def record_failure(self, provider: str, timeout: bool = False) -> None:
+        health = self.health(provider)
+        with self._lock:
+            health.requests += 1
+            health.failures += 1
+            health.timeouts += int(timeout)
+            health.consecutive_failures += 1
+            health.recent.append(True)
+            health.error_rate = self.alpha + (1 - self.alpha) * health.error_rate
+            should_open = health.state == CLOSED and (
+                health.consecutive_failures >= self.failure_threshold
+                or (sum(health.recent) >= self.failure_threshold and health.error_rate >= ERROR_RATE_THRESHOLD))
+        if should_open:
+            self._open(provider)
+
+    def _open(self, provider: str) -> None:
+        health = self.health(provider)
+        with self._lock:
+            health.state = OPEN
+            health.opened_at = time.monotonic()
+        logger.warning(f"Circuit opened for STT provider {provider}: {health.summary()}")
+        if self.probe_fn is None:
+            return
+        with self._lock:
+            probe = self._probes.get(provider)
+            if probe is not None and probe.is_alive():
+                return
+            probe = threading.Thread(target=self._probe_loop, args=(provider,),
+                                     name=f'probe-{provider}', daemon=True)
+            self._probes[provider] = probe
+        probe.start()
+
+    def _probe_loop(self, provider: str) -> None:
+        health = self.health(provider)
+        while not self._stop_event.wait(self.probe_interval):
+            with self._lock:
+                health.state = HALF_OPEN
+            try:
+                self.probe_fn(provider)
+            except Exception as e:
+                logger.info(f"Probe of STT provider {provider} failed, circuit stays open: {e}")
+                with self._lock:
+                    health.state = OPEN
+                continue
+            with self._lock:
+                health.state = CLOSED
+                health.consecutive_failures = 0
+                health.recent.clear()
+                health.error_rate = 0.0
+                down = time.monotonic() - (health.opened_at or time.monotonic())
+            logger.info(f"Probe of STT provider {provider} succeeded, circuit closed after {down:.0f}s")
+            return
+
+    def stop(self) -> None:
+        """Stop the background probes"""
+        self._stop_event.set()
@@ -1,23 +1,45 @@
+import logging
 import threading
-from typing import Optional, Callable, Tuple, Any
-import time
+from typing import Optional, Callable, Tuple, Any, Union
 
 import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
 from modules.settings import Settings
+from modules.audio_buffer import BlockQueue, CaptureBuffer, RingBuffer, PCM_16_MAX, to_pcm16, wav_header
+from modules.audio_dsp import CaptureConverter, find_speech_bounds
+from modules.audio_encoder import StreamingEncoder
+from modules.audio_manager import get_native_input_format
+from modules.capture import CaptureWorker
+from modules.audio_stats import RecordingStats, evaluate_recording, analyze_audio_file
+from modules.vad import VoiceActivityDetector
 
 # NOTE: Optimized settings for speech recording
-# - 16kHz sample rate is optimal for STT, using 22.05kHz for safety margin
+# - 16kHz sample rate is optimal for STT (every provider resamples to it anyway)
 # - 16-bit depth is standard for speech
 # - Mono channel as stereo provides no benefit
 # - WAV format ensures compatibility and quality
-# NOTE: Ends up being ~2.6 megabytes for every 60 seconds with these settings.
+# NOTE: Ends up being ~1.9 megabytes for every 60 seconds with these settings (was ~2.6 MB at 22.05kHz).
+# NOTE: The device is opened at its native rate/channels and converted by CaptureConverter.
+# NOTE: The audio callback only queues raw blocks, a CaptureWorker thread does everything else.
+
+logger = logging.getLogger('voice_typing')
 
 # Initialize settings to get configurable values
 settings = Settings()
 
+# Capture format of the recording (what gets analyzed and uploaded)
+SAMPLE_RATE = int(settings.get('capture_samplerate'))
+CAPTURE_CHANNELS = int(settings.get('capture_channels'))
+# Sample format requested from the device ('int16' avoids float conversion in the callback)
+CAPTURE_DTYPE = settings.get('capture_dtype')
+# Open the device at its native rate/channels (True) or let the host API convert (False)
+CAPTURE_NATIVE_FORMAT = settings.get('capture_native_format')
+
+# Seconds of native audio the callback queue holds before blocks are dropped
+CAPTURE_QUEUE_SECONDS = 2.0
+
 # RMS threshold below which audio is considered silence
 # (-30 dB = 0.0316, -40 dB = 0.01, -50 dB = 0.003)
 # Configurable via settings.json
@@ -26,6 +48,22 @@ SILENCE_THRESHOLD = settings.get('silence_threshold')
 MIN_DURATION = 1.0
 # Time of continuous silence (in seconds) before auto-stopping
 DEFAULT_SILENT_START_TIMEOUT = 4.0
+# Smart Capture: seconds of silence after speech before auto-stopping and transcribing
+DEFAULT_SMART_CAPTURE_SILENCE = 2.0
+# Trimming less silence than this (in seconds) isn't worth re-encoding the recording
+MIN_TRIM_DURATION = 0.25
+# 'memory' keeps the recording in a CaptureBuffer, 'file' writes temp_audio.wav while recording
+CAPTURE_MODE = settings.get('capture_mode')
+# In-memory recordings past this size spill to `filename`
+CAPTURE_MEMORY_LIMIT_MB = settings.get('capture_memory_limit_mb')
+# 'wav', or 'flac'/'ogg' to encode a compressed upload payload while recording
+UPLOAD_FORMAT = settings.get('upload_format')
+# Warm mic: keep the input stream open between recordings so the first syllable isn't clipped
+WARM_MIC = settings.get('warm_mic')
+# Seconds of audio from before the key press included at the start of a warm mic recording
+WARM_MIC_PREROLL = settings.get('warm_mic_preroll')
+# Seconds without a recording after which the warm mic stream releases the device (None = never)
+WARM_MIC_IDLE_RELEASE = settings.get('warm_mic_idle_release')
 
 class AudioRecorder:
     # Controls how smooth/reactive the audio level indicator bar appears in the UI
@@ -35,24 +73,54 @@ class AudioRecorder:
 
     def __init__(self, filename: str = 'temp_audio.wav',
                  level_callback: Optional[Callable[[float], None]] = None,
-                 silent_start_timeout: Optional[float] = None) -> None:
+                 silent_start_timeout: Optional[float] = None,
+                 capture_mode: Optional[str] = None,
+                 warm_mic: Optional[bool] = None,
+                 smart_capture_silence: Optional[float] = None,
+                 auto_stop_callback: Optional[Callable[[str], None]] = None) -> None:
         self.filename = filename
+        self.capture_mode = capture_mode or CAPTURE_MODE
         self.recording = False
         self.thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()  # Wakes the recording thread when the recording ends
         self.level_callback = level_callback
         self.smoothed_level: float = 0.0
         self.stream: Optional[sd.InputStream] = None
         self.file: Optional[sf.SoundFile] = None
+        self.buffer: Optional[CaptureBuffer] = None  # Set in 'memory' capture mode
+        self.stats: Optional[RecordingStats] = None  # Running statistics for analyze_recording
+        self.encoder: Optional[StreamingEncoder] = None  # Compressed upload payload, if enabled
+        self.warm_mic = WARM_MIC if warm_mic is None else warm_mic
+        self.warm_mic_preroll: float = WARM_MIC_PREROLL
+        self.warm_mic_idle_release: Optional[float] = WARM_MIC_IDLE_RELEASE
+        self.warm_stream: Optional[sd.InputStream] = None
+        self.warm_worker: Optional[CaptureWorker] = None
+        self.ring: Optional[RingBuffer] = None  # Pre-roll audio while the warm stream is idle
+        self._idle_timer: Optional[threading.Timer] = None
+        self.converter: Optional[CaptureConverter] = None  # Native device format -> capture format
+        self.capturing = False  # Whether blocks are being added to the recording
+        # Lost input during the current recording, counted by the audio callback
+        self.input_overflows = 0  # Reported by the device (the callback ran too late)
+        self.dropped_blocks = 0  # The capture worker fell behind and the queue was full
+        # Called with every int16 block written to the recording (e.g. streaming transcription)
+        self.block_listeners: list[Callable[[np.ndarray], None]] = []
         self._lock: threading.Lock = threading.Lock()
         self.audio_data: list[np.ndarray] = []  # Store audio chunks for analysis
-        self.silence_start: Optional[float] = None
+        self.vad: Optional[VoiceActivityDetector] = None  # Drives silent-start and Smart Capture stops
         self.silent_start_timeout = silent_start_timeout
+        # Smart Capture: stop after this much silence following speech (None = disabled)
+        self.smart_capture_silence = smart_capture_silence
         self.auto_stopped = False
-        self.recording_start_time: Optional[float] = None
-        self.initial_sound_detected = False  # Track if we've detected any sound
+        # Why the recording auto-stopped: 'silent_start', 'smart_capture' or 'error'
+        self.auto_stop_reason: Optional[str] = None
+        # Called with auto_stop_reason when the recording stops on its own. Runs on the capture
+        # worker thread, so it must hand off to the app (e.g. root.after) rather than call stop().
+        self.auto_stop_callback = auto_stop_callback
 
     def _calculate_level(self, indata: np.ndarray) -> float:
-        """Calculate audio level from input data"""
+        """Calculate audio level from input data and report it to the level callback"""
+        if indata.dtype == np.int16:
+            indata = indata / PCM_16_MAX
         rms = np.sqrt(np.mean(np.square(indata)))
 
         # Convert to dB for level display
@@ -60,24 +128,6 @@ class AudioRecorder:
         normalized = (db + 60) / 60
         current_level = max(0.0, min(1.0, normalized))
 
-        # Only check for silence at the start of the recording, before any sound is detected.
-        if (self.silent_start_timeout is not None and
-            self.recording_start_time is not None and
-            not self.initial_sound_detected):
-
-            if rms < SILENCE_THRESHOLD:
-                if self.silence_start is None:
-                    self.silence_start = time.time()
-                elif time.time() - self.silence_start >= self.silent_start_timeout:
-                    print(f"Stopping due to {self.silent_start_timeout}s of initial silence")
-                    self.auto_stopped = True
-                    self.recording = False
-                    return 0.0
-            else:
-                # We've detected sound, stop checking for silence
-                self.initial_sound_detected = True
-                self.silence_start = None
-
         # Apply smoothing for UI feedback
         self.smoothed_level = (self.SMOOTHING_FACTOR * current_level) + \
                               ((1 - self.SMOOTHING_FACTOR) * self.smoothed_level)
@@ -88,80 +138,204 @@ class AudioRecorder:
         return self.smoothed_level
 
     def analyze_recording(self) -> Tuple[bool, str]:
-        """Analyze the recorded audio file for silence and duration.
+        """Analyze the recording for silence and duration.
+
+        Uses the running statistics gathered in the audio callback, so this is O(1) at stop
+        time. Falls back to reading the recorded file when no statistics are available.
 
         Returns:
             Tuple[bool, str]: (is_valid, reason_if_invalid)
         """
-        try:
-            with sf.SoundFile(self.filename) as audio_file:
-                # Check duration
-                duration = len(audio_file) / audio_file.samplerate
-                if duration < MIN_DURATION:
-                    return False, f"Recording too short ({duration:.1f}s < {MIN_DURATION}s)"
+        if self.stats is not None:
+            logger.debug(
+                f"Recording stats: {self.stats.duration:.1f}s, RMS {self.stats.rms:.4f}, "
+                f"peak {self.stats.peak:.3f}, speech frames {self.stats.speech_frame_count}/{self.stats.frame_count}"
+            )
+            return evaluate_recording(self.stats.duration, self.stats.rms, SILENCE_THRESHOLD, MIN_DURATION)
+        return analyze_audio_file(self.filename, SILENCE_THRESHOLD, MIN_DURATION)
+
+    def _open_sinks(self) -> None:
+        """Create the stats accumulator and the buffer or file the recording is written to"""
+        self.stats = RecordingStats(samplerate=SAMPLE_RATE, silence_threshold=SILENCE_THRESHOLD)
+        if self.capture_mode == 'memory':
+            self.buffer = CaptureBuffer(
+                samplerate=SAMPLE_RATE,
+                channels=CAPTURE_CHANNELS,
+                max_memory_bytes=int(CAPTURE_MEMORY_LIMIT_MB * 1024 * 1024) if CAPTURE_MEMORY_LIMIT_MB else None,
+                spill_filename=self.filename
+            )
+        else:
+            self.file = sf.SoundFile(self.filename, mode='w',
+                                     samplerate=SAMPLE_RATE,
+                                     channels=CAPTURE_CHANNELS,
+                                     subtype='PCM_16',
+                                     format='WAV')
+        if UPLOAD_FORMAT and UPLOAD_FORMAT != 'wav':
+            self.encoder = StreamingEncoder(SAMPLE_RATE, CAPTURE_CHANNELS, UPLOAD_FORMAT)
+        self.capturing = True
 
-                # Read the entire file
-                audio_data = audio_file.read()
+    def _close_sinks(self) -> None:
+        """Finalize the recording file or spill file. Must be called with the lock held."""
+        self.capturing = False
+        if self.file is not None:
+            try:
+                self.file.close()
+            except:
+                pass
+            self.file = None
+        if self.buffer is not None:
+            try:
+                self.buffer.close()
+            except:
+                pass
+        if self.encoder is not None:
+            try:
+                self.encoder.finish()
+            except Exception as e:
+                print(f"Error finalizing compressed recording: {e}")
+                self.encoder = None
 
-                # Calculate RMS value
-                rms = np.sqrt(np.mean(np.square(audio_data)))
+    def _write_block(self, indata: np.ndarray) -> None:
+        """Write a block to the recording and update the running stats"""
+        # Quantize once so the running stats match what ends up in the recording
+        pcm = to_pcm16(indata)
+        if self.stats is not None:
+            self.stats.update(pcm)
+        if self.buffer is not None:
+            # Copied into the preallocated buffer, no intermediate copy needed
+            self.buffer.append(pcm)
+        elif self.file is not None:
+            self.file.write(pcm)
+        if self.encoder is not None:
+            self.encoder.write(pcm)
+        for listener in self.block_listeners:
+            try:
+                listener(pcm)
+            except Exception as e:
+                logger.error(f"Block listener error: {e}")
 
-                # Check if mostly silence
-                if rms < SILENCE_THRESHOLD:
-                    db_value = 20 * np.log10(max(1e-10, rms))
-                    return False, f"Recording contains mostly silence (RMS: {rms:.4f} / {db_value:.1f}dB < threshold: {SILENCE_THRESHOLD:.4f})"
+    def add_block_listener(self, listener: Callable[[np.ndarray], None]) -> None:
+        """Register a function called with every block written to the recording"""
+        with self._lock:
+            self.block_listeners.append(listener)
+
+    def remove_block_listener(self, listener: Callable[[np.ndarray], None]) -> None:
+        """Unregister a block listener (no-op if not registered)"""
+        with self._lock:
+            if listener in self.block_listeners:
+                self.block_listeners.remove(listener)
+
+    def _process_block(self, indata: np.ndarray) -> bool:
+        """Handle one recorded block. Must be called with the lock held.
+
+        Returns:
+            bool: False if the recording should stop
+        """
+        if self.level_callback:
+            self._calculate_level(indata)
 
-                return True, ""
+        if self.vad is not None:
+            self.vad.process(indata)
+            # Only check for silence at the start of the recording, before any speech is detected
+            if (self.silent_start_timeout is not None and not self.vad.speech_detected and
+                    self.vad.elapsed >= self.silent_start_timeout):
+                print(f"Stopping due to {self.silent_start_timeout}s of initial silence")
+                self._auto_stop('silent_start')
+                return False
 
+        try:
+            self._write_block(indata)
         except Exception as e:
-            return False, f"Error analyzing audio: {str(e)}"
+            print(f"Audio callback error: {e}")
+            self.recording = False
+            self._stop_event.set()
+            return False
 
-    def _record(self) -> None:
-        """Record audio in a separate thread"""
-        def audio_callback(indata: np.ndarray,
-                         frames: int,
-                         time_info: Any,
-                         status: int) -> None:
-            if status:
-                print(f'Audio callback status: {status}')
+        if (self.vad is not None and self.smart_capture_silence is not None and
+                self.vad.speech_detected and self.vad.silence_duration >= self.smart_capture_silence):
+            logger.info(f"Smart Capture: stopping after {self.vad.silence_duration:.1f}s of silence")
+            self._auto_stop('smart_capture')
+            return False
+        return True
 
-            with self._lock:
-                if not self.recording or self.file is None:
-                    return
+    def _auto_stop(self, reason: str) -> None:
+        """Stop the recording from the audio callback. Must be called with the lock held."""
+        self.auto_stopped = True
+        self.auto_stop_reason = reason
+        self.recording = False
+        self._stop_event.set()
 
-                if self.level_callback:
-                    level = self._calculate_level(indata)
-                    self.level_callback(level)
+    def _create_input_stream(self) -> Tuple[sd.InputStream, CaptureWorker]:
+        """Create an input stream at the device's native format and its capture worker (started)"""
+        samplerate, channels = SAMPLE_RATE, CAPTURE_CHANNELS
+        if CAPTURE_NATIVE_FORMAT:
+            try:
+                samplerate, channels = get_native_input_format()
+            except Exception as e:
+                logger.warning(f"Could not query native input format, using {SAMPLE_RATE} Hz: {e}")
+        converter = CaptureConverter(samplerate, channels, SAMPLE_RATE, CAPTURE_CHANNELS)
+        queue = BlockQueue(int(CAPTURE_QUEUE_SECONDS * samplerate), channels, CAPTURE_DTYPE)
+        self.converter = converter
+        logger.debug(f"Opening input stream at {samplerate} Hz, {channels} channel(s), {CAPTURE_DTYPE} "
+                     f"-> capturing {SAMPLE_RATE} Hz, {CAPTURE_CHANNELS} channel(s)")
 
-                    # If auto-stopped, stop the stream
-                    if self.auto_stopped:
-                        self.recording = False
-                        raise sd.CallbackStop()
+        def audio_callback(indata: np.ndarray,
+                           frames: int,
+                           time_info: Any,
+                           status: sd.CallbackFlags) -> None:
+            # Runs on the real-time audio thread: no locks, no allocations, no I/O
+            if status.input_overflow:
+                self.input_overflows += 1
+            if not queue.push(indata):
+                self.dropped_blocks += 1
 
-                # Only write audio data if not auto-stopped
-                if not self.auto_stopped and self.file is not None:
-                    try:
-                        self.file.write(indata.copy())
-                    except Exception as e:
-                        print(f"Audio callback error: {e}")
-                        self.recording = False
-                        raise sd.CallbackStop()
+        worker = CaptureWorker(queue, lambda block: self._consume_block(converter.process(block)))
+        worker.start()
+        try:
+            stream = sd.InputStream(samplerate=samplerate,
+                                    channels=channels,
+                                    dtype=CAPTURE_DTYPE,
+                                    callback=audio_callback)
+        except Exception:
+            worker.stop()
+            raise
+        return stream, worker
 
+    def _consume_block(self, pcm: np.ndarray) -> None:
+        """Add a converted block to the pre-roll ring and the recording (capture worker thread)"""
+        with self._lock:
+            if self.ring is not None:
+                self.ring.write(pcm)
+            if not self.capturing or self.auto_stopped:
+                return
+            if self._process_block(pcm) or not self.auto_stopped:
+                return
+            reason = self.auto_stop_reason
+        if self.auto_stop_callback:
+            try:
+                self.auto_stop_callback(reason)
+            except Exception as e:
+                logger.error(f"Auto-stop callback error: {e}")
+
+    def _record(self) -> None:
+        """Record audio in a separate thread"""
+        worker: Optional[CaptureWorker] = None
         try:
-            with sf.SoundFile(self.filename, mode='w',
-                            samplerate=22050,
-                            channels=1,
-                            subtype='PCM_16',
-                            format='WAV') as self.file:
-                with sd.InputStream(samplerate=22050,
-                                  channels=1,
-                                  callback=audio_callback) as self.stream:
-                    while self.recording:
-                        sd.sleep(100)
+            with self._lock:
+                self._open_sinks()
+            stream, worker = self._create_input_stream()
+            with stream as self.stream:
+                self._stop_event.wait()
         except Exception as e:
             print(f"Recording error: {e}")
             self.auto_stopped = True
+            self.auto_stop_reason = 'error'
+            if self.auto_stop_callback:
+                self.auto_stop_callback(self.auto_stop_reason)
         finally:
+            if worker is not None:
+                # Blocks captured before the stream closed still belong to the recording
+                worker.stop()
             with self._lock:
                 if self.stream is not None:
                     try:
@@ -169,27 +343,108 @@ class AudioRecorder:
                     except:
                         pass
                     self.stream = None
-                if self.file is not None:
-                    try:
-                        self.file.close()
-                    except:
-                        pass
-                    self.file = None
+                self._close_sinks()
+
+    def open_warm_stream(self) -> None:
+        """Open the long-lived input stream used in warm mic mode (no-op if already open)"""
+        with self._lock:
+            if self.warm_stream is not None:
+                return
+            self.ring = RingBuffer(int((self.warm_mic_preroll + 1.0) * SAMPLE_RATE), CAPTURE_CHANNELS)
+            try:
+                self.warm_stream, self.warm_worker = self._create_input_stream()
+                self.warm_stream.start()
+                logger.info("Warm mic stream opened")
+            except Exception as e:
+                logger.error(f"Could not open warm mic stream, falling back to per-recording streams: {e}")
+                if self.warm_worker is not None:
+                    self.warm_worker.stop()
+                self.warm_stream = None
+                self.warm_worker = None
+                self.ring = None
+
+    def warm_up(self) -> None:
+        """Open the warm mic stream ahead of the first recording, if warm mic mode is enabled"""
+        if not self.warm_mic:
+            return
+        self.open_warm_stream()
+        if self.warm_stream is not None and not self.recording:
+            self._schedule_idle_release()
+
+    def release_warm_stream(self) -> None:
+        """Close the warm mic stream and release the input device"""
+        self._cancel_idle_timer()
+        with self._lock:
+            stream, self.warm_stream = self.warm_stream, None
+            worker, self.warm_worker = self.warm_worker, None
+            self.ring = None
+        if stream is not None:
+            try:
+                stream.close()
+            except:
+                pass
+            logger.info("Warm mic stream released")
+        if worker is not None:
+            worker.stop()
+
+    def _cancel_idle_timer(self) -> None:
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _schedule_idle_release(self) -> None:
+        """Release the device if no recording starts within the idle period"""
+        self._cancel_idle_timer()
+        if self.warm_mic_idle_release is None:
+            return
+        self._idle_timer = threading.Timer(self.warm_mic_idle_release, self.release_warm_stream)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
 
     def start(self) -> None:
         """Start recording and reset silence detection"""
         self.auto_stopped = False
-        self.silence_start = None
-        self.initial_sound_detected = False
-        self.recording_start_time = time.time()
+        self.auto_stop_reason = None
+        self._stop_event.clear()
+        self.input_overflows = 0
+        self.dropped_blocks = 0
+        self.vad = VoiceActivityDetector(SAMPLE_RATE, SILENCE_THRESHOLD)
+        self.buffer = None
+        self.stats = None
+        self.encoder = None
+
+        if self.warm_mic:
+            self._cancel_idle_timer()
+            self.open_warm_stream()
+            if self.warm_stream is not None:
+                with self._lock:
+                    # The stream is already running: mark the position and include the pre-roll
+                    self._open_sinks()
+                    preroll_frames = int(self.warm_mic_preroll * SAMPLE_RATE)
+                    self._write_block(self.ring.read_since(self.ring.total_written - preroll_frames))
+                    self.thread = None
+                    self.recording = True
+                return
+
         self.recording = True
         self.thread = threading.Thread(target=self._record)
         self.thread.start()
 
     def stop(self) -> None:
-        """Stop recording with timeout to prevent hanging"""
+        """Stop recording, returning once the recording is finalized (or after a timeout)"""
+        if self.thread is None and self.warm_worker is not None:
+            # Warm mic recording: let the worker catch up with what was captured until now
+            if not self.warm_worker.drain():
+                logger.warning("Capture worker fell behind, the end of the recording may be cut")
         with self._lock:
             self.recording = False
+            self._stop_event.set()
+            if self.thread is None:
+                # Warm mic recording: the stream stays open, just finalize the recording
+                self._close_sinks()
+
+        if self.thread is None and self.warm_stream is not None:
+            self._schedule_idle_release()
 
         if self.thread:
             # Add timeout to thread.join() to prevent hanging
@@ -204,13 +459,49 @@ class AudioRecorder:
                         except:
                             pass
                         self.stream = None
-                    if self.file is not None:
-                        try:
-                            self.file.close()
-                        except:
-                            pass
-                        self.file = None
+                    self._close_sinks()
+
+    def get_recording(self) -> Union[bytes, str]:
+        """Return the last recording: the compressed payload if enabled, else WAV bytes or a file path"""
+        if self.encoder is not None:
+            return self.encoder.finish()
+        if self.buffer is not None:
+            return self.buffer.get_payload()
+        return self.filename
+
+    def get_trimmed_recording(self, margin_s: float) -> Tuple[Optional[Union[bytes, str]], float, float]:
+        """Return the recording with leading/trailing silence beyond `margin_s` removed.
+
+        Only WAV recordings are trimmed: a compressed upload payload is encoded while recording,
+        and re-encoding the trimmed audio after stop would cost more than the silence saves.
+
+        Returns:
+            Tuple of (trimmed WAV or None if there is nothing worth trimming,
+                      seconds removed at the start, seconds removed at the end)
+        """
+        if self.encoder is not None:
+            return None, 0.0, 0.0
+        if self.buffer is not None:
+            pcm = self.buffer.view()
+        else:
+            pcm, _ = sf.read(self.filename, dtype='int16', always_2d=True)
+
+        bounds = find_speech_bounds(pcm, SAMPLE_RATE, SILENCE_THRESHOLD, margin_s)
+        if bounds is None:
+            return None, 0.0, 0.0
+        start, end = bounds
+        leading, trailing = start / SAMPLE_RATE, (len(pcm) - end) / SAMPLE_RATE
+        if leading + trailing < MIN_TRIM_DURATION:
+            return None, 0.0, 0.0
+
+        trimmed = pcm[start:end]
+        return wav_header(len(trimmed), SAMPLE_RATE, CAPTURE_CHANNELS) + trimmed.tobytes(), leading, trailing
+
+    @property
+    def overflow_count(self) -> int:
+        """Input blocks lost during the current (or last) recording"""
+        return self.input_overflows + self.dropped_blocks
 
     def was_auto_stopped(self) -> bool:
-        """Check if recording was automatically stopped due to silence"""
+        """Check if recording was automatically stopped (see auto_stop_reason)"""
         return self.auto_stopped
\ No newline at end of file
@@ -1,20 +1,66 @@
 import json
 import os
-from typing import Any, Dict
+import weakref
+from typing import Any, Callable, Dict, List
 
 class Settings:
+    # Called with (key, value) whenever a setting is changed through any instance
+    _change_listeners: List[Callable[[str, Any], None]] = []
+    _instances: 'weakref.WeakSet[Settings]' = weakref.WeakSet()
+
     def __init__(self) -> None:
         self.settings_file: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'settings.json')
         self.default_settings: Dict[str, Any] = {
             'continuous_capture': True,
-            'smart_capture': False,
+            'smart_capture': False,  # Auto-stop and transcribe once speech is followed by silence
+            'smart_capture_silence': 2.0,  # Seconds of silence after speech that end a Smart Capture recording
             'silent_start_timeout': 4.0,
             'silence_threshold': 0.01,  # RMS threshold for silence detection (0.01 = -40dB)
 
+            # Audio capture
+            'capture_mode': 'memory',  # 'memory' (in-memory buffer), 'file' (write temp_audio.wav while recording)
+            'capture_samplerate': 16000,  # Sample rate of recordings (what gets uploaded)
+            'capture_channels': 1,  # Channels of recordings (devices with more channels are downmixed)
+            'capture_dtype': 'int16',  # Sample format requested from the device ('int16', 'float32')
+            'capture_native_format': True,  # Open the device at its native rate/channels and convert in-app
+            'capture_memory_limit_mb': 50,  # In-memory recordings larger than this spill to disk
+            'upload_format': 'wav',  # 'wav', 'flac' (lossless, ~2x smaller), 'ogg' (Opus, ~10x smaller)
+            'warm_mic': False,  # Keep the microphone stream open between recordings
+            'warm_mic_preroll': 0.3,  # Seconds of audio before the key press included in warm mic recordings
+            'warm_mic_idle_release': 300.0,  # Release the microphone after this many idle seconds (None = never)
+
+            'trim_silence': True,  # Remove leading/trailing silence before upload
+            'trim_silence_margin': 0.5,  # Seconds of silence kept around the speech when trimming
+
+            'streaming_transcription': False,  # Transcribe finished segments while still recording
+            'streaming_min_segment': 20.0,  # Segments are only cut at pauses after this many seconds
+            'streaming_pause': 0.7,  # Seconds of silence that count as a natural pause
+            'streaming_upload': False,  # Upload while recording (custom provider, when streaming_transcription is off)
+
             'stt_provider': 'openai',  # 'openai', 'google', etc.
             'stt_language': 'en',
             'openai_stt_model': 'gpt-4o-transcribe',  # 'whisper-1', 'gpt-4o-transcribe'
             'google_stt_language': 'en-US',
+            'custom_stt_endpoint': None,  # Pinned custom STT endpoint path or URL (None = discover it)
+            'custom_stt_stream_protocol': True,  # Stream PCM to custom STT servers that support the streaming protocol
+            'custom_stt_endpoint_cache': {},  # Endpoint discovered per custom STT base URL (managed by the app)
+            'local_stt_model_path': None,  # Model used by the 'local' provider (e.g. a faster-whisper model directory)
+            'local_stt_backend': 'faster-whisper',  # Inference backend of the 'local' provider
+            'local_stt_int8': True,  # Run the local model with int8 quantized weights (faster on CPU)
+            'local_stt_threads': 0,  # CPU threads used by the local model (0 = backend default)
+            'max_upload_mb': 24.0,  # Recordings larger than this are split into chunks (OpenAI limit is 25 MB)
+            'chunk_duration': 300.0,  # Maximum length in seconds of each chunk
+            'chunk_overlap': 0.5,  # Seconds of audio shared by neighboring chunks
+            'transcribe_concurrency': 3,  # Chunks transcribed at the same time
+            'prewarm_connections': True,  # Connect to the STT/LLM endpoints when recording starts
+            'stt_http2': True,  # Use HTTP/2 for OpenAI requests when the 'h2' package is installed
+            'provider_priority': [],  # Providers used, in order, while the selected one is failing
+            'circuit_failure_threshold': 3,  # Consecutive failures that take a provider out of rotation
+            'circuit_probe_interval': 30.0,  # Seconds between checks of a failing provider
+            'hedge_provider': None,  # Provider also sent the audio when the main one is slow (None = off)
+            'hedge_percentile': 0.9,  # Hedge once a request takes longer than this share of recent ones
+            'hedge_default_delay': 5.0,  # Seconds before hedging until enough latencies are known
+            'hedge_min_delay': 1.0,  # Never hedge sooner than this many seconds
 
             'clean_transcription': False,
             'cleaning_timeout': 10.0,  # Timeout for LLM cleaning in seconds
@@ -32,6 +78,17 @@ class Settings:
         }
         self.current_settings: Dict[str, Any] = self.load_settings()
         self._run_migrations()
+        Settings._instances.add(self)
+
+    @classmethod
+    def add_change_listener(cls, listener: Callable[[str, Any], None]) -> None:
+        """Register a function called with (key, value) after any setting changes"""
+        cls._change_listeners.append(listener)
+
+    @classmethod
+    def remove_change_listener(cls, listener: Callable[[str, Any], None]) -> None:
+        if listener in cls._change_listeners:
+            cls._change_listeners.remove(listener)
 
     def _run_migrations(self) -> None:
         """Runs all necessary setting migrations and saves if changes were made."""
@@ -123,4 +180,14 @@ class Settings:
 
     def set(self, key: str, value: Any) -> None:
         self.current_settings[key] = value
-        self.save_settings()
\ No newline at end of file
+        self.save_settings()
+
+        # Modules keep their own instance (e.g. transcribe, recorder), keep them in sync
+        for instance in list(Settings._instances):
+            if instance is not self:
+                instance.current_settings[key] = value
+        for listener in list(Settings._change_listeners):
+            try:
+                listener(key, value)
+            except Exception as e:
+                print(f"Error in settings change listener: {str(e)}")
\ No newline at end of file
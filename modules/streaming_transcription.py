@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from modules.audio_buffer import PCM_16_MAX, wav_header
+from services.streaming_upload import LiveAudioSource
+
+logger = logging.getLogger('voice_typing')
+
+# NOTE: Segments are only cut at natural pauses and never shorter than the minimum length,
+# since providers transcribe more accurately with more context. With the defaults, a
+# 3 minute dictation is sent as ~6 segments, and only the last one is left in flight
+# when recording stops.
+
+
+class SegmentedTranscriber:
+    """Cuts live audio at pauses and transcribes finished segments while recording continues."""
+
+    def __init__(self, samplerate: int,
+                 transcribe_fn: Callable[[bytes], str],
+                 silence_threshold: float,
+                 channels: int = 1,
+                 min_segment_s: float = 20.0,
+                 max_segment_s: float = 90.0,
+                 pause_s: float = 0.7,
+                 max_workers: int = 2) -> None:
+        """
+        Args:
+            samplerate: Sample rate of the fed PCM_16 blocks
+            transcribe_fn: Function transcribing a WAV payload (e.g. transcribe_audio)
+            silence_threshold: Block RMS below which audio counts as a pause
+            channels: Channel count of the fed blocks
+            min_segment_s: Segments are not cut before reaching this length
+            max_segment_s: Segments are cut at this length even without a pause
+            pause_s: Length of silence that counts as a natural pause
+            max_workers: Maximum segments transcribed concurrently
+        """
+        self.samplerate = samplerate
+        self.channels = channels
+        self.transcribe_fn = transcribe_fn
+        self.silence_threshold = silence_threshold
+        self.min_segment_frames = int(min_segment_s * samplerate)
+        self.max_segment_frames = int(max_segment_s * samplerate)
+        self.pause_frames = int(pause_s * samplerate)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='segment')
+        self._futures: List[Optional[Future]] = []
+        self._blocks: List[np.ndarray] = []
+        self._segment_frames = 0
+        self._silent_frames = 0
+        self._speech_in_segment = False
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def feed(self, pcm: np.ndarray) -> None:
+        """Adds a recorded int16 block, cutting a segment at a pause once long enough."""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._blocks.append(pcm.copy())
+            self._segment_frames += len(pcm)
+
+            rms = np.sqrt(np.mean(np.square(pcm, dtype=np.float64))) / PCM_16_MAX if len(pcm) else 0.0
+            if rms < self.silence_threshold:
+                self._silent_frames += len(pcm)
+            else:
+                self._silent_frames = 0
+                self._speech_in_segment = True
+
+            at_pause = self._silent_frames >= self.pause_frames
+            if (self._segment_frames >= self.min_segment_frames and at_pause) or \
+                    self._segment_frames >= self.max_segment_frames:
+                self._submit_segment()
+
+    def _submit_segment(self) -> None:
+        """Submits the current segment for transcription. Must be called with the lock held."""
+        if self._blocks and self._speech_in_segment:
+            pcm = np.concatenate(self._blocks)
+            payload = wav_header(len(pcm), self.samplerate, self.channels) + pcm.tobytes()
+            index = len(self._futures)
+            logger.info(f"Submitting segment {index + 1} ({len(pcm) / self.samplerate:.1f}s) while recording")
+            self._futures.append(self._executor.submit(self._transcribe_segment, index, payload))
+        elif self._blocks:
+            # Skip silence-only segments, they only produce hallucinated text
+            self._futures.append(None)
+        self._blocks = []
+        self._segment_frames = 0
+        self._silent_frames = 0
+        self._speech_in_segment = False
+
+    def _transcribe_segment(self, index: int, payload: bytes) -> str:
+        start = time.perf_counter()
+        text = self.transcribe_fn(payload)
+        logger.debug(f"Segment {index + 1} transcribed in {time.perf_counter() - start:.2f}s")
+        return text
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._futures)
+
+    def finish(self) -> str:
+        """Submits the final segment, waits for all segments and stitches their texts in order.
+
+        Raises:
+            Exception: If any segment failed to transcribe
+        """
+        with self._lock:
+            self._submit_segment()
+            futures = list(self._futures)
+        try:
+            texts = [future.result() for future in futures if future is not None]
+            return ' '.join(text.strip() for text in texts if text and text.strip())
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def cancel(self) -> None:
+        """Drops pending segments and ignores any further audio"""
+        with self._lock:
+            self._cancelled = True
+            self._blocks = []
+            for future in self._futures:
+                if future is not None:
+                    future.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SpeculativeUpload:
+    """Streams the recording to the provider while recording, so stopping only finishes the upload."""
+
+    def __init__(self, transcribe_stream_fn: Callable[[LiveAudioSource], str]) -> None:
+        """
+        Args:
+            transcribe_stream_fn: Function uploading a live source and returning its transcription
+                (e.g. a CustomTranscriber.transcribe_stream partial)
+        """
+        self.source = LiveAudioSource()
+        self._started = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload')
+        self._future: Future = self._executor.submit(transcribe_stream_fn, self.source)
+
+    def feed(self, pcm: np.ndarray) -> None:
+        """Adds a recorded int16 block to the request body"""
+        self.source.write(pcm.tobytes())
+
+    def end_of_audio(self) -> None:
+        """Ends the request body, the provider can finish transcribing"""
+        self.source.finish()
+
+    def finish(self) -> str:
+        """Ends the body if needed and waits for the transcription.
+
+        Raises:
+            Exception: If the upload failed or was rejected
+        """
+        self.source.finish()
+        try:
+            return self._future.result()
+        finally:
+            logger.debug(f"Streaming upload took {time.perf_counter() - self._started:.1f}s in total")
+            self._executor.shutdown(wait=False)
+
+    def cancel(self) -> None:
+        """Aborts the upload, dropping the connection"""
+        self.source.abort()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,18 +1,38 @@
 """Multi-provider Speech-to-Text module with Strategy pattern"""
+import asyncio
+import contextlib
+import functools
+import io
 import os
 import logging
-from typing import Union, Optional
+import threading
+import time
+from typing import Union, Optional, List, Dict, Tuple, Any
 from pathlib import Path
 from dotenv import load_dotenv
+import httpx
+import numpy as np
+import openai
+import requests
+import soundfile as sf
+from websockets.exceptions import WebSocketException
 
 # Import all provider classes
 from services.openai_stt import OpenAITranscriber
+from services.openai_realtime_stt import OpenAIRealtimeTranscriber
 from services.google_stt import GoogleTranscriber
 from services.custom_stt import CustomTranscriber
+from services.local_stt import BACKENDS as LOCAL_STT_BACKENDS, LocalTranscriber
+from services.errors import ProviderError
 from modules.settings import Settings
+from modules.audio_chunker import find_split_points, chunk_ranges, merge_transcripts
+from modules.async_runtime import shared_runtime
+from modules.hedging import HedgeStats, LatencyTracker, hedged_call_async
+from modules.provider_router import ProviderRouter
 
 # OpenAI Speech to text docs: https://platform.openai.com/docs/guides/speech-to-text
 # ⚠️ IMPORTANT: OpenAI Audio API file uploads are currently limited to 25 MB
+# Recordings over `max_upload_mb` are transparently split and transcribed in chunks.
 
 load_dotenv()
 
@@ -22,12 +42,95 @@ logger = logging.getLogger('voice_typing')
 settings = Settings()
 
 
-def _get_transcriber(provider_name: str):
+# Transcriber instances keyed by (provider, model, base_url, language). They are reused across
+# dictations so their HTTP connection pools (and TLS sessions) stay warm.
+_transcribers: Dict[Tuple[str, Optional[str], Optional[str], str], Any] = {}
+_transcribers_lock = threading.Lock()
+# Requests in flight per transcriber (by id). Transcribers dropped from the cache while in use are
+# kept in _retired and closed once their last request finishes.
+_in_flight: Dict[int, int] = {}
+_retired: Dict[int, Any] = {}
+
+# Settings that change how transcribers are built
+TRANSCRIBER_SETTINGS = {
+    'stt_language', 'openai_stt_model', 'google_stt_language',
+    'custom_stt_base_url', 'custom_stt_model', 'custom_stt_endpoint', 'custom_stt_stream_protocol', 'stt_http2',
+    'local_stt_model_path', 'local_stt_backend', 'local_stt_int8', 'local_stt_threads',
+}
+
+# Errors that are the provider's fault (network, HTTP and server errors). Only these count against
+# its health and move the dictation to the next provider: any other provider would fail the same
+# way on an unreadable recording.
+PROVIDER_ERRORS = (ProviderError, ConnectionError, TimeoutError, requests.RequestException, httpx.HTTPError,
+                   openai.APIError, WebSocketException)
+
+# Latencies of successful requests per provider (they set the hedge delay) and hedging results
+latency_tracker = LatencyTracker()
+hedge_stats = HedgeStats()
+
+
+def _transcriber_key(provider_name: str, language: Optional[str] = None) -> Tuple[str, Optional[str], Optional[str], str]:
+    """Cache key of the transcriber for a provider with the current settings"""
+    if provider_name in ("openai", "openai_realtime"):
+        return (provider_name, settings.get('openai_stt_model') or 'gpt-4o-mini-transcribe', None,
+                language or settings.get('stt_language') or 'en')
+    elif provider_name == "google":
+        return (provider_name, None, None, language or settings.get('google_stt_language') or 'en-US')
+    elif provider_name == "custom":
+        return (provider_name, settings.get('custom_stt_model') or 'parakeet-tdt-0.6b-v2',
+                settings.get('custom_stt_base_url') or 'http://localhost:8000',
+                language or settings.get('stt_language') or 'en')
+    elif provider_name == "local":
+        # The backend takes the place of the base URL: it's where the model runs
+        return (provider_name, settings.get('local_stt_model_path'), settings.get('local_stt_backend'),
+                language or settings.get('stt_language') or 'en')
+    # Add other providers here as needed
+    else:
+        raise ValueError(f"Unknown STT provider: {provider_name}")
+
+
+def _create_transcriber(key: Tuple[str, Optional[str], Optional[str], str]):
+    """Build a new transcriber instance for a cache key"""
+    provider_name, model, base_url, language = key
+    if provider_name == "openai":
+        return OpenAITranscriber(model=model, language=language, http2=bool(settings.get('stt_http2')))
+    elif provider_name == "openai_realtime":
+        return OpenAIRealtimeTranscriber(model=model, language=language)
+    elif provider_name == "google":
+        return GoogleTranscriber(language=language)
+    elif provider_name == "custom":
+        return CustomTranscriber(
+            base_url=base_url, model=model, language=language,
+            endpoint=settings.get('custom_stt_endpoint'),
+            discovery=(settings.get('custom_stt_endpoint_cache') or {}).get(base_url),
+            on_discovery=lambda discovery: _save_custom_endpoint(base_url, discovery),
+            stream_protocol=settings.get('custom_stt_stream_protocol') is not False
+        )
+    elif provider_name == "local":
+        return LocalTranscriber(
+            model_path=model, backend=base_url, language=language,
+            int8=bool(settings.get('local_stt_int8')), threads=int(settings.get('local_stt_threads') or 0)
+        )
+    raise ValueError(f"Unknown STT provider: {provider_name}")
+
+
+def _save_custom_endpoint(base_url: str, discovery: Optional[Dict[str, Any]]) -> None:
+    """Persist the endpoint discovered for a custom STT base URL (None removes it)"""
+    cache = dict(settings.get('custom_stt_endpoint_cache') or {})
+    if discovery is None:
+        cache.pop(base_url, None)
+    else:
+        cache[base_url] = discovery
+    settings.set('custom_stt_endpoint_cache', cache)
+
+
+def _get_transcriber(provider_name: str, language: Optional[str] = None):
     """
-    Factory function to get a transcriber instance based on provider name
+    Get the (cached) transcriber instance for a provider
 
     Args:
         provider_name: Name of the provider ('openai', 'google', etc.)
+        language: Optional language override (uses settings default if not provided)
 
     Returns:
         Transcriber instance for the specified provider
@@ -35,67 +138,323 @@ def _get_transcriber(provider_name: str):
     Raises:
         ValueError: If provider is unknown
     """
-    if provider_name == "openai":
-        model = settings.get('openai_stt_model') or 'gpt-4o-mini-transcribe'
-        language = settings.get('stt_language') or 'en'
-        return OpenAITranscriber(model=model, language=language)
-    elif provider_name == "google":
-        language = settings.get('google_stt_language') or 'en-US'
-        return GoogleTranscriber(language=language)
-    elif provider_name == "custom":
-        base_url = settings.get('custom_stt_base_url') or 'http://localhost:8000'
-        model = settings.get('custom_stt_model') or 'parakeet-tdt-0.6b-v2'
-        language = settings.get('stt_language') or 'en'
-        return CustomTranscriber(base_url=base_url, model=model, language=language)
-    # Add other providers here as needed
+    key = _transcriber_key(provider_name, language)
+    with _transcribers_lock:
+        transcriber = _transcribers.get(key)
+        if transcriber is None:
+            transcriber = _create_transcriber(key)
+            _transcribers[key] = transcriber
+        return transcriber
+
+
+def clear_transcriber_cache() -> None:
+    """Drop cached transcribers and close their connection pools (once their requests in flight finish)"""
+    with _transcribers_lock:
+        transcribers = list(_transcribers.values())
+        _transcribers.clear()
+        idle = []
+        for transcriber in transcribers:
+            if id(transcriber) in _in_flight:
+                _retired[id(transcriber)] = transcriber
+            else:
+                idle.append(transcriber)
+    for transcriber in idle:
+        _close_transcriber(transcriber)
+
+
+def _close_transcriber(transcriber) -> None:
+    if hasattr(transcriber, 'close'):
+        try:
+            transcriber.close()
+        except Exception as e:
+            logger.debug(f"Error closing transcriber: {e}")
+
+
+@contextlib.contextmanager
+def transcriber_in_use(transcriber):
+    """Keep a transcriber open while a request uses it, even if the cache is cleared meanwhile"""
+    key = id(transcriber)
+    with _transcribers_lock:
+        _in_flight[key] = _in_flight.get(key, 0) + 1
+    try:
+        yield transcriber
+    finally:
+        retired = None
+        with _transcribers_lock:
+            _in_flight[key] -= 1
+            if not _in_flight[key]:
+                del _in_flight[key]
+                retired = _retired.pop(key, None)
+        if retired is not None:
+            _close_transcriber(retired)
+
+
+def _on_setting_changed(key: str, value: Any) -> None:
+    if key in TRANSCRIBER_SETTINGS:
+        clear_transcriber_cache()
+    elif key == 'circuit_failure_threshold':
+        router.failure_threshold = int(value)
+    elif key == 'circuit_probe_interval':
+        router.probe_interval = float(value)
+
+
+@functools.lru_cache(maxsize=1)
+def _probe_clip() -> bytes:
+    """Half a second of silence, sent to check if a provider works again"""
+    buffer = io.BytesIO()
+    sf.write(buffer, np.zeros(8000, dtype=np.int16), 16000, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def _probe_provider(provider_name: str) -> None:
+    """Raises if the provider can't transcribe a short clip"""
+    with transcriber_in_use(_get_transcriber(provider_name)) as transcriber:
+        transcriber.transcribe(_probe_clip())
+
+
+# Health of each provider. Providers that keep failing are skipped until a probe succeeds.
+router = ProviderRouter(probe_fn=_probe_provider,
+                        failure_threshold=int(settings.get('circuit_failure_threshold')),
+                        probe_interval=float(settings.get('circuit_probe_interval')))
+
+Settings.add_change_listener(_on_setting_changed)
+
+
+def _is_timeout(error: Exception) -> bool:
+    """Whether an error from any provider's HTTP client is a timeout"""
+    return isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower()
+
+
+def _is_provider_error(error: Exception) -> bool:
+    """Whether an error is the provider's fault, rather than the recording's or the configuration's"""
+    return isinstance(error, PROVIDER_ERRORS) or _is_timeout(error)
+
+
+def _record_failure(provider_name: str, error: Exception) -> None:
+    if _is_provider_error(error):
+        router.record_failure(provider_name, timeout=_is_timeout(error))
+
+
+def record_stream_outcome(provider_name: str, latency: float, error: Optional[Exception] = None) -> None:
+    """
+    Record the outcome of a recording streamed to a provider while it was recorded
+
+    Streamed transcriptions don't go through the request functions, but their failures still
+    count towards the provider's circuit breaker.
+
+    Args:
+        provider_name: Provider the recording was streamed to
+        latency: Seconds from the end of the recording to the result (or the error)
+        error: Error the stream failed with (None if it succeeded)
+    """
+    if error is None:
+        router.record_success(provider_name, latency)
     else:
-        raise ValueError(f"Unknown STT provider: {provider_name}")
+        _record_failure(provider_name, error)
+
+
+def _audio_duration(audio: Union[bytes, str, Path]) -> Optional[float]:
+    """Duration in seconds of an audio payload or file, from its header (None if it can't be read)"""
+    try:
+        info = sf.info(io.BytesIO(audio) if isinstance(audio, bytes) else str(audio))
+    except (RuntimeError, OSError) as e:
+        logger.debug(f"Could not read the audio duration: {e}")
+        return None
+    return info.duration
 
 
-def transcribe_audio(filename: str, language: Optional[str] = None) -> str:
+async def _call_transcriber(provider_name: str, transcriber, audio: Union[bytes, str, Path]) -> str:
+    """Run one transcription request, recording its outcome and latency (cancellation isn't counted as a failure)"""
+    start = time.perf_counter()
+    try:
+        with transcriber_in_use(transcriber):
+            if hasattr(transcriber, 'transcribe_async'):
+                result = await transcriber.transcribe_async(audio)
+            else:
+                result = await asyncio.to_thread(transcriber.transcribe, audio)
+    except Exception as e:
+        _record_failure(provider_name, e)
+        raise
+    latency = time.perf_counter() - start
+    router.record_success(provider_name, latency)
+    duration = _audio_duration(audio)
+    if duration is not None:
+        latency_tracker.record(provider_name, latency, duration)
+    return result
+
+
+def _payload_size(audio: Union[bytes, str, Path]) -> int:
+    """Size in bytes of an audio payload or file"""
+    if isinstance(audio, (str, Path)):
+        return os.path.getsize(audio)
+    return len(audio)
+
+
+def _upload_limit(transcriber) -> int:
+    """Largest payload in bytes sent to a transcriber in one request (max_upload_mb or the provider's own limit)"""
+    limit = int(settings.get('max_upload_mb') * 1024 * 1024)
+    return min(limit, getattr(transcriber, 'max_upload_bytes', limit))
+
+
+def _split_audio(audio: Union[bytes, str, Path], max_bytes: int) -> List[bytes]:
+    """
+    Split a recording into chunks that each fit the upload limit
+
+    Chunks are cut at low-energy points near the target length, overlap slightly, and are
+    encoded in the same format as the recording (WAV, FLAC or Ogg/Opus).
+    """
+    source = io.BytesIO(audio) if isinstance(audio, bytes) else str(audio)
+    with sf.SoundFile(source) as audio_file:
+        samplerate = audio_file.samplerate
+        file_format, subtype = audio_file.format, audio_file.subtype
+        data = audio_file.read(dtype='int16', always_2d=True)
+
+    duration = len(data) / samplerate
+    # Aim each chunk at 90% of the limit (compression ratio varies between chunks)
+    target_s = min(settings.get('chunk_duration'), duration * max_bytes / _payload_size(audio) * 0.9)
+    mono = data.mean(axis=1) / 32768.0
+    split_points = find_split_points(mono, samplerate, target_s, search_s=min(5.0, target_s / 4))
+    overlap = int(settings.get('chunk_overlap') * samplerate)
+
+    chunks = []
+    for start, end in chunk_ranges(len(data), split_points, overlap):
+        buffer = io.BytesIO()
+        sf.write(buffer, data[start:end], samplerate, format=file_format, subtype=subtype)
+        chunks.append(buffer.getvalue())
+    return chunks
+
+
+async def _transcribe_chunked(provider_name: str, transcriber, audio: Union[bytes, str, Path]) -> str:
+    """Transcribe a recording over the upload limit as concurrent chunks and merge the texts"""
+    max_bytes = _upload_limit(transcriber)
+    chunks = await asyncio.to_thread(_split_audio, audio, max_bytes)
+    concurrency = max(1, int(settings.get('transcribe_concurrency')))
+    logger.info(f"Recording is {_payload_size(audio) / 1024 / 1024:.1f} MB (limit {max_bytes / 1024 / 1024:.1f} MB), "
+                f"transcribing {len(chunks)} chunks, {concurrency} at a time")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def transcribe_chunk(chunk: bytes) -> str:
+        async with semaphore:
+            return await _call_transcriber(provider_name, transcriber, chunk)
+
+    # If one chunk fails, gather() propagates the error and the caller's cancellation stops the rest
+    tasks = [asyncio.ensure_future(transcribe_chunk(chunk)) for chunk in chunks]
+    try:
+        texts = await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return merge_transcripts(texts)
+
+
+def _hedge_delay(provider: str, audio: Union[bytes, str, Path]) -> float:
+    """Seconds to wait for a provider before hedging: its latency percentile for audio this long, once known"""
+    duration = _audio_duration(audio)
+    delay = None
+    if duration is not None:
+        delay = latency_tracker.percentile(provider, settings.get('hedge_percentile'), duration)
+    if delay is None:
+        delay = settings.get('hedge_default_delay')
+    return max(settings.get('hedge_min_delay'), delay)
+
+
+async def _transcribe_hedged(provider: str, transcriber, hedge_provider: str,
+                             audio: Union[bytes, str, Path], language: str) -> str:
+    """Transcribe with `provider`, sending the audio to `hedge_provider` too if it's slow (the
+    losing request is cancelled)"""
+    try:
+        secondary = _get_transcriber(hedge_provider, language)
+    except ValueError as e:
+        logger.error(f"Invalid hedge provider, not hedging: {e}")
+        return await _call_transcriber(provider, transcriber, audio)
+
+    result, winner, hedged = await hedged_call_async(
+        (provider, lambda: _call_transcriber(provider, transcriber, audio)),
+        (hedge_provider, lambda: _call_transcriber(hedge_provider, secondary, audio)),
+        _hedge_delay(provider, audio)
+    )
+    hedge_stats.record(hedged, winner)
+    if hedged:
+        logger.info(f"Hedged transcription won by {winner}; {hedge_stats.summary()}")
+    return result
+
+
+def _provider_priority() -> List[str]:
+    """The selected provider followed by the fallbacks of `provider_priority`"""
+    selected = get_current_provider()
+    return [selected] + [p for p in settings.get('provider_priority') or [] if p != selected]
+
+
+async def _transcribe_with(provider: str, audio: Union[bytes, str, Path], language: str) -> str:
+    """Transcribe audio with one provider, splitting it first if it's over the provider upload limit"""
+    transcriber = _get_transcriber(provider, language)
+    model_info = f"/{transcriber.model}" if hasattr(transcriber, 'model') else ""
+    logger.info(f"Using provider: {provider}{model_info}, language: {language}")
+
+    with transcriber_in_use(transcriber):
+        if _payload_size(audio) > _upload_limit(transcriber):
+            return await _transcribe_chunked(provider, transcriber, audio)
+        hedge_provider = settings.get('hedge_provider')
+        if hedge_provider and hedge_provider != provider and router.is_available(hedge_provider):
+            return await _transcribe_hedged(provider, transcriber, hedge_provider, audio, language)
+        return await _call_transcriber(provider, transcriber, audio)
+
+
+async def transcribe_audio_async(audio: Union[bytes, str, Path], language: Optional[str] = None) -> str:
     """
     Transcribe audio using the configured provider
 
     This is the high-level function that the rest of the app calls.
-    It routes to the appropriate provider based on settings.
+    It routes to the selected provider, or to the next healthy provider of
+    `provider_priority` when the selected one is failing (network or HTTP errors).
+    Concurrent requests (chunks, hedges) run on the caller's event loop without extra threads,
+    and cancelling the coroutine aborts the HTTP requests in flight.
 
     Args:
-        filename: Path to the audio file to transcribe
+        audio: WAV bytes from the in-memory capture buffer, or path to the audio file
         language: Optional language override (uses settings default if not provided)
 
     Returns:
         Transcribed text
 
     Raises:
-        Exception: If transcription fails
+        Exception: If transcription fails with every provider, or with an error that isn't the
+            provider's (e.g. an unreadable recording)
     """
-    provider = settings.get('stt_provider') or 'openai'
-
     # Get language from parameter or settings
     if language is None:
         language = settings.get('stt_language') or 'en'
 
-    try:
-        transcriber = _get_transcriber(provider)
-
-        # Get model info if available
-        model_info = ""
-        if hasattr(transcriber, 'model'):
-            model_info = f"/{transcriber.model}"
-
-        logger.info(f"Using provider: {provider}{model_info}, language: {language}")
-
-        # Update language if provided as parameter
-        if language and hasattr(transcriber, 'update_language'):
-            transcriber.update_language(language)
-
-        # Transcribe the audio
-        result = transcriber.transcribe(filename)
-        return result
-
-    except Exception as e:
-        logger.error(f"Transcription failed with provider {provider}: {e}")
-        raise
+    providers = router.order(_provider_priority())
+    if providers[0] != get_current_provider():
+        logger.warning(f"STT provider {get_current_provider()} is unavailable, using {providers[0]}")
+
+    last_error: Optional[Exception] = None
+    for provider in providers:
+        try:
+            _get_transcriber(provider, language)
+        except ValueError as e:
+            # Not configured (e.g. no API key): the next provider may be
+            logger.error(f"STT provider {provider} is unavailable: {e}")
+            last_error = e
+            continue
+        try:
+            return await _transcribe_with(provider, audio, language)
+        except Exception as e:
+            logger.error(f"Transcription failed with provider {provider}: {e}")
+            if not _is_provider_error(e):
+                raise
+            last_error = e
+    raise last_error
+
+
+def transcribe_audio(audio: Union[bytes, str, Path], language: Optional[str] = None) -> str:
+    """
+    Blocking version of transcribe_audio_async, running it on the shared AsyncRuntime (for
+    callers on their own threads, e.g. streamed segments)
+    """
+    return shared_runtime().run(transcribe_audio_async(audio, language))
 
 
 def set_stt_provider(provider: str) -> None:
@@ -107,7 +466,8 @@ def set_stt_provider(provider: str) -> None:
     """
     # Validate provider
     try:
-        _get_transcriber(provider)  # This will raise if provider is invalid
+        # Raises if provider is invalid. The instance is cached and used by the next transcription.
+        _get_transcriber(provider)
         settings.set('stt_provider', provider)
         logger.info(f"STT provider changed to: {provider}")
     except ValueError as e:
@@ -115,11 +475,58 @@ def set_stt_provider(provider: str) -> None:
         raise
 
 
+def get_stream_transcriber() -> Optional[Tuple[str, Any]]:
+    """(provider, transcriber) of the active provider if it can transcribe a recording while it is recorded, else None"""
+    provider = get_active_provider()
+    try:
+        transcriber = _get_transcriber(provider)
+    except Exception as e:
+        logger.debug(f"No transcriber available for streaming upload: {e}")
+        return None
+    return (provider, transcriber) if hasattr(transcriber, 'transcribe_stream') else None
+
+
+def warm_up_transcriber() -> None:
+    """Warm the blocking clients used by streaming uploads, see warm_up_transcriber_async"""
+    shared_runtime().run(warm_up_transcriber_async(blocking=True))
+
+
+async def warm_up_transcriber_async(blocking: bool = False) -> None:
+    """
+    Open connections to the active provider's endpoint, so the upload doesn't pay for them
+
+    Called in the background while the user is speaking. Failures are only logged, the
+    transcription itself will report any real connection problem. Async connections belong to
+    the event loop that opened them, so this must run on the loop the transcription will run on.
+
+    Args:
+        blocking: Warm the blocking clients (used by streaming uploads) instead of the async ones
+    """
+    provider = get_active_provider()
+    try:
+        transcriber = _get_transcriber(provider)
+        with transcriber_in_use(transcriber):
+            if hasattr(transcriber, 'warm_up_async') and not blocking:
+                elapsed = await transcriber.warm_up_async()
+            elif hasattr(transcriber, 'warm_up'):
+                elapsed = await asyncio.to_thread(transcriber.warm_up)
+            else:
+                return
+        logger.info(f"Warmed up {provider} transcriber, warm-up took {elapsed * 1000:.0f} ms")
+    except Exception as e:
+        logger.debug(f"Could not pre-warm {provider} connection: {e}")
+
+
 def get_current_provider() -> str:
     """Get the currently configured STT provider"""
     return settings.get('stt_provider') or 'openai'
 
 
+def get_active_provider() -> str:
+    """The provider the next transcription will use: the configured one unless it's failing"""
+    return router.order(_provider_priority())[0]
+
+
 def get_available_providers() -> list:
     """Get list of available STT providers"""
     providers = []
@@ -131,6 +538,11 @@ def get_available_providers() -> list:
             'display_name': 'OpenAI',
             'models': ['whisper-1', 'gpt-4o-transcribe', 'gpt-4o-mini-transcribe']
         })
+        providers.append({
+            'name': 'openai_realtime',
+            'display_name': 'OpenAI Realtime (streaming)',
+            'models': ['whisper-1', 'gpt-4o-transcribe', 'gpt-4o-mini-transcribe']
+        })
 
     # Check Google
     if os.environ.get("GOOGLE_CLOUD_API_KEY"):
@@ -140,6 +552,15 @@ def get_available_providers() -> list:
             'models': []  # Google doesn't have selectable models in same way
         })
     
+    # Local in-process model, once a model path is configured and its backend is installed
+    local_backend = LOCAL_STT_BACKENDS.get(settings.get('local_stt_backend'))
+    if settings.get('local_stt_model_path') and local_backend and local_backend.available():
+        providers.append({
+            'name': 'local',
+            'display_name': 'Local (in-process)',
+            'models': []  # The model is set by local_stt_model_path
+        })
+
     # Custom STT provider is always available (for local or remote models)
     providers.append({
         'name': 'custom',
@@ -40,6 +40,7 @@ def create_microphone_menu(app):
             identifier = create_device_identifier(device)._asdict()
             app.settings.set('selected_microphone', identifier)
             set_input_device(device['id'])
+            app.rewarm_microphone()
             # Log the device change
             app.logger.info(f"Microphone changed to: {device['name']} (ID: {device['id']}, Channels: {device['max_input_channels']}, Sample Rate: {device['default_samplerate']} Hz)")
         return handler
@@ -135,9 +136,9 @@ def create_stt_provider_menu(app):
 
     # Create model selection items (only for OpenAI currently)
     model_items = []
-    if current_provider == 'openai':
+    if current_provider in ('openai', 'openai_realtime'):
         current_model = app.settings.get('openai_stt_model')
-        openai_provider = next((p for p in available_providers if p['name'] == 'openai'), None)
+        openai_provider = next((p for p in available_providers if p['name'] == current_provider), None)
         if openai_provider:
             for model in openai_provider['models']:
                 display_name = {
@@ -277,8 +278,8 @@ def setup_tray_icon(app):
                     ),
                     pystray.MenuItem(
                         'Smart Capture',
-                        lambda icon, item: None,
-                        enabled=False
+                        lambda icon, item: app.toggle_smart_capture(),
+                        checked=lambda item: app.settings.get('smart_capture')
                     ),
                     pystray.MenuItem(
                         'Recording Indicator',
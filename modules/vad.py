@@ -0,0 +1,112 @@
+from typing import Optional
+
+import numpy as np
+
+from modules.audio_dsp import downmix
+
+# NOTE: All timing is derived from the number of samples processed, not from the wall clock,
+# so decisions don't drift when the audio thread is delayed or blocks arrive in bursts.
+# A frame counts as voiced when its RMS is above both the configured silence threshold and
+# a multiple of the tracked noise floor, so a noisy room doesn't keep a recording "speaking".
+
+# Length of the analysis frames
+FRAME_S = 0.02
+# Voiced frames must be this many times louder than the noise floor
+NOISE_RATIO = 3.0
+# How fast the noise floor follows louder background noise (per frame, 0.0 to 1.0)
+NOISE_ADAPT_RATE = 0.02
+# Noise floor adaptation is slowed down by this factor during speech
+SPEECH_ADAPT_FACTOR = 0.1
+# Consecutive voiced frames needed to enter speech (ignores clicks and key presses)
+ONSET_FRAMES = 3
+# Seconds speech is held after the last voiced frame (bridges gaps between words)
+HANGOVER_S = 0.3
+
+
+class VoiceActivityDetector:
+    """Frame-based voice activity detector with an adaptive noise floor and hangover."""
+
+    def __init__(self, samplerate: int, threshold: float,
+                 frame_s: float = FRAME_S,
+                 noise_ratio: float = NOISE_RATIO,
+                 noise_adapt_rate: float = NOISE_ADAPT_RATE,
+                 onset_frames: int = ONSET_FRAMES,
+                 hangover_s: float = HANGOVER_S) -> None:
+        """
+        Args:
+            samplerate: Sample rate of the processed blocks
+            threshold: Minimum frame RMS (0.0 to 1.0) that can count as voice
+            frame_s: Length of the analysis frames
+            noise_ratio: Voiced frames must be this many times louder than the noise floor
+            noise_adapt_rate: How fast the noise floor rises with the background noise
+            onset_frames: Consecutive voiced frames needed to enter speech
+            hangover_s: Seconds speech is held after the last voiced frame
+        """
+        self.samplerate = samplerate
+        self.threshold = threshold
+        self.frame_len = max(1, int(frame_s * samplerate))
+        self.noise_ratio = noise_ratio
+        self.noise_adapt_rate = noise_adapt_rate
+        self.onset_frames = onset_frames
+        self.hangover_frames = int(hangover_s * samplerate / self.frame_len)
+        # Starts where the adaptive threshold equals the static one
+        self.noise_floor = threshold / noise_ratio
+        self.in_speech = False
+        self.speech_detected = False  # Whether any speech was detected so far
+        self.samples_processed = 0
+        self.last_voiced_sample: Optional[int] = None  # End of the last voiced frame
+        self._voiced_run = 0
+        self._hangover_left = 0
+        self._remainder = np.zeros(0, dtype=np.float32)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds of audio processed"""
+        return self.samples_processed / self.samplerate
+
+    @property
+    def silence_duration(self) -> float:
+        """Seconds since the last voiced frame (or since the start if there was none)"""
+        return (self.samples_processed - (self.last_voiced_sample or 0)) / self.samplerate
+
+    @property
+    def effective_threshold(self) -> float:
+        return max(self.threshold, self.noise_floor * self.noise_ratio)
+
+    def process(self, block: np.ndarray) -> None:
+        """Adds an int16 or float block, updating the speech state frame by frame."""
+        samples = np.concatenate([self._remainder, downmix(block)])
+        count = len(samples) // self.frame_len
+        self._remainder = samples[count * self.frame_len:]
+        if count == 0:
+            return
+
+        frames = samples[:count * self.frame_len].reshape(count, self.frame_len).astype(np.float64)
+        for rms in np.sqrt(np.mean(np.square(frames), axis=1)):
+            self._process_frame(float(rms))
+
+    def _process_frame(self, rms: float) -> None:
+        self.samples_processed += self.frame_len
+        voiced = rms >= self.effective_threshold
+
+        if voiced:
+            self._voiced_run += 1
+            if self.in_speech or self._voiced_run >= self.onset_frames:
+                self.in_speech = True
+                self.speech_detected = True
+                self._hangover_left = self.hangover_frames
+                self.last_voiced_sample = self.samples_processed
+        else:
+            self._voiced_run = 0
+            if self.in_speech:
+                self._hangover_left -= 1
+                if self._hangover_left <= 0:
+                    self.in_speech = False
+
+        # Track the noise floor like a running minimum: follow quieter frames immediately and
+        # louder ones slowly (even slower during speech) so utterances don't raise it much
+        if rms < self.noise_floor:
+            self.noise_floor = rms
+        else:
+            rate = self.noise_adapt_rate * (SPEECH_ADAPT_FACTOR if self.in_speech else 1.0)
+            self.noise_floor += rate * (rms - self.noise_floor)
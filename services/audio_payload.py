@@ -0,0 +1,233 @@
+"""Helpers shared by the STT services for handling audio payloads"""
+import io
+import mmap
+import struct
+import time
+import uuid
+from typing import Union, Tuple, Optional, Sequence, Any, List
+from pathlib import Path
+
+# Extension -> MIME type of the audio formats the recorder can produce
+AUDIO_MIME_TYPES = {
+    'wav': 'audio/wav',
+    'flac': 'audio/flac',
+    'ogg': 'audio/ogg',
+}
+
+
+def sniff_audio_format(audio_bytes: bytes) -> str:
+    """
+    Detect the container format of in-memory audio from its magic bytes
+
+    Returns:
+        File extension ('wav', 'flac' or 'ogg'), defaulting to 'wav'
+    """
+    if audio_bytes[:4] == b'fLaC':
+        return 'flac'
+    if audio_bytes[:4] == b'OggS':
+        return 'ogg'
+    return 'wav'
+
+
+def read_audio_payload(audio_data: Union[bytes, str, Path]) -> Tuple[bytes, str, str]:
+    """
+    Load audio data into memory along with a filename and MIME type for uploading
+
+    Args:
+        audio_data: Either raw audio bytes, file path as string, or Path object
+
+    Returns:
+        Tuple of (audio_bytes, filename, mime_type)
+
+    Raises:
+        FileNotFoundError: If the audio file does not exist
+    """
+    if isinstance(audio_data, (str, Path)):
+        file_path = Path(audio_data)
+        if not file_path.exists():
+            raise FileNotFoundError(f"Audio file not found: {file_path}")
+        audio_bytes = file_path.read_bytes()
+        extension = file_path.suffix.lstrip('.').lower() or sniff_audio_format(audio_bytes)
+        return audio_bytes, file_path.name, AUDIO_MIME_TYPES.get(extension, 'application/octet-stream')
+
+    extension = sniff_audio_format(audio_data)
+    return audio_data, f"audio.{extension}", AUDIO_MIME_TYPES[extension]
+
+
+def audio_file_info(audio_data: Union[bytes, str, Path]) -> Tuple[str, str]:
+    """
+    Get the upload filename and MIME type without loading file paths into memory
+
+    Returns:
+        Tuple of (filename, mime_type)
+    """
+    if isinstance(audio_data, (str, Path)):
+        file_path = Path(audio_data)
+        extension = file_path.suffix.lstrip('.').lower()
+        return file_path.name, AUDIO_MIME_TYPES.get(extension, 'application/octet-stream')
+
+    extension = sniff_audio_format(audio_data)
+    return f"audio.{extension}", AUDIO_MIME_TYPES[extension]
+
+
+def open_audio_buffer(audio_data: Union[bytes, str, Path]) -> Tuple[Union[bytes, memoryview], List[Any]]:
+    """
+    Get audio data as a buffer without copying it: bytes are used as is, files are memory-mapped
+
+    Returns:
+        Tuple of (buffer, objects to close once the buffer is no longer used)
+
+    Raises:
+        FileNotFoundError: If the audio file does not exist
+    """
+    if not isinstance(audio_data, (str, Path)):
+        return audio_data, []
+
+    file_path = Path(audio_data)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Audio file not found: {file_path}")
+    file = open(file_path, 'rb')
+    try:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:  # Empty files can't be mapped
+        file.close()
+        return b'', []
+    return memoryview(mapped), [mapped, file]
+
+
+class WavLayout:
+    """Location of the PCM_16 samples inside a RIFF/WAVE file"""
+
+    def __init__(self, samplerate: int, channels: int, data_offset: int, data_size: int) -> None:
+        self.samplerate = samplerate
+        self.channels = channels
+        self.data_offset = data_offset  # Offset of the first sample (right after the data chunk header)
+        self.data_size = data_size
+
+    @property
+    def data_end(self) -> int:
+        return self.data_offset + self.data_size
+
+
+def parse_wav_pcm16(view: Union[bytes, memoryview]) -> Optional[WavLayout]:
+    """
+    Locate the sample data of a PCM_16 WAV file without decoding it
+
+    Returns:
+        WavLayout, or None if the data is not a PCM_16 WAV with consistent chunk sizes
+    """
+    if len(view) < 12 or bytes(view[:4]) != b'RIFF' or bytes(view[8:12]) != b'WAVE':
+        return None
+
+    fmt: Optional[Tuple[int, int, int, int]] = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_size = struct.unpack_from('<I', view, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b'fmt ' and chunk_size >= 16:
+            format_tag, channels, samplerate, _, _, bits = struct.unpack_from('<HHIIHH', view, body)
+            fmt = (format_tag, channels, samplerate, bits)
+        elif chunk_id == b'data':
+            if fmt is None or body + chunk_size > len(view):
+                return None
+            format_tag, channels, samplerate, bits = fmt
+            # 0xFFFE = WAVE_FORMAT_EXTENSIBLE, which libsndfile uses for some channel layouts
+            if format_tag not in (1, 0xFFFE) or bits != 16:
+                return None
+            return WavLayout(samplerate, channels, body, chunk_size)
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+class ChainedReader(io.RawIOBase):
+    """Seekable read-only stream over several buffers, without copying them into one.
+
+    Used to send a payload assembled from pieces (e.g. a patched header, the recorded samples
+    and a cached pad). Seeking lets HTTP clients rewind the stream when retrying a request.
+    The times of the first and last read are kept to measure how long the upload took.
+    """
+
+    def __init__(self, parts: Sequence[Union[bytes, memoryview]], owned: Sequence[Any] = ()) -> None:
+        """
+        Args:
+            parts: Buffers to read, in order
+            owned: Objects closed with the reader (e.g. an mmap and its file)
+        """
+        super().__init__()
+        self._parts = [memoryview(part).cast('B') for part in parts if len(part)]
+        self._owned = list(owned)
+        self._size = sum(len(part) for part in self._parts)
+        self._position = 0
+        self.first_read_at: Optional[float] = None  # time.perf_counter() of the first read
+        self.last_read_at: Optional[float] = None  # ... and of the last one (end of the upload)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def __len__(self) -> int:
+        return self._size
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self._size}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        self.last_read_at = time.perf_counter()
+        if self.first_read_at is None:
+            self.first_read_at = self.last_read_at
+        target = memoryview(buffer).cast('B')
+        written = 0
+        start = 0
+        for part in self._parts:
+            end = start + len(part)
+            if self._position < end and written < len(target):
+                offset = self._position - start
+                count = min(len(part) - offset, len(target) - written)
+                target[written:written + count] = part[offset:offset + count]
+                written += count
+                self._position += count
+            start = end
+        return written
+
+    def close(self) -> None:
+        if not self.closed:
+            for part in self._parts:
+                part.release()
+            self._parts = []
+            for obj in reversed(self._owned):
+                try:
+                    obj.close()
+                except Exception:
+                    pass
+        super().close()
+
+
+def multipart_body(audio: Union[bytes, memoryview],
+                   filename: str,
+                   mime_type: str,
+                   fields: Optional[dict] = None,
+                   field_name: str = 'file') -> Tuple[ChainedReader, str]:
+    """
+    Build a multipart/form-data body around audio data without copying it
+
+    Returns:
+        Tuple of (seekable body stream with a known length, Content-Type header value)
+    """
+    boundary = uuid.uuid4().hex
+    preamble = ''.join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        for name, value in (fields or {}).items()
+    )
+    preamble += (f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; '
+                 f'filename="{filename}"\r\nContent-Type: {mime_type}\r\n\r\n')
+    epilogue = f'\r\n--{boundary}--\r\n'
+    return (ChainedReader([preamble.encode('utf-8'), audio, epilogue.encode('utf-8')]),
+            f'multipart/form-data; boundary={boundary}')
@@ -1,14 +1,66 @@
 """Custom Speech-to-Text Service Implementation"""
 import os
+import asyncio
 import logging
-from typing import Union, Optional
+from typing import AsyncIterator, Iterator, Union, Optional, List, Dict, Any, Callable
 from pathlib import Path
-import io
+import time
+import httpx
 import requests
 import json
 
+from modules.async_runtime import close_on_loop, shared_runtime
+from services.audio_payload import ChainedReader, audio_file_info, multipart_body, open_audio_buffer, parse_wav_pcm16
+from services.duplex_http import DuplexPost
+from services.errors import ProviderError
+from services.http_timing import ConnectTiming, TimedHTTPAdapter
+from services.stream_protocol import (CAPABILITIES_PATH, StreamCapabilities, StreamRejected, StreamResults,
+                                      parse_capabilities, stream_request)
+from services.streaming_upload import LiveAudioSource, UploadAborted, multipart_stream, streaming_wav_header
+
 logger = logging.getLogger('voice_typing')
 
+# Timeout of the request opening a connection ahead of an upload
+WARM_UP_TIMEOUT_S = 5.0
+# Connections kept open to the server (chunked recordings are transcribed concurrently)
+POOL_MAXSIZE = 4
+# Idle async connections are kept open this long (httpx defaults to 5s, shorter than a dictation)
+KEEPALIVE_EXPIRY_S = 300.0
+# Size of the reads feeding an async upload
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Streaming protocol: seconds without data from the server before giving up. There is no limit on
+# the whole request, the server transcribes while the audio arrives (see services/stream_protocol.py).
+STREAM_READ_TIMEOUT_S = 30.0
+# Statuses meaning the server doesn't serve the streaming protocol (negotiation or upload)
+STREAM_UNSUPPORTED_STATUSES = (404, 405)
+
+# Common endpoint patterns, in the order they are probed
+ENDPOINT_PATHS = [
+    "/transcribe",                # Simple format
+    "/v1/audio/transcriptions",   # OpenAI API v1 format
+    "/api/transcribe",            # API prefix format
+]
+
+# Response fields holding the transcription, in the order they are checked
+RESPONSE_FIELDS = ['text', 'transcription', 'result', 'transcript', 'output', 'response', 'data']
+
+# NOTE: Probing tries each endpoint with just the file, then with the model field on 400/422.
+# What worked is remembered per base URL as a "discovery" dict:
+#   {'endpoint': '/v1/audio/transcriptions', 'send_model': True, 'response_field': 'text'}
+# and reused until the endpoint answers with a 4xx, so a dictation is normally a single request.
+# Connection errors, timeouts and 5xx keep it: the server is down, which probing wouldn't fix.
+#
+# Servers implementing the streaming protocol (services/stream_protocol.py) get raw PCM instead,
+# uploaded while recording. Support is negotiated once per transcriber, before the first upload
+# (or by warm_up). Only a definitive answer is kept: the capabilities, a 404/405 or a payload
+# without anything this client can use. Timeouts, connection errors and other statuses (e.g. a
+# 503 while the server restarts) are negotiated again before the next upload.
+# WAV recordings fall back to the multipart upload if the server rejects a stream.
+#
+# Requests are made by the coroutines, the blocking methods run them on the shared AsyncRuntime.
+# Only live multipart uploads (transcribe_stream without the protocol) use the blocking session:
+# their body is generated from the recording as it arrives.
+
 
 class CustomTranscriber:
     """Custom STT service implementation for local or remote endpoints"""
@@ -17,7 +69,12 @@ class CustomTranscriber:
         self,
         base_url: str = "http://192.168.0.5:8000",
         model: str = "parakeet-tdt-0.6b-v2",
-        language: str = "en"
+        language: str = "en",
+        endpoint: Optional[str] = None,
+        discovery: Optional[Dict[str, Any]] = None,
+        on_discovery: Optional[Callable[[Optional[Dict[str, Any]]], None]] = None,
+        stream_protocol: bool = True,
+        on_partial: Optional[Callable[[str], None]] = None
     ):
         """
         Initialize custom transcriber
@@ -26,19 +83,88 @@ class CustomTranscriber:
             base_url: Base URL of the custom STT endpoint (local or remote)
             model: Model to use for transcription
             language: Language code for transcription
+            endpoint: Pinned endpoint path (e.g. '/v1/audio/transcriptions') or URL, skips probing others
+            discovery: Previously discovered endpoint details for this base URL (see ENDPOINT_PATHS note)
+            on_discovery: Called with the new discovery (or None when it is invalidated), to persist it
+            stream_protocol: Use the streaming protocol if the server supports it
+            on_partial: Called with the transcript so far while streamed results arrive
         """
         self.base_url = base_url.rstrip('/')
         self.model = model
         self.language = language
+        self.endpoint = endpoint
+        self.discovery = discovery if self._discovery_usable(discovery) else None
+        self.on_discovery = on_discovery
+        self.stream_protocol = stream_protocol
+        self.on_partial = on_partial
+        # Result of the streaming protocol negotiation (None = not supported, or not negotiated yet)
+        self.stream_capabilities: Optional[StreamCapabilities] = None
+        self.negotiated = False
         
         # Get API key if configured (optional for local models)
         self.api_key = os.environ.get("CUSTOM_STT_API_KEY")
+
+        # Live multipart uploads, keeping their connection alive between dictations. No automatic
+        # retries: a streamed body can't be replayed by urllib3.
+        self.session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Used by every other request, created on first use (see _get_async_client)
+        self.async_client: Optional[httpx.AsyncClient] = None
+        self.async_loop: Optional[asyncio.AbstractEventLoop] = None
         
         logger.info(f"Initialized custom transcriber with URL: {self.base_url}, model: {model}")
 
     def transcribe(self, audio_data: Union[bytes, str, Path]) -> str:
+        """Blocking version of transcribe_async, running it on the shared AsyncRuntime"""
+        return shared_runtime().run(self.transcribe_async(audio_data))
+
+    def negotiate(self) -> Optional[StreamCapabilities]:
+        """Blocking version of _negotiate_async"""
+        return shared_runtime().run(self._negotiate_async())
+
+    def _negotiated(self, status_code: int, parse_json: Callable[[], Any]) -> None:
+        """Keep the result of the negotiation, if it's definitive"""
+        capabilities = None
+        if status_code == 200:
+            try:
+                capabilities = parse_capabilities(parse_json())
+            except ValueError:
+                logger.debug("Streaming protocol negotiation answered with invalid JSON, trying again next time")
+                return
+        elif status_code not in STREAM_UNSUPPORTED_STATUSES:
+            logger.debug(f"Streaming protocol negotiation failed with HTTP {status_code}, trying again next time")
+            return
+        self.stream_capabilities = capabilities
+        self.negotiated = True
+        if capabilities is not None:
+            logger.info(f"Custom STT server supports the streaming protocol "
+                        f"({capabilities.result_format} results from {capabilities.endpoint})")
+        else:
+            logger.info("Custom STT server doesn't support the streaming protocol, using multipart uploads")
+
+    def _stream_rejected(self, capabilities: StreamCapabilities, status_code: int, text: str) -> StreamRejected:
+        """Error for a streaming upload answered with an error status. A 4xx means the server
+        doesn't take the stream (the protocol isn't used again), a 5xx only fails this upload."""
+        if 400 <= status_code < 500 and status_code not in (408, 429):
+            self.stream_capabilities = None
+        return StreamRejected(f"Streaming upload to {capabilities.endpoint} failed: HTTP {status_code}: {text}")
+
+    @property
+    def streams_by_default(self) -> bool:
+        """Servers supporting the streaming protocol get the audio while it is recorded"""
+        return self.stream_capabilities is not None
+
+    @property
+    def stream_ready(self) -> bool:
+        """Whether transcribe_stream knows where to send the audio: the streaming protocol, or a
+        pinned or discovered multipart endpoint (a live body can't be replayed to probe others)"""
+        return self.stream_capabilities is not None or self.endpoint is not None or self.discovery is not None
+
+    async def transcribe_async(self, audio_data: Union[bytes, str, Path]) -> str:
         """
-        Transcribe audio using custom endpoint
+        Transcribe audio using custom endpoint, cancelling it aborts the upload
 
         Args:
             audio_data: Either raw audio bytes, file path as string, or Path object
@@ -49,100 +175,307 @@ class CustomTranscriber:
         Raises:
             Exception: If transcription fails
         """
+        audio_bytes, owned = b'', []
         try:
-            # Prepare audio data
-            if isinstance(audio_data, (str, Path)):
-                file_path = Path(audio_data)
-                if not file_path.exists():
-                    raise FileNotFoundError(f"Audio file not found: {file_path}")
-                with open(file_path, 'rb') as f:
-                    audio_bytes = f.read()
-                filename = file_path.name
-            else:
-                audio_bytes = audio_data
-                filename = "audio.wav"
+            filename, mime_type = audio_file_info(audio_data)
+            audio_bytes, owned = open_audio_buffer(audio_data)
+
+            if mime_type == 'audio/wav' and await self._negotiate_async() is not None:
+                text = await self._transcribe_pcm_async(audio_bytes)
+                if text is not None:
+                    return text
+
+            if self.discovery is not None:
+                response = await self._post_async(self.discovery['endpoint'], audio_bytes, filename,
+                                                  mime_type, self.discovery['send_model'])
+                if response.status_code == 200:
+                    return self._parse_response(response.json())
+                self._check_cached_endpoint(response.status_code, response.text)
+
+            return await self._probe_async(audio_bytes, filename, mime_type)
 
-            # Add authorization header if API key is configured
-            headers = {}
-            if self.api_key:
-                headers['Authorization'] = f"Bearer {self.api_key}"
-            
-            # Try common endpoint patterns
-            endpoints = [
-                f"{self.base_url}/transcribe",                # Simple format
-                f"{self.base_url}/v1/audio/transcriptions",  # OpenAI API v1 format
-                f"{self.base_url}/api/transcribe",            # API prefix format
-            ]
-            
-            last_error = None
-            for endpoint in endpoints:
-                # Prepare the request with 'file' field (common standard)
-                files = {
-                    'file': (filename, io.BytesIO(audio_bytes), 'audio/wav')
-                }
-                
-                logger.debug(f"Trying endpoint: {endpoint}")
-                
-                # First try: just the file (minimal request)
-                try:
-                    response = requests.post(
-                        endpoint,
-                        files=files,
-                        headers=headers,
-                        timeout=60
-                    )
-                    
-                    if response.status_code == 200:
-                        return self._parse_response(response.json())
-                        
-                    elif response.status_code == 422 or response.status_code == 400:
-                        # Try with model parameter
-                        logger.debug(f"Got {response.status_code}, trying with model parameter")
-                        files = {
-                            'file': (filename, io.BytesIO(audio_bytes), 'audio/wav')
-                        }
-                        data = {
-                            'model': self.model
-                        }
-                        
-                        response = requests.post(
-                            endpoint,
-                            files=files,
-                            data=data,
-                            headers=headers,
-                            timeout=60
-                        )
-                        
-                        if response.status_code == 200:
-                            return self._parse_response(response.json())
-                        else:
-                            last_error = f"HTTP {response.status_code}: {response.text}"
-                            
-                    elif response.status_code == 404:
-                        # Endpoint doesn't exist, try next one
-                        last_error = f"Endpoint not found: {endpoint}"
-                        continue
-                    else:
-                        last_error = f"HTTP {response.status_code}: {response.text}"
-                        
-                except requests.exceptions.ConnectionError:
-                    last_error = f"Connection failed to {endpoint}"
-                    continue
-                except requests.exceptions.Timeout:
-                    last_error = f"Request timeout to {endpoint}"
-                    continue
-                except Exception as e:
-                    last_error = str(e)
-                    continue
-            
-            # If we get here, all endpoints failed
-            error_msg = f"Custom transcription failed. Last error: {last_error}"
-            logger.error(error_msg)
-            raise RuntimeError(error_msg)
-                
         except Exception as e:
             logger.error(f"Custom transcription failed: {e}", exc_info=True)
             raise
+        finally:
+            if isinstance(audio_bytes, memoryview):
+                audio_bytes.release()
+            for obj in owned:
+                obj.close()
+
+    async def _post_async(self, endpoint: str, audio_bytes: Union[bytes, memoryview], filename: str,
+                          mime_type: str, send_model: bool) -> httpx.Response:
+        """Upload the audio to an endpoint path or URL, logging where the time went"""
+        body, content_type = multipart_body(
+            audio_bytes, filename, mime_type, fields={'model': self.model} if send_model else None
+        )
+        timing = ConnectTiming()
+        start = time.perf_counter()
+        try:
+            client = self._get_async_client()
+            request = client.build_request(
+                'POST', self._url(endpoint), content=_read_chunks(body),
+                headers={**self._auth_headers(), 'Content-Type': content_type, 'Content-Length': str(len(body))},
+                timeout=60, extensions={'trace': timing.trace}
+            )
+            response = await client.send(request, stream=True)
+            headers_at = time.perf_counter()
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+            done_at = time.perf_counter()
+        finally:
+            body.close()
+
+        _log_upload_timing(endpoint, response.status_code, body, timing, start, headers_at, done_at)
+        return response
+
+    async def _probe_async(self, audio_bytes: Union[bytes, memoryview], filename: str, mime_type: str) -> str:
+        """Try the candidate endpoints and parameter shapes, remembering the first that works"""
+        last_error = None
+        for endpoint in self._endpoints():
+            logger.debug(f"Trying endpoint: {endpoint}")
+            try:
+                response = await self._post_async(endpoint, audio_bytes, filename, mime_type, send_model=False)
+                send_model = False
+
+                if response.status_code == 422 or response.status_code == 400:
+                    logger.debug(f"Got {response.status_code}, trying with model parameter")
+                    response = await self._post_async(endpoint, audio_bytes, filename, mime_type, send_model=True)
+                    send_model = True
+
+                if response.status_code == 200:
+                    result = response.json()
+                    self._remember({
+                        'endpoint': endpoint,
+                        'send_model': send_model,
+                        'response_field': self._response_field(result),
+                    })
+                    return self._parse_response(result)
+                elif response.status_code == 404:
+                    last_error = f"Endpoint not found: {endpoint}"
+                else:
+                    last_error = f"HTTP {response.status_code}: {response.text}"
+
+            except httpx.ConnectError:
+                last_error = f"Connection failed to {endpoint}"
+            except httpx.TimeoutException:
+                last_error = f"Request timeout to {endpoint}"
+            except Exception as e:
+                last_error = str(e)
+
+        error_msg = f"Custom transcription failed. Last error: {last_error}"
+        logger.error(error_msg)
+        raise ProviderError(error_msg)
+
+    async def _negotiate_async(self) -> Optional[StreamCapabilities]:
+        """
+        Ask the server whether it supports the streaming protocol (until a definitive answer is kept)
+
+        Returns:
+            The server's capabilities, or None if it doesn't support the protocol or it's disabled
+        """
+        if self.stream_protocol and not self.negotiated:
+            try:
+                response = await self._get_async_client().get(
+                    self._url(CAPABILITIES_PATH), headers=self._auth_headers(), timeout=WARM_UP_TIMEOUT_S)
+            except httpx.HTTPError as e:
+                logger.debug(f"Streaming protocol negotiation failed: {e}")
+                return None
+            self._negotiated(response.status_code, response.json)
+        return self.stream_capabilities
+
+    async def _transcribe_pcm_async(self, audio_bytes: Union[bytes, memoryview]) -> Optional[str]:
+        """Send the samples of a PCM_16 WAV with the streaming protocol (None if it can't be used)"""
+        layout = parse_wav_pcm16(audio_bytes)
+        if layout is None:
+            return None
+        view = memoryview(audio_bytes)
+        samples = view[layout.data_offset:layout.data_end]
+        body = ChainedReader([samples])
+        try:
+            return await self._post_stream_async(body, layout.samplerate, layout.channels)
+        except StreamRejected as e:
+            logger.info(f"{e}, falling back to multipart uploads")
+            return None
+        finally:
+            body.close()
+            samples.release()
+            view.release()
+
+    async def _post_stream_async(self, body: Union[ChainedReader, Iterator[bytes]], samplerate: int,
+                                 channels: int) -> str:
+        """
+        Upload raw PCM with the streaming protocol and collect the results while they are streamed
+
+        The results are read as they arrive, while the body is still being sent (see
+        services/duplex_http.py).
+
+        Args:
+            body: Samples, as a stream (sent with its length) or as blocking chunks (e.g. of a live
+                recording, sent with chunked encoding)
+            samplerate: Sample rate of the samples
+            channels: Channel count of the samples
+
+        Returns:
+            Transcribed text
+
+        Raises:
+            StreamRejected: If the server answered with an error status (after a 4xx, the protocol isn't
+                used again)
+        """
+        capabilities = self.stream_capabilities
+        request = stream_request(capabilities, samplerate, channels, self.language, self.model)
+        if isinstance(body, ChainedReader):
+            chunks, length = _read_chunks(body), len(body)
+        else:
+            chunks, length = _iter_in_thread(body), None
+        start = time.perf_counter()
+        post = DuplexPost(self._url(capabilities.endpoint), chunks, params=request['params'],
+                          headers={**self._auth_headers(), **request['headers']}, content_length=length,
+                          connect_timeout=WARM_UP_TIMEOUT_S, read_timeout=STREAM_READ_TIMEOUT_S)
+        async with post as response:
+            headers_at = time.perf_counter()
+            if response.status_code != 200:
+                await response.aread()
+                raise self._stream_rejected(capabilities, response.status_code, response.text)
+            results = StreamResults(capabilities.result_format, self.on_partial)
+            async for line in response.aiter_lines():
+                results.feed_line(line)
+                if results.done:
+                    break
+            text = results.transcript()
+
+        done_at = time.perf_counter()
+        logger.info(
+            f"Custom STT stream {capabilities.endpoint}: answered in {(headers_at - start) * 1000:.0f} ms, "
+            f"{results.events} results, done {(done_at - (post.sent_at or done_at)) * 1000:.0f} ms "
+            f"after the upload ended"
+        )
+        return text
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """The async client, created on first use (its connections belong to the running event loop)"""
+        loop = asyncio.get_running_loop()
+        if self.async_client is not None and self.async_loop is not loop:
+            # Created on another (e.g. finished) loop, its connections can't be used here
+            close_on_loop(self.async_client, self.async_loop)
+            self.async_client = None
+        if self.async_client is None:
+            # Same pool as the session: unlimited connections, POOL_MAXSIZE of them kept open
+            self.async_client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=None, max_keepalive_connections=POOL_MAXSIZE, keepalive_expiry=KEEPALIVE_EXPIRY_S))
+            self.async_loop = loop
+        return self.async_client
+
+    def _check_cached_endpoint(self, status_code: int, text: str) -> None:
+        """Handle an error answer from the cached endpoint: a 4xx means it moved or changed (it's
+        invalidated, to probe again), anything else is a server failure and is raised"""
+        if not 400 <= status_code < 500:
+            raise ProviderError(f"Custom transcription failed. Last error: HTTP {status_code}: {text}")
+        logger.info(f"Cached endpoint {self.discovery['endpoint']} returned HTTP {status_code}, "
+                    f"probing endpoints again")
+        self._remember(None)
+
+    def _remember(self, discovery: Optional[Dict[str, Any]]) -> None:
+        """Cache the discovered endpoint details (None to invalidate) and let the owner persist them"""
+        if discovery is not None:
+            logger.info(f"Discovered custom STT endpoint {discovery['endpoint']} "
+                        f"(model field: {discovery['send_model']}, response field: {discovery['response_field']})")
+        self.discovery = discovery
+        if self.on_discovery:
+            try:
+                self.on_discovery(discovery)
+            except Exception as e:
+                logger.warning(f"Could not persist custom STT endpoint: {e}")
+
+    def _discovery_usable(self, discovery: Optional[Dict[str, Any]]) -> bool:
+        """Whether a cached discovery is complete and matches the pinned endpoint, if any"""
+        if not isinstance(discovery, dict) or not {'endpoint', 'send_model'} <= discovery.keys():
+            return False
+        return self.endpoint is None or discovery['endpoint'] == self.endpoint
+
+    def _url(self, endpoint: str) -> str:
+        """Full URL of an endpoint path (absolute URLs are used as is)"""
+        if endpoint.startswith(('http://', 'https://')):
+            return endpoint
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def _endpoints(self) -> List[str]:
+        """Endpoints to probe: the pinned one, or the common patterns"""
+        if self.endpoint:
+            return [self.endpoint]
+        return list(ENDPOINT_PATHS)
+
+    def transcribe_stream(self, source: LiveAudioSource, samplerate: int, channels: int = 1) -> str:
+        """
+        Transcribe a recording while it is being recorded, streaming it as a chunked upload
+
+        The request is sent right away and its body follows the recording, so once the source
+        is finished only the tail of the audio is left to upload. Servers supporting the
+        streaming protocol get the raw samples. Otherwise the body can't be replayed, so the
+        discovered or pinned endpoint is used (see stream_ready).
+
+        Args:
+            source: Live PCM_16 recording (fed by the recorder, finished when recording stops)
+            samplerate: Sample rate of the recording
+            channels: Channel count of the recording
+
+        Returns:
+            Transcribed text
+
+        Raises:
+            UploadAborted: If the source was aborted (recording cancelled)
+            RuntimeError: If no endpoint is known yet
+            ProviderError: If the endpoint rejected the upload
+                (StreamRejected with the streaming protocol)
+        """
+        capabilities = self.negotiate()
+        if capabilities is None and not self.stream_ready:
+            raise RuntimeError("Streaming upload needs a discovered or pinned endpoint, "
+                               "the first dictation is uploaded at the end to discover it")
+        try:
+            if capabilities is not None:
+                logger.debug(f"Streaming PCM to {capabilities.endpoint}")
+                return shared_runtime().run(self._post_stream_async(source.iter_chunks(), samplerate, channels))
+
+            if self.discovery is not None:
+                endpoint, send_model = self.discovery['endpoint'], self.discovery['send_model']
+            else:
+                endpoint, send_model = self.endpoint, True
+            body, content_type = multipart_stream(
+                source, streaming_wav_header(samplerate, channels), 'audio.wav', 'audio/wav',
+                fields={'model': self.model} if send_model else None
+            )
+            headers = {**self._auth_headers(), 'Content-Type': content_type}
+            logger.debug(f"Streaming upload to {endpoint}")
+            timing = ConnectTiming()
+            with timing.measure():
+                response = self.session.post(self._url(endpoint), data=body, headers=headers, timeout=60)
+        except UploadAborted:
+            logger.info("Streaming upload aborted")
+            raise
+        except Exception:
+            if source.aborted:
+                raise UploadAborted("Recording cancelled")
+            raise
+
+        if response.status_code != 200:
+            raise ProviderError(f"Streaming upload failed: HTTP {response.status_code}: {response.text}")
+        logger.debug(f"Streamed {source.bytes_written / 1024:.0f} KB to {endpoint} ({timing.summary()})")
+        return self._parse_response(response.json())
+
+    def _response_field(self, result) -> Optional[str]:
+        """Name of the field holding the transcription ('segments' for segment lists), if known"""
+        if isinstance(result, dict):
+            if isinstance(result.get('segments'), list) and \
+                    any(isinstance(segment, dict) and 'text' in segment for segment in result['segments']):
+                return 'segments'
+            for field in RESPONSE_FIELDS:
+                if field in result:
+                    return field
+        return None
 
     def _parse_response(self, result) -> str:
         """
@@ -155,20 +488,17 @@ class CustomTranscriber:
             The extracted transcription text
         """
         if isinstance(result, dict):
+            # The field seen when the endpoint was discovered, else look for a known one
+            field = self.discovery.get('response_field') if self.discovery else None
+            if field not in result:
+                field = self._response_field(result)
+
             # Check for segments format (some models return this)
-            if 'segments' in result and isinstance(result['segments'], list):
-                # Extract text from all segments and join them
-                texts = []
-                for segment in result['segments']:
-                    if isinstance(segment, dict) and 'text' in segment:
-                        texts.append(segment['text'])
-                if texts:
-                    return ' '.join(texts)
-            
-            # Try common field names
-            for field in ['text', 'transcription', 'result', 'transcript', 'output', 'response', 'data']:
-                if field in result:
-                    return str(result[field])
+            if field == 'segments':
+                return ' '.join(segment['text'] for segment in result['segments']
+                                if isinstance(segment, dict) and 'text' in segment)
+            if field is not None:
+                return str(result[field])
             
             # If no known field, log warning and return the whole dict as string
             logger.warning(f"Unknown response format: {result}")
@@ -191,4 +521,78 @@ class CustomTranscriber:
     def update_base_url(self, base_url: str) -> None:
         """Update the base URL for the custom endpoint"""
         self.base_url = base_url.rstrip('/')
-        logger.info(f"Updated custom STT base URL to: {self.base_url}")
\ No newline at end of file
+        self.discovery = None
+        self.stream_capabilities = None
+        self.negotiated = False
+        logger.info(f"Updated custom STT base URL to: {self.base_url}")
+
+    def warm_up(self) -> float:
+        """
+        Open a connection of the blocking session ahead of a live multipart upload (servers
+        supporting the streaming protocol are only negotiated with, each stream has its own connection)
+
+        Returns:
+            Seconds the warm-up took
+        """
+        start = time.perf_counter()
+        if self.negotiate() is None:
+            self.session.head(self.base_url, headers=self._auth_headers(), timeout=WARM_UP_TIMEOUT_S)
+        return time.perf_counter() - start
+
+    async def warm_up_async(self) -> float:
+        """
+        Open a pooled connection of the async client to the endpoint ahead of the upload
+
+        Returns:
+            Seconds the warm-up request took (a reused pooled connection makes it a plain round-trip)
+        """
+        start = time.perf_counter()
+        if self.stream_protocol and not self.negotiated:
+            await self._negotiate_async()
+        else:
+            await self._get_async_client().head(self.base_url, headers=self._auth_headers(), timeout=WARM_UP_TIMEOUT_S)
+        return time.perf_counter() - start
+
+    def _auth_headers(self) -> dict:
+        """Authorization header if an API key is configured"""
+        return {'Authorization': f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def close(self) -> None:
+        """Close the pooled HTTP connections"""
+        self.session.close()
+        if self.async_client is not None:
+            close_on_loop(self.async_client, self.async_loop)
+
+
+def _log_upload_timing(endpoint: str, status_code: int, body: ChainedReader, timing: ConnectTiming,
+                       start: float, headers_at: float, done_at: float) -> None:
+    """Log where the time of an upload went"""
+    # Reading of the body starts once the connection is open (or checked out of the pool) and the
+    # request headers are sent, and ends when the upload is complete
+    first_read_at = body.first_read_at or start
+    sent_at = body.last_read_at or start
+    logger.info(
+        f"Custom STT {endpoint} HTTP {status_code}: {timing.summary()}, "
+        f"first body byte {(first_read_at - start) * 1000:.0f} ms, "
+        f"upload {(sent_at - first_read_at) * 1000:.0f} ms ({len(body) / 1024:.0f} KB), "
+        f"server {(headers_at - sent_at) * 1000:.0f} ms, "
+        f"download {(done_at - headers_at) * 1000:.0f} ms"
+    )
+
+
+async def _iter_in_thread(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Feed a blocking iterator (e.g. the chunks of a live recording) to an async request"""
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def _read_chunks(body: ChainedReader) -> AsyncIterator[bytes]:
+    """Feed a multipart body to an async request"""
+    while True:
+        chunk = body.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""HTTP/1.1 upload whose response is read while the request body is still being sent"""
+import asyncio
+import contextlib
+import ssl
+import time
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlencode, urlsplit
+
+import h11
+
+from services.errors import ProviderError
+
+# NOTE: requests and httpx only read the response once the whole request body is sent. A
+# streaming protocol server answers while the audio is still arriving, so DuplexPost speaks
+# HTTP/1.1 itself (with h11, the parser httpx is built on) over an asyncio connection: a task
+# sends the body while the caller reads the response. Each upload opens its own connection,
+# proxies configured in the environment aren't used.
+
+# Size of the response reads
+READ_SIZE = 64 * 1024
+
+
+class DuplexResponse:
+    """Response of a DuplexPost, readable while the body is still being sent."""
+
+    def __init__(self, post: 'DuplexPost', response: h11.Response) -> None:
+        self._post = post
+        self.status_code = response.status_code
+        self.headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in response.headers}
+        self.text = ''  # Body, once read with aread()
+
+    async def aiter_lines(self) -> AsyncIterator[str]:
+        """Lines of the body (without their line endings) as they arrive"""
+        pending = b''
+        async for data in self._post.iter_body():
+            pending += data
+            *lines, pending = pending.split(b'\n')
+            for line in lines:
+                yield line.rstrip(b'\r').decode('utf-8')
+        if pending:
+            yield pending.rstrip(b'\r').decode('utf-8')
+
+    async def aread(self) -> bytes:
+        body = b''.join([data async for data in self._post.iter_body()])
+        self.text = body.decode('utf-8', errors='replace')
+        return body
+
+
+class DuplexPost:
+    """
+    POST sending its body from an async iterator while the response is read
+
+    Usage:
+        async with DuplexPost(url, chunks(), headers=headers) as response:
+            async for line in response.aiter_lines():
+                ...
+    """
+
+    def __init__(self, url: str, body: AsyncIterator[bytes], params: Optional[Dict[str, str]] = None,
+                 headers: Optional[Dict[str, str]] = None, content_length: Optional[int] = None,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0) -> None:
+        """
+        Args:
+            url: URL to post to (http or https)
+            body: Chunks of the body, it's sent with chunked encoding unless content_length is set
+            params: Query parameters, added to the URL's
+            headers: Request headers (Host and the body framing are set)
+            content_length: Length of the body, if known
+            connect_timeout: Seconds to open the connection
+            read_timeout: Seconds without data from the server before giving up
+        """
+        self.url = url
+        self.body = body
+        self.params = params or {}
+        self.headers = headers or {}
+        self.content_length = content_length
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.sent_at: Optional[float] = None  # time.perf_counter() when the whole body was sent
+        self._connection = h11.Connection(h11.CLIENT)
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._sender: Optional[asyncio.Future] = None
+
+    async def __aenter__(self) -> DuplexResponse:
+        try:
+            await self._connect()
+            while True:
+                event = await self._next_event()
+                if isinstance(event, h11.Response):
+                    return DuplexResponse(self, event)
+                if not isinstance(event, h11.InformationalResponse):  # e.g. 100 Continue
+                    raise ConnectionError("STT server closed the connection without answering")
+        except BaseException:
+            await self.aclose()
+            raise
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _connect(self) -> None:
+        parts = urlsplit(self.url)
+        https = parts.scheme == 'https'
+        try:
+            self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(
+                parts.hostname, parts.port or (443 if https else 80),
+                ssl=ssl.create_default_context() if https else None), self.connect_timeout)
+        except OSError as e:
+            if isinstance(e, (ConnectionError, TimeoutError)):
+                raise
+            raise ConnectionError(f"Could not connect to {parts.netloc}: {e}") from e
+
+        query = '&'.join(part for part in (parts.query, urlencode(self.params)) if part)
+        framing = (('Content-Length', str(self.content_length)) if self.content_length is not None
+                   else ('Transfer-Encoding', 'chunked'))
+        await self._send(h11.Request(method='POST', target=(parts.path or '/') + (f"?{query}" if query else ''),
+                                     headers=[('Host', parts.netloc), *self.headers.items(), framing]))
+        self._sender = asyncio.ensure_future(self._send_body())
+
+    async def _send(self, event) -> None:
+        self._writer.write(self._connection.send(event))
+        await self._writer.drain()
+
+    async def _send_body(self) -> None:
+        async for chunk in self.body:
+            if chunk:
+                await self._send(h11.Data(data=chunk))
+        await self._send(h11.EndOfMessage())
+        self.sent_at = time.perf_counter()
+
+    async def _receive(self) -> bytes:
+        """Next data from the server. If sending the body failed first (e.g. the recording was
+        aborted), its error is raised: the server would wait for the rest of it."""
+        read = asyncio.ensure_future(self._reader.read(READ_SIZE))
+        try:
+            if not self._sender.done():
+                await asyncio.wait({read, self._sender}, timeout=self.read_timeout,
+                                   return_when=asyncio.FIRST_COMPLETED)
+            if not read.done() and self._sender.done() and not self._sender.cancelled():
+                error = self._sender.exception()
+                if error is not None:
+                    raise error
+            return await asyncio.wait_for(read, self.read_timeout)
+        finally:
+            read.cancel()
+
+    async def _next_event(self):
+        while True:
+            try:
+                event = self._connection.next_event()
+            except h11.RemoteProtocolError as e:
+                raise ProviderError(f"Invalid HTTP response from the STT server: {e}") from None
+            if event is not h11.NEED_DATA:
+                return event
+            self._connection.receive_data(await self._receive())
+
+    async def iter_body(self) -> AsyncIterator[bytes]:
+        """Data of the response body as it arrives"""
+        while self._connection.their_state is h11.SEND_BODY:
+            event = await self._next_event()
+            if isinstance(event, h11.Data):
+                yield bytes(event.data)
+            elif isinstance(event, h11.ConnectionClosed):
+                raise ConnectionError("STT server closed the connection before the end of the response")
+
+    async def aclose(self) -> None:
+        """Stop sending the body and close the connection"""
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+        if self._writer is not None:
+            self._writer.close()
+            with contextlib.suppress(Exception):
+                await self._writer.wait_closed()
@@ -0,0 +1,10 @@
+"""Errors shared by the speech-to-text providers"""
+
+
+class ProviderError(RuntimeError):
+    """Raised when a provider answers with an error (HTTP error status or server-side failure)
+
+    Network errors are raised as the HTTP client's own exceptions. Errors about the recording
+    itself (unreadable file, unknown format) or the configuration use other types, so they are
+    not held against the provider's health.
+    """
@@ -1,29 +1,85 @@
 """Google Cloud Speech-to-Text Service Implementation"""
 import os
+import io
+import time
+import base64
+import asyncio
 import logging
-from typing import Union, Optional
+from typing import Any, Dict, List, Tuple, Union, Optional
 from pathlib import Path
-import base64
+import json
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+import soundfile as sf
+
+from modules.async_runtime import close_on_loop
+from services.audio_payload import audio_file_info, open_audio_buffer, parse_wav_pcm16
+from services.errors import ProviderError
 
 logger = logging.getLogger('voice_typing')
 
+# Speech-to-Text v1 REST API: https://cloud.google.com/speech-to-text/docs/reference/rest
+GOOGLE_STT_URL = "https://speech.googleapis.com"
+
+# MIME type of the recorded payload -> Google Cloud STT RecognitionConfig encoding
+GOOGLE_ENCODINGS = {
+    'audio/wav': 'LINEAR16',
+    'audio/flac': 'FLAC',
+    'audio/ogg': 'OGG_OPUS',
+}
+
+# speech:recognize only accepts audio up to one minute, longer audio uses speech:longrunningrecognize
+SYNC_MAX_DURATION_S = 60.0
+# Requests are limited to 10 MB and inline audio is base64 encoded (4/3 larger), so longer
+# recordings are split by transcribe.py (see max_upload_bytes)
+MAX_UPLOAD_BYTES = 7 * 1024 * 1024
+# Long-running operations are polled at this interval, growing up to the maximum
+POLL_INTERVAL_S = 0.5
+MAX_POLL_INTERVAL_S = 2.0
+# Connections kept open to the API (chunked recordings are transcribed concurrently)
+POOL_MAXSIZE = 4
+# Idle async connections are kept open this long (httpx defaults to 5s, shorter than a dictation)
+KEEPALIVE_EXPIRY_S = 300.0
+# Timeout of the request opening a connection ahead of an upload
+WARM_UP_TIMEOUT_S = 5.0
+
+# NOTE: WAV recordings are sent as raw LINEAR16 samples at the captured rate: the RIFF header is
+# dropped and the rate and channel count are passed in the config. The JSON API has no binary
+# upload, so the samples still have to be base64 encoded. The body is assembled from bytes, so
+# the encoded audio is never copied into a JSON string.
+
 
 class GoogleTranscriber:
-    """Google Cloud STT service implementation (placeholder)"""
+    """Google Cloud STT service implementation (Speech-to-Text v1 REST API)"""
+
+    # Largest payload sent in one request, transcribe.py splits longer recordings
+    max_upload_bytes = MAX_UPLOAD_BYTES
 
-    def __init__(self, language: str = "en-US"):
+    def __init__(self, language: str = "en-US", api_key: Optional[str] = None, base_url: str = GOOGLE_STT_URL):
         """
         Initialize Google transcriber
 
         Args:
             language: Language code for transcription (e.g., 'en-US', 'es-ES', 'fr-FR')
+            api_key: API key (defaults to the GOOGLE_CLOUD_API_KEY environment variable)
+            base_url: Base URL of the Speech-to-Text API
         """
-        self.api_key = os.environ.get("GOOGLE_CLOUD_API_KEY")
+        self.api_key = api_key or os.environ.get("GOOGLE_CLOUD_API_KEY")
         if not self.api_key:
             logger.warning("GOOGLE_CLOUD_API_KEY not set - Google STT will not be available")
 
         self.language = language
+        self.base_url = base_url.rstrip('/')
+
+        # Keeps the TLS connection to the API open between dictations and polls
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Used by transcribe_async, created on first use (its connections belong to the running event loop)
+        self.async_client: Optional[httpx.AsyncClient] = None
+        self.async_loop: Optional[asyncio.AbstractEventLoop] = None
         logger.info(f"Initialized Google transcriber with language: {language}")
 
     def transcribe(self, audio_data: Union[bytes, str, Path]) -> str:
@@ -43,47 +99,186 @@ class GoogleTranscriber:
             raise RuntimeError("Google Cloud API key not configured")
 
         try:
-            # Read audio data
-            if isinstance(audio_data, (str, Path)):
-                file_path = Path(audio_data) if isinstance(audio_data, str) else audio_data
-                if not file_path.exists():
-                    raise FileNotFoundError(f"Audio file not found: {file_path}")
-                with open(file_path, 'rb') as f:
-                    audio_bytes = f.read()
-            else:
-                audio_bytes = audio_data
-
-            # TODO: Implement actual Google Cloud STT API call
-            # This is a placeholder implementation
-            logger.warning("Google STT is not fully implemented yet - returning placeholder text")
-            return "[Google STT transcription placeholder - not implemented]"
-
-            # Example of what the actual implementation would look like:
-            # audio_content = base64.b64encode(audio_bytes).decode('utf-8')
-            # response = requests.post(
-            #     f"https://speech.googleapis.com/v1/speech:recognize?key={self.api_key}",
-            #     json={
-            #         "config": {
-            #             "encoding": "WEBM_OPUS",
-            #             "sampleRateHertz": 48000,
-            #             "languageCode": self.language,
-            #         },
-            #         "audio": {
-            #             "content": audio_content
-            #         }
-            #     }
-            # )
-            # response.raise_for_status()
-            # results = response.json().get('results', [])
-            # if results:
-            #     return results[0]['alternatives'][0]['transcript']
-            # return ""
+            body, duration = self._request_body(audio_data)
+            if duration <= SYNC_MAX_DURATION_S:
+                return _transcript(self._post('speech:recognize', body))
+
+            operation = self._post('speech:longrunningrecognize', body)
+            logger.info(f"Audio is {duration:.0f}s long, waiting for long-running recognition {operation['name']}")
+            interval = POLL_INTERVAL_S
+            deadline = time.monotonic() + max(SYNC_MAX_DURATION_S, duration)
+            while not operation.get('done'):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Long-running recognition {operation['name']} did not complete")
+                time.sleep(interval)
+                interval = min(interval * 2, MAX_POLL_INTERVAL_S)
+                operation = self._get(f"operations/{operation['name']}")
+            return _operation_transcript(operation)
+
+        except Exception as e:
+            logger.error(f"Google transcription failed: {e}", exc_info=True)
+            raise
+
+    async def transcribe_async(self, audio_data: Union[bytes, str, Path]) -> str:
+        """
+        Coroutine version of transcribe, cancelling it aborts the request or the polling
+
+        Args:
+            audio_data: Either raw audio bytes, file path as string, or Path object
+
+        Returns:
+            Transcribed text
+        """
+        if not self.api_key:
+            raise RuntimeError("Google Cloud API key not configured")
+
+        try:
+            body, duration = await asyncio.to_thread(self._request_body, audio_data)
+            if duration <= SYNC_MAX_DURATION_S:
+                return _transcript(await self._post_async('speech:recognize', body))
+
+            operation = await self._post_async('speech:longrunningrecognize', body)
+            logger.info(f"Audio is {duration:.0f}s long, waiting for long-running recognition {operation['name']}")
+            interval = POLL_INTERVAL_S
+            deadline = time.monotonic() + max(SYNC_MAX_DURATION_S, duration)
+            while not operation.get('done'):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Long-running recognition {operation['name']} did not complete")
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, MAX_POLL_INTERVAL_S)
+                operation = await self._get_async(f"operations/{operation['name']}")
+            return _operation_transcript(operation)
 
         except Exception as e:
             logger.error(f"Google transcription failed: {e}", exc_info=True)
             raise
 
+    def _request_body(self, audio_data: Union[bytes, str, Path]) -> Tuple[bytes, float]:
+        """
+        Build the recognize request body
+
+        Returns:
+            Tuple of (JSON body, duration of the audio in seconds)
+        """
+        _, mime_type = audio_file_info(audio_data)
+        buffer, owned = open_audio_buffer(audio_data)
+        audio = memoryview(buffer)
+        try:
+            config: Dict[str, Any] = {
+                'encoding': GOOGLE_ENCODINGS.get(mime_type, 'LINEAR16'),
+                'languageCode': self.language,
+                'enableAutomaticPunctuation': True,
+            }
+            layout = parse_wav_pcm16(audio) if mime_type == 'audio/wav' else None
+            if layout is not None:
+                # Only the samples are sent, the header is replaced by the config
+                samples = audio[layout.data_offset:layout.data_end]
+                config.update(sampleRateHertz=layout.samplerate, audioChannelCount=layout.channels)
+                duration = layout.data_size / (2 * layout.channels * layout.samplerate)
+            else:
+                samples = audio[:]
+                info = sf.info(io.BytesIO(audio))
+                config.update(sampleRateHertz=info.samplerate, audioChannelCount=info.channels)
+                duration = info.duration
+            content = base64.b64encode(samples)
+            samples.release()
+        finally:
+            audio.release()
+            if isinstance(buffer, memoryview):
+                buffer.release()
+            for obj in owned:
+                obj.close()
+
+        body = b''.join([b'{"config": ', json.dumps(config).encode('utf-8'),
+                         b', "audio": {"content": "', content, b'"}}'])
+        return body, duration
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}/v1/{path}"
+
+    def _post(self, path: str, body: bytes) -> Dict[str, Any]:
+        response = self.session.post(self._url(path), params={'key': self.api_key}, data=body,
+                                     headers={'Content-Type': 'application/json'}, timeout=60)
+        return _check(response.status_code, response.text, response.json)
+
+    def _get(self, path: str) -> Dict[str, Any]:
+        response = self.session.get(self._url(path), params={'key': self.api_key}, timeout=30)
+        return _check(response.status_code, response.text, response.json)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self.async_client is not None and self.async_loop is not loop:
+            # Created on another (e.g. finished) loop, its connections can't be used here
+            close_on_loop(self.async_client, self.async_loop)
+            self.async_client = None
+        if self.async_client is None:
+            # Same pool as the session: unlimited connections, POOL_MAXSIZE of them kept open
+            self.async_client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=None, max_keepalive_connections=POOL_MAXSIZE, keepalive_expiry=KEEPALIVE_EXPIRY_S))
+            self.async_loop = loop
+        return self.async_client
+
+    async def _post_async(self, path: str, body: bytes) -> Dict[str, Any]:
+        response = await self._get_async_client().post(
+            self._url(path), params={'key': self.api_key}, content=body,
+            headers={'Content-Type': 'application/json'}, timeout=60)
+        return _check(response.status_code, response.text, response.json)
+
+    async def _get_async(self, path: str) -> Dict[str, Any]:
+        response = await self._get_async_client().get(self._url(path), params={'key': self.api_key}, timeout=30)
+        return _check(response.status_code, response.text, response.json)
+
     def update_language(self, language: str) -> None:
         """Update the language used for transcription"""
         self.language = language
         logger.info(f"Updated Google STT language to: {language}")
+
+    def warm_up(self) -> float:
+        """
+        Open a pooled connection to the API ahead of the upload
+
+        Returns:
+            Seconds the warm-up request took (a reused pooled connection makes it a plain round-trip)
+        """
+        start = time.perf_counter()
+        self.session.head(self.base_url, timeout=WARM_UP_TIMEOUT_S)
+        return time.perf_counter() - start
+
+    async def warm_up_async(self) -> float:
+        """Coroutine version of warm_up, opening the connection of the async client used by transcribe_async"""
+        start = time.perf_counter()
+        await self._get_async_client().head(self.base_url, timeout=WARM_UP_TIMEOUT_S)
+        return time.perf_counter() - start
+
+    def close(self) -> None:
+        """Close the pooled HTTP connections"""
+        self.session.close()
+        if self.async_client is not None:
+            close_on_loop(self.async_client, self.async_loop)
+
+
+def _check(status_code: int, text: str, parse_json) -> Dict[str, Any]:
+    """Parsed JSON of a successful response, else raise with the API error message"""
+    if status_code != 200:
+        try:
+            message = parse_json()['error']['message']
+        except Exception:
+            message = text
+        raise ProviderError(f"Google STT HTTP {status_code}: {message}")
+    return parse_json()
+
+
+def _transcript(result: Dict[str, Any]) -> str:
+    """Join the best alternative of each result (results cover consecutive parts of the audio)"""
+    parts: List[str] = []
+    for item in result.get('results', []):
+        alternatives = item.get('alternatives') or []
+        if alternatives and alternatives[0].get('transcript'):
+            parts.append(alternatives[0]['transcript'].strip())
+    return ' '.join(parts)
+
+
+def _operation_transcript(operation: Dict[str, Any]) -> str:
+    if 'error' in operation:
+        raise ProviderError(f"Long-running recognition failed: {operation['error'].get('message', operation['error'])}")
+    return _transcript(operation.get('response', {}))
@@ -0,0 +1,85 @@
+"""Connection setup timing of HTTP requests (TCP connect and TLS handshake)"""
+import contextlib
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# NOTE: Neither client reports how long a request spent opening its connection. httpx (httpcore)
+# calls a `trace` extension around each phase. urllib3 has no hook, so TimedHTTPAdapter's
+# connections time their own connect() and add it to the ConnectTiming measuring on their thread.
+# A request that reuses a pooled connection has a connect time of 0.
+
+# ConnectTiming of the request in progress on each thread (sync requests)
+_active = threading.local()
+
+
+class ConnectTiming:
+    """Time one request spent opening its connection (0.0 when a pooled connection was reused)."""
+
+    def __init__(self) -> None:
+        self.connect_s = 0.0
+        self._started: Optional[float] = None
+
+    @property
+    def reused(self) -> bool:
+        return self.connect_s == 0.0
+
+    @contextlib.contextmanager
+    def measure(self) -> Iterator['ConnectTiming']:
+        """Record the connections opened by TimedHTTPAdapter on this thread"""
+        previous = getattr(_active, 'timing', None)
+        _active.timing = self
+        try:
+            yield self
+        finally:
+            _active.timing = previous
+
+    async def trace(self, event: str, info: Any) -> None:
+        """httpx `trace` request extension"""
+        if event == 'connection.connect_tcp.started':
+            self._started = time.perf_counter()
+        elif event in ('connection.connect_tcp.complete', 'connection.start_tls.complete') and self._started:
+            self.connect_s = time.perf_counter() - self._started
+
+    def summary(self) -> str:
+        return "connection reused" if self.reused else f"connect {self.connect_s * 1000:.0f} ms"
+
+
+class _TimedConnectMixin:
+    def connect(self) -> None:
+        start = time.perf_counter()
+        super().connect()
+        timing = getattr(_active, 'timing', None)
+        if timing is not None:
+            timing.connect_s += time.perf_counter() - start
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """requests adapter whose connections report their connect time to ConnectTiming.measure()."""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
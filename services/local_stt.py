@@ -0,0 +1,221 @@
+"""In-process local Speech-to-Text Service Implementation"""
+import io
+import time
+import asyncio
+import logging
+import threading
+import importlib.util
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Tuple, Type, Union
+from pathlib import Path
+import numpy as np
+import soundfile as sf
+
+from modules.audio_dsp import StreamResampler
+
+logger = logging.getLogger('voice_typing')
+
+# NOTE: The model runs inside the app process, so a dictation costs no serialization, upload or
+# second process. Loading a model takes seconds, so it's loaded on first use (or by warm_up when
+# recording starts) and stays resident: loaded models are shared by every LocalTranscriber with
+# the same backend, path and options, and survive the transcriber cache being cleared.
+
+# Sample rate the audio is resampled to for the backends
+MODEL_SAMPLE_RATE = 16000
+
+
+class LocalBackend(ABC):
+    """CPU inference backend interface. Subclasses are registered with register_backend()."""
+
+    # Python package the backend needs, checked by available()
+    requires: Optional[str] = None
+
+    def __init__(self, model_path: str, int8: bool = True, threads: int = 0) -> None:
+        """
+        Args:
+            model_path: Local path of the model (file or directory, depending on the backend)
+            int8: Run with int8 quantized weights
+            threads: CPU threads used for inference (0 = backend default)
+        """
+        self.model_path = model_path
+        self.int8 = int8
+        self.threads = threads
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the backend's package is installed"""
+        return cls.requires is None or importlib.util.find_spec(cls.requires) is not None
+
+    @abstractmethod
+    def load(self) -> None:
+        """Load the model into memory"""
+
+    @abstractmethod
+    def transcribe(self, samples: np.ndarray, language: str) -> str:
+        """
+        Transcribe audio
+
+        Args:
+            samples: float32 mono samples in [-1.0, 1.0] at MODEL_SAMPLE_RATE
+            language: Language code (e.g. 'en')
+
+        Returns:
+            Transcribed text
+        """
+
+
+BACKENDS: Dict[str, Type[LocalBackend]] = {}
+
+
+def register_backend(name: str) -> Callable[[Type[LocalBackend]], Type[LocalBackend]]:
+    """Class decorator adding a backend to BACKENDS under `name`"""
+    def decorator(cls: Type[LocalBackend]) -> Type[LocalBackend]:
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+@register_backend('faster-whisper')
+class FasterWhisperBackend(LocalBackend):
+    """Whisper models converted for CTranslate2 (https://github.com/SYSTRAN/faster-whisper)"""
+
+    requires = 'faster_whisper'
+
+    def load(self) -> None:
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(self.model_path, device='cpu',
+                                  compute_type='int8' if self.int8 else 'float32',
+                                  cpu_threads=self.threads)
+
+    def transcribe(self, samples: np.ndarray, language: str) -> str:
+        segments, _ = self.model.transcribe(samples, language=language, beam_size=1)
+        return ' '.join(segment.text.strip() for segment in segments).strip()
+
+
+# Loaded backends by (backend name, model path, int8, threads)
+_resident: Dict[Tuple[str, str, bool, int], LocalBackend] = {}
+_resident_lock = threading.Lock()
+# Held while the model of a key loads (seconds): the same model isn't loaded twice, and other
+# models stay usable meanwhile
+_load_locks: Dict[Tuple[str, str, bool, int], threading.Lock] = {}
+
+
+def unload_models() -> None:
+    """Drop the resident models (they are loaded again on next use)"""
+    with _resident_lock:
+        _resident.clear()
+
+
+class LocalTranscriber:
+    """Local STT running a model in-process with a pluggable CPU backend"""
+
+    def __init__(self, model_path: str, backend: str = 'faster-whisper', language: str = "en",
+                 int8: bool = True, threads: int = 0):
+        """
+        Initialize local transcriber (the model is loaded on first use)
+
+        Args:
+            model_path: Local path of the model
+            backend: Name of a registered backend (see BACKENDS)
+            language: Language code for transcription
+            int8: Run with int8 quantized weights, if the backend supports it
+            threads: CPU threads used for inference (0 = backend default)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown local STT backend: {backend} (available: {', '.join(BACKENDS)})")
+        if not BACKENDS[backend].available():
+            raise ValueError(f"Local STT backend {backend} needs the '{BACKENDS[backend].requires}' package")
+        if not model_path or not Path(model_path).exists():
+            raise ValueError(f"Local STT model not found: {model_path}")
+        self.model = Path(model_path).name
+        self.model_path = str(model_path)
+        self.backend = backend
+        self.language = language
+        self.int8 = int8
+        self.threads = threads
+
+    def _get_backend(self) -> LocalBackend:
+        """The resident model, loading it if needed"""
+        key = (self.backend, self.model_path, self.int8, self.threads)
+        with _resident_lock:
+            instance = _resident.get(key)
+            if instance is not None:
+                return instance
+            load_lock = _load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with _resident_lock:
+                # Loaded by another thread while this one waited
+                instance = _resident.get(key)
+                if instance is not None:
+                    return instance
+                # The same model with other options isn't used anymore, free its memory
+                for other in [k for k in _resident if k[:2] == key[:2]]:
+                    del _resident[other]
+            start = time.perf_counter()
+            instance = BACKENDS[self.backend](self.model_path, int8=self.int8, threads=self.threads)
+            instance.load()
+            with _resident_lock:
+                _resident[key] = instance
+            logger.info(f"Loaded local STT model {self.model} ({self.backend}, "
+                        f"{'int8' if self.int8 else 'float32'}, {self.threads or 'default'} threads) "
+                        f"in {time.perf_counter() - start:.1f}s")
+            return instance
+
+    def transcribe(self, audio_data: Union[bytes, str, Path]) -> str:
+        """
+        Transcribe audio with the local model
+
+        Args:
+            audio_data: Either raw audio bytes, file path as string, or Path object
+
+        Returns:
+            Transcribed text
+
+        Raises:
+            Exception: If transcription fails
+        """
+        try:
+            samples = _load_samples(audio_data)
+            backend = self._get_backend()
+            start = time.perf_counter()
+            text = backend.transcribe(samples, self.language)
+            elapsed = time.perf_counter() - start
+            logger.info(f"Local STT transcribed {len(samples) / MODEL_SAMPLE_RATE:.1f}s of audio in {elapsed:.2f}s")
+            return text
+        except Exception as e:
+            logger.error(f"Local transcription failed: {e}", exc_info=True)
+            raise
+
+    async def transcribe_async(self, audio_data: Union[bytes, str, Path]) -> str:
+        """Coroutine version of transcribe, inference runs in a worker thread"""
+        return await asyncio.to_thread(self.transcribe, audio_data)
+
+    def warm_up(self) -> float:
+        """
+        Load the model ahead of the first transcription
+
+        Returns:
+            Seconds spent loading (0.0 if it was already resident)
+        """
+        start = time.perf_counter()
+        self._get_backend()
+        return time.perf_counter() - start
+
+    def update_language(self, language: str) -> None:
+        """Update the language used for transcription"""
+        self.language = language
+
+
+def _load_samples(audio_data: Union[bytes, str, Path]) -> np.ndarray:
+    """Decode a recording (WAV, FLAC or Ogg/Opus) to float32 mono samples at MODEL_SAMPLE_RATE
+
+    Other rates are resampled with the capture resampler (recordings are captured at 16 kHz by default).
+    """
+    source = io.BytesIO(audio_data) if isinstance(audio_data, (bytes, bytearray, memoryview)) else str(audio_data)
+    with sf.SoundFile(source) as audio_file:
+        samplerate = audio_file.samplerate
+        samples = audio_file.read(dtype='float32', always_2d=True).mean(axis=1)
+    if samplerate != MODEL_SAMPLE_RATE:
+        samples = StreamResampler(samplerate, MODEL_SAMPLE_RATE).process(samples)
+    return samples
@@ -0,0 +1,262 @@
+"""OpenAI Realtime (WebSocket) Speech-to-Text Service Implementation"""
+import os
+import io
+import json
+import base64
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Union
+from pathlib import Path
+import numpy as np
+import soundfile as sf
+import websockets
+
+from modules.async_runtime import AsyncRuntime, shared_runtime
+from modules.audio_dsp import CaptureConverter
+from services.errors import ProviderError
+from services.streaming_upload import LiveAudioSource
+
+logger = logging.getLogger('voice_typing')
+
+# Realtime transcription docs: https://platform.openai.com/docs/guides/realtime-transcription
+REALTIME_URL = "wss://api.openai.com/v1/realtime?intent=transcription"
+# The realtime API only accepts 16-bit mono PCM at 24 kHz
+REALTIME_SAMPLE_RATE = 24000
+# Seconds of audio per input_audio_buffer.append event when sending a finished recording
+BATCH_CHUNK_S = 1.0
+# Server VAD: silence that ends a segment. Finished segments are transcribed while recording goes on.
+VAD_SILENCE_MS = 500
+VAD_PREFIX_PADDING_MS = 300
+# Seconds to wait for the last segments once the audio is complete
+FINALIZE_TIMEOUT_S = 30.0
+
+# NOTE: Hybrid mode from docs/stt-upgrade-spec.md. Audio is streamed while recording, the server
+# VAD cuts it into segments at pauses and transcribes each one as soon as it ends. Partial
+# `delta` events are ignored, only the `completed` transcript of each segment is kept.
+# At stop the remaining audio is committed, so only the last segment is left to transcribe.
+#
+# Every commit, by the server VAD (announced by `speech_stopped`) or by us, is answered by
+# `input_audio_buffer.committed` (or an `input_audio_buffer_commit_empty` error when nothing was
+# left to commit). Once every commit is answered and every committed item has its transcript,
+# the segments are joined in commit order.
+#
+# The blocking transcribe() and transcribe_stream() run the session on the shared AsyncRuntime,
+# instead of starting an event loop per dictation. Code already on an event loop awaits
+# transcribe_async() / transcribe_stream_async() instead.
+
+
+class _Session:
+    """Events of one transcription session, tracking commits and completed segments."""
+
+    def __init__(self) -> None:
+        self.item_order: List[str] = []
+        self.transcripts: Dict[str, str] = {}
+        self.vad_commits = 0  # Commits announced by the server VAD
+        self.commits_sent = 0
+        self.commits_answered = 0
+        self.error: Optional[str] = None
+        self.changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return (self.commits_answered >= self.vad_commits + self.commits_sent
+                and all(item in self.transcripts for item in self.item_order))
+
+    def handle(self, event: dict) -> None:
+        kind = event.get('type')
+        if kind == 'input_audio_buffer.speech_stopped':
+            self.vad_commits += 1
+        elif kind == 'input_audio_buffer.committed':
+            self.commits_answered += 1
+            self.item_order.append(event['item_id'])
+        elif kind == 'conversation.item.input_audio_transcription.completed':
+            self.transcripts[event['item_id']] = event.get('transcript', '')
+        elif kind == 'conversation.item.input_audio_transcription.failed':
+            error = event.get('error') or {}
+            logger.warning(f"Realtime transcription of a segment failed: {error.get('message', error)}")
+            self.transcripts[event['item_id']] = ''
+        elif kind == 'error':
+            error = event.get('error') or {}
+            if error.get('code') == 'input_audio_buffer_commit_empty':
+                self.commits_answered += 1
+            else:
+                self.error = error.get('message') or str(error)
+        else:
+            return
+        self.changed.set()
+
+    def text(self) -> str:
+        return ' '.join(self.transcripts[item].strip() for item in self.item_order
+                        if self.transcripts.get(item, '').strip())
+
+
+class OpenAIRealtimeTranscriber:
+    """OpenAI STT over the Realtime WebSocket API, transcribing while recording"""
+
+    # Streams every recording while it's recorded, without the streaming_upload setting
+    streams_by_default = True
+
+    def __init__(self, model: str = "gpt-4o-transcribe", language: str = "en",
+                 url: str = REALTIME_URL, api_key: Optional[str] = None, server_vad: bool = True,
+                 runtime: Optional[AsyncRuntime] = None):
+        """
+        Initialize OpenAI Realtime transcriber
+
+        Args:
+            model: Model to use ('whisper-1', 'gpt-4o-transcribe', 'gpt-4o-mini-transcribe')
+            language: Language code for transcription (e.g., 'en', 'es', 'fr')
+            url: WebSocket URL of the realtime transcription endpoint
+            api_key: API key (defaults to the OPENAI_API_KEY environment variable)
+            server_vad: Let the server transcribe segments at pauses, instead of all the audio at stop
+            runtime: Runtime the blocking entry points run sessions on (defaults to the shared one)
+        """
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+        self.model = model
+        self.language = language
+        self.url = url
+        self.server_vad = server_vad
+        self._runtime = runtime
+
+    @property
+    def runtime(self) -> AsyncRuntime:
+        return self._runtime or shared_runtime()
+
+    def transcribe(self, audio_data: Union[bytes, str, Path]) -> str:
+        """
+        Transcribe a finished recording over the realtime API
+
+        Args:
+            audio_data: Either raw audio bytes, file path as string, or Path object
+
+        Returns:
+            Transcribed text
+
+        Raises:
+            Exception: If transcription fails
+        """
+        return self.runtime.run(self.transcribe_async(audio_data))
+
+    async def transcribe_async(self, audio_data: Union[bytes, str, Path]) -> str:
+        """Coroutine version of transcribe"""
+        try:
+            pcm = await asyncio.to_thread(_load_pcm16, audio_data)
+
+            async def chunks() -> AsyncIterator[bytes]:
+                size = int(BATCH_CHUNK_S * REALTIME_SAMPLE_RATE) * 2
+                for start in range(0, len(pcm), size):
+                    yield pcm[start:start + size]
+
+            return await self._run_session(chunks())
+        except Exception as e:
+            logger.error(f"OpenAI realtime transcription failed: {e}", exc_info=True)
+            raise
+
+    def transcribe_stream(self, source: LiveAudioSource, samplerate: int, channels: int = 1) -> str:
+        """
+        Transcribe a recording while it is being recorded
+
+        Args:
+            source: Live PCM_16 recording (fed by the recorder, finished when recording stops)
+            samplerate: Sample rate of the recording
+            channels: Channel count of the recording
+
+        Returns:
+            Transcribed text
+
+        Raises:
+            UploadAborted: If the source was aborted (recording cancelled)
+            ProviderError: If the server reported an error
+        """
+        return self.runtime.run(self.transcribe_stream_async(source, samplerate, channels))
+
+    async def transcribe_stream_async(self, source: LiveAudioSource, samplerate: int, channels: int = 1) -> str:
+        """Coroutine version of transcribe_stream"""
+        converter = CaptureConverter(samplerate, channels, REALTIME_SAMPLE_RATE, 1)
+
+        async def chunks() -> AsyncIterator[bytes]:
+            # The source blocks until audio is recorded, wait for it off the event loop
+            iterator = source.iter_chunks()
+            while True:
+                data = await asyncio.to_thread(next, iterator, None)
+                if data is None:
+                    return
+                yield converter.process(np.frombuffer(data, dtype='<i2').reshape(-1, channels)).tobytes()
+
+        return await self._run_session(chunks())
+
+    async def _run_session(self, chunks: AsyncIterator[bytes]) -> str:
+        """Send 24 kHz PCM chunks, commit the rest at the end and collect the segment transcripts"""
+        session = _Session()
+        headers = {'Authorization': f"Bearer {self.api_key}", 'OpenAI-Beta': 'realtime=v1'}
+        async with websockets.connect(self.url, additional_headers=headers, max_size=None) as ws:
+            await ws.send(json.dumps({'type': 'transcription_session.update', 'session': {
+                'input_audio_format': 'pcm16',
+                'input_audio_transcription': {'model': self.model, 'language': self.language},
+                'turn_detection': {
+                    'type': 'server_vad',
+                    'silence_duration_ms': VAD_SILENCE_MS,
+                    'prefix_padding_ms': VAD_PREFIX_PADDING_MS,
+                } if self.server_vad else None,
+            }}))
+            receiver = asyncio.ensure_future(self._receive(ws, session))
+            try:
+                sent = 0
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    await ws.send(json.dumps({'type': 'input_audio_buffer.append',
+                                              'audio': base64.b64encode(chunk).decode('ascii')}))
+                    sent += len(chunk)
+                    if receiver.done() or session.error:
+                        # Connection closed, or the session was rejected (e.g. invalid API key)
+                        break
+                if session.error:
+                    raise ProviderError(f"Realtime transcription error: {session.error}")
+
+                session.commits_sent += 1
+                await ws.send(json.dumps({'type': 'input_audio_buffer.commit'}))
+                logger.debug(f"Realtime session sent {sent / 2 / REALTIME_SAMPLE_RATE:.1f}s of audio, finalizing")
+                await asyncio.wait_for(self._finalized(session, receiver), FINALIZE_TIMEOUT_S)
+            finally:
+                receiver.cancel()
+
+        logger.info(f"Realtime transcription finished with {len(session.item_order)} segment(s)")
+        return session.text()
+
+    async def _receive(self, ws, session: _Session) -> None:
+        async for message in ws:
+            session.handle(json.loads(message))
+
+    async def _finalized(self, session: _Session, receiver: asyncio.Future) -> None:
+        """Wait until every commit is answered and every segment transcribed"""
+        while True:
+            if session.error:
+                raise ProviderError(f"Realtime transcription error: {session.error}")
+            if session.finished:
+                return
+            if receiver.done():
+                receiver.result()  # Raises if the connection failed
+                raise ProviderError("Realtime connection closed before the transcription completed")
+            session.changed.clear()
+            changed = asyncio.ensure_future(session.changed.wait())
+            await asyncio.wait({changed, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            changed.cancel()
+
+    def update_model(self, model: str) -> None:
+        """Update the model used for transcription"""
+        self.model = model
+
+    def update_language(self, language: str) -> None:
+        """Update the language used for transcription"""
+        self.language = language
+
+
+def _load_pcm16(audio_data: Union[bytes, str, Path]) -> bytes:
+    """Decode a recording (WAV, FLAC or Ogg/Opus) to the 24 kHz mono PCM_16 the realtime API takes"""
+    source = io.BytesIO(audio_data) if isinstance(audio_data, (bytes, bytearray, memoryview)) else str(audio_data)
+    with sf.SoundFile(source) as audio_file:
+        samplerate, channels = audio_file.samplerate, audio_file.channels
+        data = audio_file.read(dtype='int16', always_2d=True)
+    return CaptureConverter(samplerate, channels, REALTIME_SAMPLE_RATE, 1).process(data).tobytes()
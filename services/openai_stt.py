@@ -1,41 +1,88 @@
 """OpenAI Speech-to-Text Service Implementation"""
 import os
+import io
+import asyncio
+import importlib.util
+import mmap
+import struct
+import time
 import logging
-from typing import Union, Optional
+from functools import lru_cache
+from typing import Union, Optional, List, Any, Tuple, IO
 from pathlib import Path
-import io
 import soundfile as sf
 import numpy as np
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import httpx
 
+from modules.async_runtime import close_on_loop
+from services.audio_payload import ChainedReader, audio_file_info, parse_wav_pcm16
+
 logger = logging.getLogger('voice_typing')
 
 # NOTE: Temp workaround for OpenAI bug where transcription cuts off.
 # See: https://community.openai.com/t/gpt-4o-transcribe-truncates-the-transcript/1148347
+# The pad guarantees the clip ends with this much non-speech, so clips that already end in
+# silence are padded less (or not at all).
 PADDING_DURATION_S = 1.5
 NOISE_AMPLITUDE = 0.08
+# HTTP/2 support in httpx needs the optional 'h2' package
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+# Idle connections are kept open this long (httpx defaults to 5s, shorter than the time between dictations)
+KEEPALIVE_EXPIRY_S = 300.0
+# Timeout of the request opening a connection ahead of an upload
+WARM_UP_TIMEOUT_S = 5.0
 
+# RMS below which the end of the clip counts as silence (-40 dB, the default silence_threshold)
+TAIL_SILENCE_THRESHOLD = 0.01
+# Length of the frames the tail is analyzed in
+TAIL_FRAME_S = 0.02
+# Pads shorter than this are skipped
+MIN_PADDING_S = 0.05
 
-def _pad_audio_with_noise(
-    audio_data: Union[bytes, str, Path],
-    duration_s: float,
-    amplitude: float
-) -> io.BytesIO:
+
+def _trailing_silence(samples: np.ndarray, samplerate: int,
+                      threshold: float = TAIL_SILENCE_THRESHOLD,
+                      frame_s: float = TAIL_FRAME_S) -> float:
     """
-    Pads audio data with quiet brown noise at the end for a more organic sound.
+    Measure how long the clip has been silent at its end
 
     Args:
-        audio_data: Audio data as bytes, file path string, or Path object.
-        duration_s: Duration of noise to add in seconds.
-        amplitude: The peak amplitude of the noise.
+        samples: int16 or float (frames,) or (frames, channels) samples from the end of the clip
+        samplerate: Sample rate of the samples
+        threshold: Frame RMS below which audio counts as silence
+        frame_s: Length of the analysis frames (aligned to the end of the clip)
 
     Returns:
-        An in-memory BytesIO object containing the padded audio in WAV format.
+        Seconds of trailing silence (at most the length of `samples`)
     """
-    input_stream = io.BytesIO(audio_data) if isinstance(audio_data, bytes) else audio_data
-    data, samplerate = sf.read(input_stream, dtype='float32')
+    mono = samples.reshape(len(samples), -1).astype(np.float64).mean(axis=1)
+    if samples.dtype == np.int16:
+        mono /= 32768.0
+    frame_len = max(1, int(frame_s * samplerate))
+    count = len(mono) // frame_len
+    if count == 0:
+        return 0.0
+    frames = mono[len(mono) - count * frame_len:].reshape(count, frame_len)
+    loud = np.flatnonzero(np.sqrt(np.mean(np.square(frames), axis=1)) >= threshold)
+    silent_frames = count if len(loud) == 0 else count - 1 - int(loud[-1])
+    return silent_frames * frame_len / samplerate
+
 
+def _padding_needed(tail: np.ndarray, samplerate: int, duration_s: float) -> float:
+    """Seconds of padding needed so the clip ends with `duration_s` seconds of silence (0.0 = none)"""
+    needed = max(0.0, duration_s - _trailing_silence(tail, samplerate))
+    return needed if needed >= MIN_PADDING_S else 0.0
+
+
+@lru_cache(maxsize=8)
+def _brown_noise(samplerate: int, duration_s: float, amplitude: float) -> np.ndarray:
+    """
+    Quiet brown noise used as padding, generated once per sample rate.
+
+    Returns:
+        Read-only float32 array of `duration_s` seconds of noise peaking at `amplitude`
+    """
     padding_samples = int(duration_s * samplerate)
 
     # Generate white noise and integrate it to create brown noise (more "natural" sounding)
@@ -43,43 +90,191 @@ def _pad_audio_with_noise(
     brown_noise_unscaled = np.cumsum(white_noise)
 
     # Normalize to the target amplitude to prevent clipping
-    max_abs_val = np.max(np.abs(brown_noise_unscaled))
+    max_abs_val = np.max(np.abs(brown_noise_unscaled)) if padding_samples else 0
     if max_abs_val > 0:
-        noise = (brown_noise_unscaled / max_abs_val) * amplitude
+        noise = ((brown_noise_unscaled / max_abs_val) * amplitude).astype('float32')
     else:
         noise = np.zeros_like(brown_noise_unscaled)
+    noise.setflags(write=False)
+    return noise
+
+
+@lru_cache(maxsize=8)
+def _brown_noise_pcm16(samplerate: int, channels: int, duration_s: float, amplitude: float) -> bytes:
+    """The brown noise pad as interleaved little-endian PCM_16 frames, ready to append to WAV data"""
+    noise = _brown_noise(samplerate, duration_s, amplitude)
+    pcm = np.clip(np.floor(noise * 32768.0), -32768, 32767).astype('<i2')
+    return np.repeat(pcm[:, np.newaxis], channels, axis=1).tobytes()
+
+
+def _pad_wav_with_noise(
+    audio_data: Union[bytes, str, Path],
+    duration_s: float,
+    amplitude: float
+) -> Optional[Tuple[ChainedReader, float]]:
+    """
+    Pads a PCM_16 WAV without decoding it: the cached noise frames are appended after the
+    existing samples and the RIFF/data chunk sizes are patched in a copy of the header.
+    Only the last `duration_s` seconds are looked at to decide how much padding is needed.
+
+    File paths are memory-mapped, so the recording is never read into memory as a whole.
+
+    Returns:
+        (stream over the patched header, original samples, noise and any trailing chunks,
+         seconds of padding added), or None if the audio is not a PCM_16 WAV
+    """
+    owned: List[Any] = []
+    if isinstance(audio_data, (str, Path)):
+        file = open(audio_data, 'rb')
+        owned.append(file)
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            file.close()
+            return None
+        owned.append(mapped)
+        view = memoryview(mapped)
+    else:
+        view = memoryview(audio_data)
+
+    layout = parse_wav_pcm16(view)
+    if layout is None or layout.data_size % 2:
+        view.release()
+        for obj in reversed(owned):
+            obj.close()
+        return None
+
+    frame_size = 2 * layout.channels
+    tail_start = max(layout.data_offset, layout.data_end - int(duration_s * layout.samplerate) * frame_size)
+    tail = np.frombuffer(bytes(view[tail_start:layout.data_end]), dtype='<i2').reshape(-1, layout.channels)
+    pad_s = _padding_needed(tail, layout.samplerate, duration_s)
+    if pad_s == 0.0:
+        parts = [view[:]]
+        view.release()
+        return ChainedReader(parts, owned), 0.0
+
+    # The cached pad is sliced, so any pad length reuses the same noise
+    full_pad = _brown_noise_pcm16(layout.samplerate, layout.channels, duration_s, amplitude)
+    pad = memoryview(full_pad)[:int(pad_s * layout.samplerate) * frame_size]
+    header = bytearray(view[:layout.data_offset])
+    riff_size = struct.unpack_from('<I', header, 4)[0]
+    struct.pack_into('<I', header, 4, riff_size + len(pad))
+    struct.pack_into('<I', header, layout.data_offset - 4, layout.data_size + len(pad))
+    parts = [header, view[layout.data_offset:layout.data_end], pad, view[layout.data_end:]]
+    view.release()
+    return ChainedReader(parts, owned), pad_s
+
+
+def _pad_audio_with_noise(
+    audio_data: Union[bytes, str, Path],
+    duration_s: float,
+    amplitude: float
+) -> Tuple[IO[bytes], float]:
+    """
+    Pads audio data with quiet brown noise at the end for a more organic sound.
+
+    Only pads as much as needed for the clip to end with `duration_s` seconds of silence,
+    so clips that already end in silence are sent unchanged.
+
+    Args:
+        audio_data: Audio data as bytes, file path string, or Path object.
+        duration_s: Trailing silence the padded clip must end with, in seconds.
+        amplitude: The peak amplitude of the noise.
 
+    Returns:
+        A readable stream containing the padded audio, in the same format as the input
+        (WAV, FLAC or Ogg/Opus) so compressed uploads stay compressed, and the seconds of
+        padding added.
+    """
+    padded = _pad_wav_with_noise(audio_data, duration_s, amplitude)
+    if padded is not None:
+        return padded
+
+    # Compressed formats have to be decoded and re-encoded
+    input_stream = io.BytesIO(audio_data) if isinstance(audio_data, bytes) else audio_data
+    with sf.SoundFile(input_stream) as source:
+        samplerate = source.samplerate
+        file_format, subtype = source.format, source.subtype
+        data = source.read(dtype='float32')
+
+    pad_s = _padding_needed(data[-int(duration_s * samplerate):], samplerate, duration_s)
+    if pad_s == 0.0:
+        original = open(audio_data, 'rb') if isinstance(audio_data, (str, Path)) else io.BytesIO(audio_data)
+        return original, 0.0
+
+    noise = _brown_noise(samplerate, duration_s, amplitude)[:int(pad_s * samplerate)]
+    if data.ndim > 1:
+        noise = np.repeat(noise[:, np.newaxis], data.shape[1], axis=1)
     padded_data = np.concatenate([data, noise])
 
     buffer = io.BytesIO()
-    sf.write(buffer, padded_data, samplerate, format='WAV', subtype='PCM_16')
+    sf.write(buffer, padded_data, samplerate, format=file_format, subtype=subtype)
     buffer.seek(0)
-    return buffer
+    return buffer, pad_s
 
 
 class OpenAITranscriber:
     """OpenAI STT service implementation supporting Whisper and GPT-4o models"""
 
-    def __init__(self, model: str = "gpt-4o-mini-transcribe", language: str = "en"):
+    def __init__(self, model: str = "gpt-4o-mini-transcribe", language: str = "en", http2: bool = False):
         """
         Initialize OpenAI transcriber
 
         Args:
             model: Model to use ('whisper-1', 'gpt-4o-transcribe', 'gpt-4o-mini-transcribe')
             language: Language code for transcription (e.g., 'en', 'es', 'fr')
+            http2: Use HTTP/2 if the 'h2' package is installed
         """
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
 
-        self.client = OpenAI(
-            api_key=api_key,
+        # Instances are reused across dictations (see transcribe._get_transcriber), so the
+        # connection pool keeps the TLS connection to the API open between requests
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.http_client = httpx.Client(
             # Configure timeout: 60s total timeout, 10s connect timeout
-            timeout=httpx.Timeout(60.0, connect=10.0)
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=KEEPALIVE_EXPIRY_S),
+            http2=self.http2
         )
+        self.client = OpenAI(api_key=api_key, http_client=self.http_client)
+        # Used by transcribe_async (see _get_async_client)
+        self.async_http_client: Optional[httpx.AsyncClient] = None
+        self.async_client: Optional[AsyncOpenAI] = None
+        self.async_loop: Optional[asyncio.AbstractEventLoop] = None
         self.model = model
         self.language = language
 
+    def _open_upload(self, audio_data: Union[bytes, str, Path]) -> Tuple[IO[bytes], Optional[IO[bytes]]]:
+        """
+        Get the stream to upload, padded with noise for gpt-4o models
+
+        Returns:
+            Tuple of (stream to upload, stream to close once uploaded or None)
+        """
+        # Conditionally pad audio for gpt-4o models as a workaround
+        if "gpt-4o" in self.model:
+            file_to_send, pad_s = _pad_audio_with_noise(
+                audio_data, PADDING_DURATION_S, NOISE_AMPLITUDE
+            )
+            if pad_s:
+                logger.info(f"Padded audio with {pad_s:.2f}s of quiet noise for {self.model} "
+                             f"(saved {PADDING_DURATION_S - pad_s:.2f}s)")
+            else:
+                logger.info(f"Audio already ends in {PADDING_DURATION_S}s of silence, "
+                             f"skipped padding (saved {PADDING_DURATION_S:.2f}s)")
+            return file_to_send, file_to_send
+
+        # Handle original, unpadded audio data
+        if isinstance(audio_data, (str, Path)):
+            file_path = Path(audio_data)
+            if not file_path.exists():
+                raise FileNotFoundError(f"Audio file not found: {file_path}")
+            opened_file = open(file_path, 'rb')
+            return opened_file, opened_file
+        return io.BytesIO(audio_data), None
+
     def transcribe(self, audio_data: Union[bytes, str, Path]) -> str:
         """
         Transcribe audio using OpenAI's API
@@ -94,39 +289,49 @@ class OpenAITranscriber:
             Exception: If transcription fails
         """
         try:
-            file_to_send = None
-            opened_file = None
+            # Filename extension and MIME type tell the API which format the payload is in
+            filename, mime_type = audio_file_info(audio_data)
+            file_to_send, opened_file = self._open_upload(audio_data)
 
             try:
-                # Conditionally pad audio for gpt-4o models as a workaround
-                if "gpt-4o" in self.model:
-                    logger.debug(f"Padding audio with {PADDING_DURATION_S}s of quiet noise for {self.model}")
-                    padded_buffer = _pad_audio_with_noise(
-                        audio_data, PADDING_DURATION_S, NOISE_AMPLITUDE
-                    )
-
-                    filename = "audio.wav"
-                    if isinstance(audio_data, (str, Path)):
-                        filename = Path(audio_data).name
-
-                    padded_buffer.name = filename
-                    file_to_send = padded_buffer
-
-                # Handle original, unpadded audio data
-                elif isinstance(audio_data, (str, Path)):
-                    file_path = Path(audio_data)
-                    if not file_path.exists():
-                        raise FileNotFoundError(f"Audio file not found: {file_path}")
-                    opened_file = open(file_path, 'rb')
-                    file_to_send = opened_file
-                else:
-                    file_to_send = io.BytesIO(audio_data)
-                    file_to_send.name = "audio.wav"
-
                 # Perform transcription
                 response = self.client.audio.transcriptions.create(
                     model=self.model,
-                    file=file_to_send,
+                    file=(filename, file_to_send, mime_type),
+                    language=self.language
+                )
+                return response.text
+
+            finally:
+                if opened_file:
+                    opened_file.close()
+
+        except Exception as e:
+            logger.error(f"OpenAI transcription failed: {e}", exc_info=True)
+            raise
+
+    async def transcribe_async(self, audio_data: Union[bytes, str, Path]) -> str:
+        """
+        Coroutine version of transcribe, cancelling it aborts the upload
+
+        Args:
+            audio_data: Either raw audio bytes, file path as string, or Path object
+
+        Returns:
+            Transcribed text
+
+        Raises:
+            Exception: If transcription fails
+        """
+        try:
+            filename, mime_type = audio_file_info(audio_data)
+            # Padding compressed audio decodes it, keep that off the event loop
+            file_to_send, opened_file = await asyncio.to_thread(self._open_upload, audio_data)
+
+            try:
+                response = await self._get_async_client().audio.transcriptions.create(
+                    model=self.model,
+                    file=(filename, file_to_send, mime_type),
                     language=self.language
                 )
                 return response.text
@@ -134,12 +339,28 @@ class OpenAITranscriber:
             finally:
                 if opened_file:
                     opened_file.close()
-                # BytesIO buffers are managed by garbage collector, no close needed for file_to_send
 
         except Exception as e:
             logger.error(f"OpenAI transcription failed: {e}", exc_info=True)
             raise
 
+    def _get_async_client(self) -> AsyncOpenAI:
+        """The async client, created on first use (its connections belong to the running event loop)"""
+        loop = asyncio.get_running_loop()
+        if self.async_client is not None and self.async_loop is not loop:
+            # Created on another (e.g. finished) loop, its connections can't be used here
+            close_on_loop(self.async_http_client, self.async_loop)
+            self.async_client = None
+        if self.async_client is None:
+            self.async_http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=KEEPALIVE_EXPIRY_S),
+                http2=self.http2
+            )
+            self.async_loop = loop
+            self.async_client = AsyncOpenAI(api_key=self.client.api_key, http_client=self.async_http_client)
+        return self.async_client
+
     def update_model(self, model: str) -> None:
         """Update the model used for transcription"""
         # dead code? probably added with the intention of reusing transcriber instances
@@ -149,3 +370,27 @@ class OpenAITranscriber:
     def update_language(self, language: str) -> None:
         """Update the language used for transcription"""
         self.language = language
+
+    def warm_up(self) -> float:
+        """
+        Open a pooled connection to the API ahead of the upload (DNS, TCP and TLS)
+
+        Returns:
+            Seconds the warm-up request took (a reused pooled connection makes it a plain round-trip)
+        """
+        start = time.perf_counter()
+        self.http_client.head(str(self.client.base_url), timeout=WARM_UP_TIMEOUT_S)
+        return time.perf_counter() - start
+
+    async def warm_up_async(self) -> float:
+        """Coroutine version of warm_up, opening the connection of the async client used by transcribe_async"""
+        client = self._get_async_client()
+        start = time.perf_counter()
+        await self.async_http_client.head(str(client.base_url), timeout=WARM_UP_TIMEOUT_S)
+        return time.perf_counter() - start
+
+    def close(self) -> None:
+        """Close the pooled HTTP connections"""
+        self.http_client.close()
+        if self.async_http_client is not None:
+            close_on_loop(self.async_http_client, self.async_loop)
@@ -0,0 +1,193 @@
+"""Chunked PCM upload protocol with incremental results, for custom STT servers"""
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from services.errors import ProviderError
+
+logger = logging.getLogger('voice_typing')
+
+# NOTE: Optional protocol a custom STT server can implement next to its multipart endpoint.
+#
+# 1. Negotiation: GET {base_url}/v1/stream/capabilities answers
+#      {"version": 1, "endpoint": "/v1/stream/transcribe",
+#       "encodings": ["pcm_s16le"], "results": ["ndjson", "sse"]}
+#    Any other answer (404, no JSON, unknown version) means the server doesn't speak the protocol
+#    and the multipart upload is used.
+# 2. Upload: POST {endpoint}?encoding=pcm_s16le&sample_rate=16000&channels=1&language=en&model=...
+#    with Content-Type `audio/L16; rate=16000; channels=1` and the raw samples as the body, sent
+#    with chunked transfer encoding while recording (or with a Content-Length for a finished
+#    recording). The server transcribes the audio as it arrives.
+# 3. Results: the response streams one JSON event per line (NDJSON, Accept: application/x-ndjson)
+#    or per SSE message (Accept: text/event-stream, the event name is used as the type):
+#      {"type": "partial", "text": "..."}  Hypothesis for the segment in progress (replaced by the next)
+#      {"type": "final", "text": "..."}    Text of a finished segment
+#      {"type": "done", "text": "..."}     End of the results ("text", if set, is the whole transcript)
+#      {"type": "error", "message": "..."} The transcription failed
+#    Other types (e.g. keep-alives) are ignored. Without "text" in `done`, the finals are joined.
+#
+# The client reads the results while it is still sending the audio (services/duplex_http.py),
+# so partial results follow the recording, and by the time the upload ends the server has
+# transcribed everything but the last segment.
+
+# Version of the protocol implemented by the client
+STREAM_PROTOCOL_VERSION = 1
+# Capabilities endpoint, relative to the base URL
+CAPABILITIES_PATH = "/v1/stream/capabilities"
+# Upload endpoint used when the capabilities don't name one
+DEFAULT_STREAM_ENDPOINT = "/v1/stream/transcribe"
+# Only encoding sent: the recorder's 16-bit little-endian samples
+PCM_ENCODING = 'pcm_s16le'
+# Result formats -> Accept header, in order of preference
+RESULT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+
+class StreamRejected(ProviderError):
+    """Raised when the server answers the streaming upload with an error status or malformed results"""
+
+
+class StreamCapabilities:
+    """What the server announced at negotiation"""
+
+    def __init__(self, endpoint: str, result_format: str) -> None:
+        self.endpoint = endpoint
+        self.result_format = result_format  # Key of RESULT_FORMATS
+
+    @property
+    def accept(self) -> str:
+        return RESULT_FORMATS[self.result_format]
+
+
+def parse_capabilities(payload: Any) -> Optional[StreamCapabilities]:
+    """
+    Check a capabilities answer against what the client supports
+
+    Returns:
+        StreamCapabilities, or None if the server can't be used with this client
+    """
+    if not isinstance(payload, dict) or payload.get('version') != STREAM_PROTOCOL_VERSION:
+        return None
+    if PCM_ENCODING not in (payload.get('encodings') or []):
+        return None
+    offered = payload.get('results') or []
+    for result_format in RESULT_FORMATS:
+        if result_format in offered:
+            return StreamCapabilities(payload.get('endpoint') or DEFAULT_STREAM_ENDPOINT, result_format)
+    return None
+
+
+def stream_request(capabilities: StreamCapabilities, samplerate: int, channels: int,
+                   language: str, model: str) -> Dict[str, Dict[str, str]]:
+    """Query parameters and headers of a streaming upload (authorization excluded)"""
+    return {
+        'params': {
+            'encoding': PCM_ENCODING,
+            'sample_rate': str(samplerate),
+            'channels': str(channels),
+            'language': language,
+            'model': model,
+        },
+        'headers': {
+            'Content-Type': f"audio/L16; rate={samplerate}; channels={channels}",
+            'Accept': capabilities.accept,
+        },
+    }
+
+
+class StreamResults:
+    """Incremental parser of the result events, building the transcript"""
+
+    def __init__(self, result_format: str, on_partial: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Args:
+            result_format: 'ndjson' or 'sse'
+            on_partial: Called with the transcript so far (finals and the current partial) on each update
+        """
+        self.result_format = result_format
+        self.on_partial = on_partial
+        self.finals: List[str] = []
+        self.partial = ''
+        self.done = False
+        self.events = 0
+        self._text: Optional[str] = None
+        self._sse_event: Optional[str] = None
+        self._sse_data: List[str] = []
+
+    def feed_line(self, line: str) -> None:
+        """
+        Process one line of the response (without its line ending)
+
+        Raises:
+            ProviderError: If the server reported an error
+            StreamRejected: If the line isn't a valid result
+        """
+        if self.result_format == 'ndjson':
+            if line.strip():
+                self._handle(_parse_event(line))
+            return
+
+        # SSE: fields until a blank line, which dispatches the message
+        if not line:
+            if self._sse_data:
+                event = _parse_event('\n'.join(self._sse_data))
+                if isinstance(event, dict) and self._sse_event:
+                    event.setdefault('type', self._sse_event)
+                self._handle(event)
+            self._sse_event, self._sse_data = None, []
+        elif line.startswith(':'):
+            return  # Comment (keep-alive)
+        else:
+            field, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            if field == 'event':
+                self._sse_event = value
+            elif field == 'data':
+                self._sse_data.append(value)
+
+    def _handle(self, event: Any) -> None:
+        if not isinstance(event, dict):
+            return
+        self.events += 1
+        kind = event.get('type')
+        if kind == 'partial':
+            self.partial = str(event.get('text') or '')
+        elif kind == 'final':
+            text = str(event.get('text') or '').strip()
+            if text:
+                self.finals.append(text)
+            self.partial = ''
+        elif kind == 'done':
+            self.done = True
+            if event.get('text') is not None:
+                self._text = str(event['text'])
+            return
+        elif kind == 'error':
+            raise ProviderError(f"STT server error: {event.get('message', event)}")
+        else:
+            return
+        if self.on_partial:
+            try:
+                self.on_partial(' '.join(self.finals + ([self.partial.strip()] if self.partial.strip() else [])))
+            except Exception as e:
+                logger.warning(f"Partial result callback failed: {e}")
+
+    def transcript(self) -> str:
+        """
+        The final transcript
+
+        Raises:
+            ProviderError: If the response ended before the `done` event
+        """
+        if not self.done:
+            raise ProviderError("STT server closed the result stream before it was done")
+        return self._text if self._text is not None else ' '.join(self.finals)
+
+
+def _parse_event(data: str) -> Any:
+    try:
+        return json.loads(data)
+    except ValueError:
+        raise StreamRejected(f"STT server sent a malformed result: {data[:200]!r}") from None
@@ -0,0 +1,118 @@
+"""Streaming (chunked) upload of a recording while it is still being recorded"""
+import struct
+import threading
+import uuid
+from collections import deque
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+# NOTE: The request body is generated from the live capture and sent with chunked transfer
+# encoding, so when recording stops only the last audio and the closing boundary are left to
+# send. The WAV header is written before the length is known, with the sizes set to the
+# maximum value (the usual convention for streamed WAV, accepted by ffmpeg and libsndfile).
+
+STREAMING_WAV_SIZE = 0xFFFFFFFF
+
+
+class UploadAborted(Exception):
+    """Raised by the body generator when the recording was cancelled"""
+
+
+def streaming_wav_header(samplerate: int, channels: int = 1) -> bytes:
+    """44 byte PCM_16 WAV header for data of unknown length"""
+    block_align = channels * 2
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', STREAMING_WAV_SIZE, b'WAVE',
+        b'fmt ', 16, 1, channels, samplerate, samplerate * block_align, block_align, 16,
+        b'data', STREAMING_WAV_SIZE - 36
+    )
+
+
+class LiveAudioSource:
+    """Thread-safe byte stream of a recording in progress, consumed by a streaming upload."""
+
+    def __init__(self) -> None:
+        self._chunks: Deque[bytes] = deque()
+        self._condition = threading.Condition()
+        self._finished = False
+        self._aborted = False
+        self.bytes_written = 0
+
+    @property
+    def aborted(self) -> bool:
+        return self._aborted
+
+    def write(self, data: bytes) -> None:
+        """Append recorded bytes (ignored once finished or aborted)"""
+        with self._condition:
+            if self._finished or self._aborted:
+                return
+            self._chunks.append(data)
+            self.bytes_written += len(data)
+            self._condition.notify_all()
+
+    def finish(self) -> None:
+        """Mark the end of the recording, letting the upload complete its body"""
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+
+    def abort(self) -> None:
+        """Cancel the upload: the body generator raises UploadAborted, dropping the connection"""
+        with self._condition:
+            self._aborted = True
+            self._chunks.clear()
+            self._condition.notify_all()
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """
+        Yield recorded bytes as they arrive until the recording is finished
+
+        Raises:
+            UploadAborted: If abort() is called
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._chunks or self._finished or self._aborted)
+                if self._aborted:
+                    raise UploadAborted("Recording cancelled")
+                if not self._chunks:
+                    return
+                # Send everything pending as one HTTP chunk
+                data = b''.join(self._chunks)
+                self._chunks.clear()
+            yield data
+
+
+def multipart_stream(source: LiveAudioSource,
+                     header: bytes,
+                     filename: str,
+                     mime_type: str,
+                     fields: Optional[Dict[str, str]] = None,
+                     field_name: str = 'file') -> Tuple[Iterator[bytes], str]:
+    """
+    Build a multipart/form-data body whose file part is read from a live source
+
+    Args:
+        source: Live recording bytes
+        header: Bytes sent before the recording (e.g. streaming_wav_header())
+        filename: Filename of the file part
+        mime_type: Content type of the file part
+        fields: Extra form fields, sent before the file
+        field_name: Name of the file field
+
+    Returns:
+        Tuple of (body generator, Content-Type header value)
+    """
+    boundary = uuid.uuid4().hex
+
+    def body() -> Iterator[bytes]:
+        for name, value in (fields or {}).items():
+            yield (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                   f'{value}\r\n').encode('utf-8')
+        yield (f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; '
+               f'filename="{filename}"\r\nContent-Type: {mime_type}\r\n\r\n').encode('utf-8') + header
+        yield from source.iter_chunks()
+        yield f'\r\n--{boundary}--\r\n'.encode('utf-8')
+
+    return body(), f'multipart/form-data; boundary={boundary}'
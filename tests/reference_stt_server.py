@@ -0,0 +1,236 @@
+"""Minimal reference server for the custom STT streaming protocol (services/stream_protocol.py).
+
+It doesn't run a model: each segment of audio is "transcribed" as a description of what was
+received, so clients can be tested and their overhead measured without one. The multipart
+endpoint used by servers without the protocol is served as well, for fallback tests.
+
+Run it and point `custom_stt_base_url` at it:
+
+    python tests/reference_stt_server.py --port 8000 --segment 2.0 --compute 0.1
+
+`--compute` simulates inference time (seconds per second of audio), spent on each segment as
+it completes, so the latency saved by transcribing during the upload can be benchmarked.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Seconds of audio per segment (a final result is sent for each one)
+DEFAULT_SEGMENT_S = 1.0
+# Size of the body reads
+READ_SIZE = 16 * 1024
+
+
+class ReferenceServer(ThreadingHTTPServer):
+    """Streaming protocol server. Keeps what it received in `uploads` for tests."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, segment_s: float = DEFAULT_SEGMENT_S,
+                 compute: float = 0.0, streaming: bool = True, results: Optional[List[str]] = None) -> None:
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 = any free port)
+            segment_s: Seconds of audio per final result
+            compute: Simulated inference seconds per second of audio
+            streaming: Serve the streaming protocol (False = multipart endpoint only)
+            results: Result formats offered at negotiation ('ndjson', 'sse')
+        """
+        super().__init__((host, port), ReferenceHandler)
+        self.segment_s = segment_s
+        self.compute = compute
+        self.streaming = streaming
+        self.results = results or ['ndjson', 'sse']
+        self.uploads: List[dict] = []
+        self.requests: List[str] = []  # "METHOD /path" of every request
+        self.connections = 0  # TCP connections accepted
+        self.errors: List[int] = []  # Statuses answered to the next streaming protocol requests instead
+        self.garbled = False  # Start the results with a malformed line
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def process_request(self, request, client_address) -> None:
+        self.connections += 1
+        super().process_request(request, client_address)
+
+    def start(self) -> 'ReferenceServer':
+        """Serve from a background thread"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class ReferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def parse_request(self) -> bool:
+        parsed = super().parse_request()
+        if parsed:
+            self.server.requests.append(f"{self.command} {urlparse(self.path).path}")
+        return parsed
+
+    def do_GET(self) -> None:
+        if urlparse(self.path).path == '/v1/stream/capabilities' and self.server.streaming:
+            if self.server.errors:
+                self._reply_json(self.server.errors.pop(0), {'detail': 'Unavailable'})
+                return
+            self._reply_json(200, {
+                'version': 1,
+                'endpoint': '/v1/stream/transcribe',
+                'encodings': ['pcm_s16le'],
+                'results': self.server.results,
+            })
+        else:
+            self._reply_json(404, {'detail': 'Not Found'})
+
+    def do_HEAD(self) -> None:
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path == '/v1/stream/transcribe' and self.server.streaming:
+            if self.server.errors:
+                self._body_discard()
+                self._reply_json(self.server.errors.pop(0), {'detail': 'Unavailable'})
+                return
+            self._stream(parse_qs(url.query))
+        elif url.path == '/v1/audio/transcriptions':
+            body = b''.join(self._body())
+            self.server.uploads.append({'kind': 'multipart', 'bytes': len(body), 'body': body,
+                                        'content_type': self.headers.get('Content-Type'),
+                                        'chunked': self.headers.get('Transfer-Encoding') == 'chunked'})
+            self._reply_json(200, {'text': f"multipart upload of {len(body)} bytes"})
+        else:
+            self._body_discard()
+            self._reply_json(404, {'detail': 'Not Found'})
+
+    def _stream(self, query: dict) -> None:
+        """Transcribe PCM as it arrives, sending results while the body is still being received"""
+        try:
+            samplerate = int(query['sample_rate'][0])
+            channels = int(query['channels'][0])
+            if query.get('encoding', ['pcm_s16le'])[0] != 'pcm_s16le':
+                raise ValueError("unsupported encoding")
+        except (KeyError, ValueError) as e:
+            self._body_discard()
+            self._reply_json(400, {'detail': f"Bad stream parameters: {e}"})
+            return
+
+        sse = 'text/event-stream' in (self.headers.get('Accept') or '')
+        upload = {'kind': 'stream', 'query': {k: v[0] for k, v in query.items()},
+                  'chunked': self.headers.get('Transfer-Encoding') == 'chunked', 'format': 'sse' if sse else 'ndjson',
+                  'bytes': 0, 'segments': []}
+        self.server.uploads.append(upload)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream' if sse else 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        if self.server.garbled:
+            self._write_chunk(b'{"type": "partial", "te\n' if not sse else b'data: {"type": \n\n')
+
+        bytes_per_second = samplerate * channels * 2
+        segment_bytes = max(2 * channels, int(self.server.segment_s * bytes_per_second) // (2 * channels) * 2 * channels)
+        pending = 0  # Bytes of the segment in progress
+
+        def finish_segment(size: int) -> None:
+            seconds = size / bytes_per_second
+            time.sleep(seconds * self.server.compute)
+            upload['segments'].append(size)
+            self._send_event(sse, {'type': 'final', 'text': f"[{seconds:.2f}s]"})
+
+        for chunk in self._body():
+            upload['bytes'] += len(chunk)
+            pending += len(chunk)
+            while pending >= segment_bytes:
+                pending -= segment_bytes
+                finish_segment(segment_bytes)
+            if pending:
+                self._send_event(sse, {'type': 'partial', 'text': f"[{pending / bytes_per_second:.2f}s..."})
+        if pending:
+            finish_segment(pending)
+        self._send_event(sse, {'type': 'done'})
+        self._write_chunk(b'')
+
+    def _send_event(self, sse: bool, event: dict) -> None:
+        if sse:
+            data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        else:
+            data = json.dumps(event) + '\n'
+        self._write_chunk(data.encode('utf-8'))
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def _body(self) -> Iterator[bytes]:
+        """Request body as it arrives (chunked or with a Content-Length)"""
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return
+                yield self.rfile.read(size)
+                self.rfile.readline()
+        else:
+            remaining = int(self.headers.get('Content-Length') or 0)
+            while remaining:
+                chunk = self.rfile.read(min(READ_SIZE, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+    def _body_discard(self) -> None:
+        for _ in self._body():
+            pass
+
+    def _reply_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--segment', type=float, default=DEFAULT_SEGMENT_S, help="Seconds of audio per final result")
+    parser.add_argument('--compute', type=float, default=0.0,
+                        help="Simulated inference seconds per second of audio")
+    parser.add_argument('--no-streaming', action='store_true', help="Only serve the multipart endpoint")
+    args = parser.parse_args()
+
+    server = ReferenceServer(args.host, args.port, segment_s=args.segment, compute=args.compute,
+                             streaming=not args.no_streaming)
+    print(f"Reference STT server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
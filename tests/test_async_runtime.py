@@ -0,0 +1,64 @@
+"""Background event loop runtime, and closing async clients on the event loop that owns their connections."""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from modules.async_runtime import AsyncRuntime, close_on_loop
+from tests.reference_stt_server import ReferenceServer
+
+
+async def _async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient()
+
+
+def _open_connection(client: httpx.AsyncClient, url: str):
+    async def request() -> None:
+        await client.head(url)
+    return request()
+
+
+def test_client_is_closed_on_the_running_runtime() -> None:
+    server = ReferenceServer().start()
+    runtime = AsyncRuntime(name='test-runtime')
+    try:
+        client = runtime.run(_async_client())
+        runtime.run(_open_connection(client, server.url))
+        assert server.connections == 1
+
+        # Called from another thread, e.g. when the transcriber cache retires an instance
+        thread = threading.Thread(target=close_on_loop, args=(client, runtime.loop))
+        thread.start()
+        thread.join()
+        runtime.run(asyncio.sleep(0.05))
+        assert client.is_closed
+    finally:
+        runtime.stop()
+        server.stop()
+
+
+def test_client_is_closed_on_a_stopped_loop() -> None:
+    server = ReferenceServer().start()
+    loop = asyncio.new_event_loop()
+    try:
+        client = loop.run_until_complete(_async_client())
+        loop.run_until_complete(_open_connection(client, server.url))
+        close_on_loop(client, loop)
+        assert client.is_closed
+    finally:
+        loop.close()
+        server.stop()
+
+
+def test_run_refuses_to_wait_on_its_own_loop() -> None:
+    runtime = AsyncRuntime(name='test-runtime')
+
+    async def nested() -> None:
+        runtime.run(asyncio.sleep(0))
+
+    try:
+        with pytest.raises(RuntimeError, match="own event loop"):
+            runtime.run(nested(), timeout=2)
+    finally:
+        runtime.stop()
@@ -0,0 +1,78 @@
+"""Zero-copy upload bodies: multipart framing around a buffer or a memory-mapped recording."""
+import email.parser
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from services.audio_payload import ChainedReader, multipart_body, open_audio_buffer, parse_wav_pcm16
+
+
+def _wav(seconds: float = 0.5) -> bytes:
+    buffer = io.BytesIO()
+    tone = (np.sin(np.arange(int(seconds * 16000)) * 0.05) * 8000).astype(np.int16)
+    sf.write(buffer, tone, 16000, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def test_multipart_body_is_byte_exact() -> None:
+    audio = _wav()
+    body, content_type = multipart_body(audio, 'audio.wav', 'audio/wav', fields={'model': 'whisper-1'})
+    boundary = content_type.split('boundary=')[1]
+
+    expected = (f'--{boundary}\r\nContent-Disposition: form-data; name="model"\r\n\r\nwhisper-1\r\n'
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="audio.wav"\r\n'
+                f'Content-Type: audio/wav\r\n\r\n').encode() + audio + f'\r\n--{boundary}--\r\n'.encode()
+    assert len(body) == len(expected)
+    assert body.read() == expected
+
+    message = email.parser.BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + expected)
+    assert [part.get_payload(decode=True) for part in message.get_payload()] == [b'whisper-1', audio]
+
+
+def test_reads_across_parts_and_rewinds() -> None:
+    reader = ChainedReader([b'abc', memoryview(b'defgh'), b'', b'ij'])
+    assert len(reader) == 10
+    # Small reads cross part boundaries
+    assert [reader.read(4) for _ in range(3)] == [b'abcd', b'efgh', b'ij']
+    assert reader.read(4) == b''
+    first_read_at, last_read_at = reader.first_read_at, reader.last_read_at
+    assert first_read_at is not None and last_read_at >= first_read_at
+
+    # HTTP clients rewind the body to retry a request
+    assert reader.seek(0) == 0
+    assert reader.read() == b'abcdefghij'
+    reader.seek(-3, io.SEEK_END)
+    assert reader.tell() == 7 and reader.read(2) == b'hi'
+    reader.seek(1, io.SEEK_CUR)
+    assert reader.read() == b''
+
+
+def test_memory_mapped_file_is_released_on_close(tmp_path) -> None:
+    path = tmp_path / 'recording.wav'
+    audio = _wav()
+    path.write_bytes(audio)
+
+    buffer, owned = open_audio_buffer(path)
+    assert isinstance(buffer, memoryview) and len(owned) == 2  # The mmap and its file
+    layout = parse_wav_pcm16(buffer)
+    assert layout.data_offset == 44 and layout.data_end == len(audio)
+
+    body, _ = multipart_body(buffer, path.name, 'audio/wav')
+    assert audio in body.read()
+    buffer.release()
+    mapped, file = owned
+    # The body still holds a view of the mapping: closing it must release the view
+    with pytest.raises(BufferError):
+        mapped.close()
+    body.close()
+    for obj in owned:
+        obj.close()
+    assert mapped.closed and file.closed
+
+
+def test_bytes_are_used_without_copying() -> None:
+    audio = _wav()
+    buffer, owned = open_audio_buffer(audio)
+    assert buffer is audio and owned == []
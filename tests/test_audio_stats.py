@@ -0,0 +1,85 @@
+"""Regression test: incremental recording stats must give the same verdict as reading the file."""
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from modules.audio_stats import RecordingStats, analyze_audio_file, evaluate_recording
+
+SAMPLE_RATE = 22050
+SILENCE_THRESHOLD = 0.01
+MIN_DURATION = 1.0
+BLOCK_SIZE = 512  # Typical PortAudio callback block size
+
+
+def _tone(seconds: float, amplitude: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype('float32')
+
+
+def _noise(seconds: float, amplitude: float) -> np.ndarray:
+    rng = np.random.default_rng(1234)
+    return (amplitude * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype('float32')
+
+
+FIXTURES = {
+    'speech_like_tone': _tone(3.0, 0.3),
+    'silence': np.zeros(int(2.0 * SAMPLE_RATE), dtype='float32'),
+    'quiet_room_noise': _noise(2.5, 0.003),
+    'too_short': _tone(0.5, 0.3),
+    'pause_then_speech': np.concatenate([np.zeros(SAMPLE_RATE, dtype='float32'), _tone(1.5, 0.05)]),
+    'near_threshold': _tone(2.0, SILENCE_THRESHOLD * np.sqrt(2) * 1.05),
+}
+
+
+@pytest.fixture(params=sorted(FIXTURES))
+def fixture_audio(request: pytest.FixtureRequest, tmp_path: Path) -> tuple:
+    audio = FIXTURES[request.param]
+    path = tmp_path / f"{request.param}.wav"
+    sf.write(path, audio, SAMPLE_RATE, subtype='PCM_16', format='WAV')
+    return audio, str(path)
+
+
+def _stats_from_callback_blocks(audio: np.ndarray) -> RecordingStats:
+    stats = RecordingStats(samplerate=SAMPLE_RATE, silence_threshold=SILENCE_THRESHOLD)
+    for start in range(0, len(audio), BLOCK_SIZE):
+        # The audio callback receives (frames, channels) float32 blocks
+        stats.update(audio[start:start + BLOCK_SIZE].reshape(-1, 1))
+    return stats
+
+
+def test_incremental_and_file_verdicts_match(fixture_audio: tuple) -> None:
+    audio, path = fixture_audio
+    stats = _stats_from_callback_blocks(audio)
+
+    incremental = evaluate_recording(stats.duration, stats.rms, SILENCE_THRESHOLD, MIN_DURATION)
+    from_file = analyze_audio_file(path, SILENCE_THRESHOLD, MIN_DURATION)
+
+    assert incremental == from_file
+
+
+def test_incremental_stats_match_file_samples(fixture_audio: tuple) -> None:
+    audio, path = fixture_audio
+    stats = _stats_from_callback_blocks(audio)
+    data, samplerate = sf.read(path)
+
+    assert stats.sample_count == len(data)
+    assert stats.duration == pytest.approx(len(data) / samplerate)
+    assert stats.rms == pytest.approx(np.sqrt(np.mean(np.square(data))), rel=1e-9, abs=1e-12)
+    assert stats.peak == pytest.approx(np.max(np.abs(data)), abs=1e-12)
+
+
+def test_speech_frames_dont_depend_on_block_size() -> None:
+    audio = FIXTURES['pause_then_speech']
+    counts = set()
+    for block_size in (160, 512, 1000, 4096):
+        stats = RecordingStats(samplerate=SAMPLE_RATE, silence_threshold=SILENCE_THRESHOLD)
+        for start in range(0, len(audio), block_size):
+            stats.update(audio[start:start + block_size].reshape(-1, 1))
+        counts.add((stats.speech_frame_count, stats.frame_count))
+    assert len(counts) == 1
+    speech, frames = counts.pop()
+    assert frames == len(audio) // stats.frame_size
+    # One second of silence, then 1.5 seconds of speech
+    assert speech / frames == pytest.approx(0.6, abs=0.01)
@@ -0,0 +1,89 @@
+"""Timing test: stopping a recording must finalize it without waiting on any polling interval."""
+import threading
+import time
+
+import numpy as np
+
+from modules.audio_buffer import BlockQueue, CaptureBuffer
+from modules.capture import CaptureWorker
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 160  # 10 ms, a small PortAudio callback block
+# Stop-to-finalized budget. The old sd.sleep(100) loop alone could add up to 100 ms.
+MAX_STOP_LATENCY = 0.03
+
+
+class FakeInput:
+    """Pushes blocks onto a BlockQueue in real time, like the PortAudio callback."""
+
+    def __init__(self, queue: BlockQueue) -> None:
+        self.queue = queue
+        self.pushed = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        block = (np.ones((BLOCK_SIZE, 1)) * 1000).astype(np.int16)
+        while not self._stop.is_set():
+            if self.queue.push(block):
+                self.pushed += BLOCK_SIZE
+            time.sleep(BLOCK_SIZE / SAMPLE_RATE)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _start_capture(poll_interval: float = 0.5):
+    """Starts a fake input feeding a buffer through a worker with a deliberately slow poll"""
+    queue = BlockQueue(SAMPLE_RATE)
+    buffer = CaptureBuffer(SAMPLE_RATE)
+    worker = CaptureWorker(queue, buffer.append, poll_interval=poll_interval)
+    worker.start()
+    source = FakeInput(queue)
+    source.start()
+    time.sleep(0.2)
+    return source, worker, buffer
+
+
+def test_stop_finalizes_recording_quickly() -> None:
+    source, worker, buffer = _start_capture()
+    source.close()
+
+    start = time.perf_counter()
+    worker.stop()
+    buffer.close()
+    latency = time.perf_counter() - start
+
+    assert latency < MAX_STOP_LATENCY
+    assert buffer.frames == source.pushed
+
+
+def test_drain_catches_up_while_input_keeps_running() -> None:
+    # Warm mic mode: the stream stays open and the recording is finalized after a drain
+    source, worker, buffer = _start_capture()
+    try:
+        start = time.perf_counter()
+        target = worker.queue.total_written
+        assert worker.drain()
+        latency = time.perf_counter() - start
+        assert latency < MAX_STOP_LATENCY
+        assert buffer.frames >= target
+    finally:
+        source.close()
+        worker.stop()
+
+
+def test_block_queue_wraps_and_drops_when_full() -> None:
+    queue = BlockQueue(100)
+    assert queue.push(np.arange(80, dtype=np.int16).reshape(-1, 1))
+    assert not queue.push(np.zeros((30, 1), dtype=np.int16))
+    assert len(queue.pop()) == 80
+
+    assert queue.push(np.arange(90, dtype=np.int16).reshape(-1, 1))
+    frames = queue.pop()
+    np.testing.assert_array_equal(frames[:, 0], np.arange(90))
+    assert queue.pop() is None
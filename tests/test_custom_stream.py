@@ -0,0 +1,197 @@
+"""Custom transcriber streaming protocol against the reference server."""
+import io
+import threading
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from modules.async_runtime import AsyncRuntime
+from services.custom_stt import CustomTranscriber
+from services.stream_protocol import StreamRejected, StreamResults
+from services.streaming_upload import LiveAudioSource, UploadAborted
+from tests.reference_stt_server import ReferenceServer
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(**kwargs) -> ReferenceServer:
+        servers.append(ReferenceServer(**kwargs).start())
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def _wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    tone = (np.sin(np.arange(int(seconds * SAMPLE_RATE)) * 0.05) * 8000).astype(np.int16)
+    sf.write(buffer, tone, SAMPLE_RATE, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def test_recording_is_streamed_as_pcm(start_server) -> None:
+    server = start_server()
+    partials = []
+    transcriber = CustomTranscriber(base_url=server.url, model='test-model', language='fr',
+                                    on_partial=partials.append)
+
+    assert transcriber.transcribe(_wav(2.5)) == "[1.00s] [1.00s] [0.50s]"
+    assert transcriber.streams_by_default
+
+    upload = server.uploads[0]
+    assert upload['kind'] == 'stream' and upload['format'] == 'ndjson'
+    assert upload['query'] == {'encoding': 'pcm_s16le', 'sample_rate': '16000', 'channels': '1',
+                               'language': 'fr', 'model': 'test-model'}
+    # Samples only, without the WAV header
+    assert upload['bytes'] == int(2.5 * BYTES_PER_SECOND)
+    assert partials[-1] == "[1.00s] [1.00s] [0.50s]"
+
+
+def test_sse_results(start_server) -> None:
+    server = start_server(results=['sse'])
+    transcriber = CustomTranscriber(base_url=server.url)
+    runtime = AsyncRuntime()
+    try:
+        assert runtime.run(transcriber.transcribe_async(_wav(1.5))) == "[1.00s] [0.50s]"
+    finally:
+        transcriber.close()
+        runtime.stop()
+    assert server.uploads[0]['format'] == 'sse'
+
+
+def test_falls_back_to_multipart_without_protocol(start_server) -> None:
+    server = start_server(streaming=False)
+    transcriber = CustomTranscriber(base_url=server.url, endpoint='/v1/audio/transcriptions')
+
+    assert transcriber.warm_up() >= 0
+    assert transcriber.negotiated and not transcriber.streams_by_default
+    assert transcriber.transcribe(_wav(1.0)).startswith("multipart upload of")
+    assert [upload['kind'] for upload in server.uploads] == ['multipart']
+
+
+def test_transient_failures_are_negotiated_again(start_server) -> None:
+    server = start_server()
+    server.errors = [503]
+    transcriber = CustomTranscriber(base_url=server.url, endpoint='/v1/audio/transcriptions')
+
+    # The server is restarting: multipart this time, the protocol is asked for again next time
+    assert transcriber.transcribe(_wav(1.0)).startswith("multipart upload of")
+    assert not transcriber.negotiated
+
+    assert transcriber.negotiate() is not None
+
+    # A 503 answer to the stream falls back for this recording only
+    server.errors = [503]
+    assert transcriber.transcribe(_wav(1.0)).startswith("multipart upload of")
+    assert transcriber.streams_by_default
+
+    assert transcriber.transcribe(_wav(1.0)) == "[1.00s]"
+    assert [upload['kind'] for upload in server.uploads] == ['multipart', 'multipart', 'stream']
+
+
+def test_unsupported_answers_are_kept(start_server) -> None:
+    server = start_server()
+    server.errors = [404]
+    transcriber = CustomTranscriber(base_url=server.url, endpoint='/v1/audio/transcriptions')
+
+    transcriber.transcribe(_wav(1.0))
+    transcriber.transcribe(_wav(1.0))
+    assert transcriber.negotiated and not transcriber.streams_by_default
+    assert server.requests.count('GET /v1/stream/capabilities') == 1
+
+
+@pytest.mark.parametrize('result_format', ['ndjson', 'sse'])
+def test_malformed_results_fall_back_to_multipart(start_server, result_format) -> None:
+    server = start_server(results=[result_format])
+    server.garbled = True
+    transcriber = CustomTranscriber(base_url=server.url, endpoint='/v1/audio/transcriptions')
+
+    assert transcriber.transcribe(_wav(1.0)).startswith("multipart upload of")
+    assert [upload['kind'] for upload in server.uploads] == ['stream', 'multipart']
+
+    # A live upload can't be replayed, the error is reported as a provider failure
+    source = LiveAudioSource()
+    source.write(np.zeros(SAMPLE_RATE // 10, dtype=np.int16).tobytes())
+    source.finish()
+    with pytest.raises(StreamRejected, match="malformed result"):
+        transcriber.transcribe_stream(source, SAMPLE_RATE)
+
+
+def test_live_recording_is_transcribed_while_uploading(start_server) -> None:
+    server = start_server(segment_s=0.5)
+    transcriber = CustomTranscriber(base_url=server.url)
+    source = LiveAudioSource()
+    result = {}
+    block = np.full(SAMPLE_RATE // 10, 1000, dtype=np.int16).tobytes()
+
+    thread = threading.Thread(target=lambda: result.update(text=transcriber.transcribe_stream(source, SAMPLE_RATE)))
+    thread.start()
+    for _ in range(12):
+        source.write(block)
+    source.finish()
+    thread.join(timeout=5)
+
+    assert result['text'] == "[0.50s] [0.50s] [0.20s]"
+    assert server.uploads[0]['chunked']
+    assert server.uploads[0]['bytes'] == 12 * len(block)
+
+
+def test_partial_results_arrive_while_recording(start_server) -> None:
+    server = start_server(segment_s=0.5)
+    partial = threading.Event()
+    transcriber = CustomTranscriber(base_url=server.url, on_partial=lambda text: partial.set())
+    source = LiveAudioSource()
+    result = {}
+
+    thread = threading.Thread(target=lambda: result.update(text=transcriber.transcribe_stream(source, SAMPLE_RATE)))
+    thread.start()
+    try:
+        source.write(np.full(SAMPLE_RATE // 10, 1000, dtype=np.int16).tobytes())
+        # Still recording: the results are read before the upload ends
+        assert partial.wait(timeout=2)
+    finally:
+        source.finish()
+        thread.join(timeout=5)
+    assert result['text'] == "[0.10s]"
+
+
+def test_cancelled_recording_aborts_the_upload(start_server) -> None:
+    server = start_server()
+    transcriber = CustomTranscriber(base_url=server.url)
+    source = LiveAudioSource()
+    result = {}
+
+    def upload() -> None:
+        try:
+            transcriber.transcribe_stream(source, SAMPLE_RATE)
+        except UploadAborted as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=upload)
+    thread.start()
+    source.write(np.zeros(SAMPLE_RATE // 10, dtype=np.int16).tobytes())
+    source.abort()
+    thread.join(timeout=5)
+    assert not thread.is_alive() and 'error' in result
+
+
+def test_result_parsing() -> None:
+    results = StreamResults('sse')
+    for line in [': keep-alive', 'event: partial', 'data: {"text": "hel"}', '',
+                 'data: {"type": "final", "text": "hello"}', '', 'event: done', 'data: {"text": "Hello."}', '']:
+        results.feed_line(line)
+    assert results.finals == ['hello'] and results.transcript() == "Hello."
+
+    results = StreamResults('ndjson')
+    results.feed_line('{"type": "final", "text": "partial work"}')
+    with pytest.raises(RuntimeError, match="before it was done"):
+        results.transcript()
+    with pytest.raises(RuntimeError, match="model crashed"):
+        results.feed_line('{"type": "error", "message": "model crashed"}')
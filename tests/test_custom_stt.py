@@ -0,0 +1,89 @@
+"""Custom transcriber endpoint discovery and connection reuse against the reference server (multipart endpoint only)."""
+import asyncio
+import io
+
+import httpx
+import numpy as np
+import pytest
+import soundfile as sf
+
+from services.custom_stt import CustomTranscriber
+from tests.reference_stt_server import ReferenceServer
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture
+def server():
+    reference = ReferenceServer(streaming=False).start()
+    yield reference
+    reference.stop()
+
+
+def _wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16), SAMPLE_RATE, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def test_discovery_is_persisted_and_reused(server) -> None:
+    persisted = []
+    transcriber = CustomTranscriber(base_url=server.url, stream_protocol=False, on_discovery=persisted.append)
+    transcriber.transcribe(_wav(0.5))
+    # /transcribe doesn't exist on this server, the OpenAI-style endpoint does
+    assert server.requests == ['POST /transcribe', 'POST /v1/audio/transcriptions']
+    assert persisted == [{'endpoint': '/v1/audio/transcriptions', 'send_model': False, 'response_field': 'text'}]
+
+    # A new transcriber (e.g. after a restart) starts from the persisted discovery: one request
+    server.requests.clear()
+    transcriber = CustomTranscriber(base_url=server.url, stream_protocol=False, discovery=persisted[-1])
+    assert transcriber.transcribe(_wav(0.5)).startswith("multipart upload of")
+    assert server.requests == ['POST /v1/audio/transcriptions']
+
+
+def test_endpoint_is_probed_again_after_404(server) -> None:
+    persisted = []
+    transcriber = CustomTranscriber(base_url=server.url, stream_protocol=False, on_discovery=persisted.append,
+                                    discovery={'endpoint': '/api/transcribe', 'send_model': False})
+    assert transcriber.transcribe(_wav(0.5)).startswith("multipart upload of")
+    assert server.requests == ['POST /api/transcribe', 'POST /transcribe', 'POST /v1/audio/transcriptions']
+    assert persisted == [None, {'endpoint': '/v1/audio/transcriptions', 'send_model': False,
+                                'response_field': 'text'}]
+
+
+def test_discovery_survives_server_outage(server) -> None:
+    persisted = []
+    discovery = {'endpoint': '/v1/audio/transcriptions', 'send_model': False, 'response_field': 'text'}
+    transcriber = CustomTranscriber(base_url=server.url, stream_protocol=False, on_discovery=persisted.append,
+                                    discovery=discovery)
+    server.stop()
+
+    with pytest.raises(httpx.ConnectError):
+        transcriber.transcribe(_wav(0.5))
+    # No probing of other endpoints, and the discovery is kept for when the server is back
+    assert transcriber.discovery == discovery
+    assert persisted == []
+
+
+def test_async_warm_up_connection_is_used_by_upload(server) -> None:
+    discovery = {'endpoint': '/v1/audio/transcriptions', 'send_model': False, 'response_field': 'text'}
+    transcriber = CustomTranscriber(base_url=server.url, stream_protocol=False, discovery=discovery)
+
+    async def dictation() -> str:
+        # Warmed while the user speaks, then uploaded on the same event loop
+        await transcriber.warm_up_async()
+        await asyncio.sleep(0.1)
+        return await transcriber.transcribe_async(_wav(0.5))
+
+    assert asyncio.run(dictation()).startswith("multipart upload of")
+    assert server.requests == ['HEAD /', 'POST /v1/audio/transcriptions']
+    assert server.connections == 1
+
+
+def test_async_client_follows_the_event_loop(server) -> None:
+    discovery = {'endpoint': '/v1/audio/transcriptions', 'send_model': False, 'response_field': 'text'}
+    transcriber = CustomTranscriber(base_url=server.url, stream_protocol=False, discovery=discovery)
+    # Each asyncio.run has its own loop: the client of the finished one can't be reused
+    for _ in range(2):
+        assert asyncio.run(transcriber.transcribe_async(_wav(0.5))).startswith("multipart upload of")
+    assert server.connections == 2
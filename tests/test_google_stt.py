@@ -0,0 +1,140 @@
+"""Google transcriber against a local HTTP stand-in of the Speech-to-Text v1 REST API."""
+import base64
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from modules.async_runtime import AsyncRuntime
+from services.google_stt import GoogleTranscriber
+
+SAMPLE_RATE = 16000
+
+
+class SpeechStandIn(ThreadingHTTPServer):
+    """Recognizes audio as a description of what was received. Operations finish after 2 polls."""
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), SpeechHandler)
+        self.requests = []
+        self.clients = set()
+        self.operations = {}
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class SpeechHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so connection reuse can be observed
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _record(self, body=None) -> None:
+        url = urlparse(self.path)
+        self.server.clients.add(self.client_address)
+        self.server.requests.append({'path': url.path, 'key': parse_qs(url.query).get('key', [None])[0],
+                                     'body': body})
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self._record(request)
+        audio = base64.b64decode(request['audio']['content'])
+        results = {'results': [
+            {'alternatives': [{'transcript': f"{len(audio)} bytes", 'confidence': 0.9}]},
+            {'alternatives': [{'transcript': f"at {request['config']['sampleRateHertz']} Hz"}]},
+        ]}
+        if self.path.startswith('/v1/speech:recognize'):
+            self._reply(200, results)
+        elif self.path.startswith('/v1/speech:longrunningrecognize'):
+            name = str(len(self.server.operations) + 1)
+            self.server.operations[name] = {'polls': 0, 'response': results}
+            self._reply(200, {'name': name})
+        else:
+            self._reply(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+    def do_GET(self) -> None:
+        self._record()
+        name = urlparse(self.path).path.rsplit('/', 1)[-1]
+        operation = self.server.operations[name]
+        operation['polls'] += 1
+        if operation['polls'] < 2:
+            self._reply(200, {'name': name, 'done': False})
+        else:
+            self._reply(200, {'name': name, 'done': True, 'response': operation['response']})
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    stand_in = SpeechStandIn()
+    yield stand_in
+    stand_in.shutdown()
+    stand_in.server_close()
+
+
+def _wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    tone = (np.sin(np.arange(int(seconds * SAMPLE_RATE)) * 0.05) * 8000).astype(np.int16)
+    sf.write(buffer, tone, SAMPLE_RATE, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def test_short_audio_is_sent_as_raw_linear16(server) -> None:
+    wav = _wav(2.0)
+    transcriber = GoogleTranscriber(language='fr-FR', api_key='key', base_url=server.url)
+
+    assert transcriber.transcribe(wav) == f"{2 * SAMPLE_RATE * 2} bytes at 16000 Hz"
+
+    request = server.requests[0]
+    assert request['path'] == '/v1/speech:recognize'
+    assert request['key'] == 'key'
+    assert request['body']['config'] == {
+        'encoding': 'LINEAR16', 'languageCode': 'fr-FR', 'enableAutomaticPunctuation': True,
+        'sampleRateHertz': 16000, 'audioChannelCount': 1,
+    }
+    # Samples only, without the RIFF header
+    assert base64.b64decode(request['body']['audio']['content']) == wav[44:]
+
+
+def test_long_audio_uses_long_running_recognition(server, tmp_path) -> None:
+    path = tmp_path / 'recording.wav'
+    path.write_bytes(_wav(70.0))
+    transcriber = GoogleTranscriber(api_key='key', base_url=server.url)
+
+    assert transcriber.transcribe(path) == f"{70 * SAMPLE_RATE * 2} bytes at 16000 Hz"
+    assert [r['path'] for r in server.requests] == ['/v1/speech:longrunningrecognize', '/v1/operations/1',
+                                                    '/v1/operations/1']
+    # The polls and the upload shared one pooled connection
+    assert len(server.clients) == 1
+
+
+def test_async_transcription(server) -> None:
+    transcriber = GoogleTranscriber(api_key='key', base_url=server.url)
+    runtime = AsyncRuntime()
+    try:
+        assert runtime.run(transcriber.transcribe_async(_wav(70.0))) == f"{70 * SAMPLE_RATE * 2} bytes at 16000 Hz"
+        assert runtime.run(transcriber.transcribe_async(_wav(1.0))) == f"{SAMPLE_RATE * 2} bytes at 16000 Hz"
+    finally:
+        transcriber.close()
+        runtime.stop()
+
+
+def test_api_errors_are_raised(server) -> None:
+    transcriber = GoogleTranscriber(api_key='key', base_url=server.url + '/missing')
+    with pytest.raises(RuntimeError, match="HTTP 404: Not found"):
+        transcriber.transcribe(_wav(1.0))
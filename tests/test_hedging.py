@@ -0,0 +1,113 @@
+"""Hedged requests: the backup provider is only used when the primary is slow or fails."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from modules.hedging import MIN_SAMPLES, LatencyTracker, hedged_call, hedged_call_async
+
+DELAY = 0.05
+
+
+def _sync(result=None, error=None, sleep=0.0, calls=None, name=None):
+    def request():
+        if calls is not None:
+            calls.append(name)
+        time.sleep(sleep)
+        if error:
+            raise error
+        return result
+    return request
+
+
+def _async(result=None, error=None, sleep=0.0, calls=None, name=None, cancelled=None):
+    async def request():
+        if calls is not None:
+            calls.append(name)
+        try:
+            await asyncio.sleep(sleep)
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.append(name)
+            raise
+        if error:
+            raise error
+        return result
+    return request
+
+
+def test_primary_answers_before_delay() -> None:
+    calls = []
+    result = hedged_call(('a', _sync('A', calls=calls, name='a')), ('b', _sync('B', calls=calls, name='b')), DELAY)
+    assert result == ('A', 'a', False)
+    assert calls == ['a']
+
+
+def test_secondary_wins_when_primary_is_slow() -> None:
+    released = threading.Event()
+    result = hedged_call(('a', lambda: released.wait(2) and 'A'), ('b', _sync('B')), DELAY)
+    released.set()
+    assert result == ('B', 'b', True)
+
+
+def test_secondary_starts_right_away_when_primary_fails() -> None:
+    start = time.perf_counter()
+    result = hedged_call(('a', _sync(error=ValueError("down"))), ('b', _sync('B')), delay=5.0)
+    assert result == ('B', 'b', True)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_primary_error_raised_when_both_fail() -> None:
+    with pytest.raises(ValueError, match="primary"):
+        hedged_call(('a', _sync(error=ValueError("primary"), sleep=2 * DELAY)),
+                    ('b', _sync(error=KeyError("secondary"))), DELAY)
+
+
+def test_async_primary_answers_before_delay() -> None:
+    calls = []
+    result = asyncio.run(hedged_call_async(('a', _async('A', calls=calls, name='a')),
+                                           ('b', _async('B', calls=calls, name='b')), DELAY))
+    assert result == ('A', 'a', False)
+    assert calls == ['a']
+
+
+def test_async_secondary_wins_and_primary_is_cancelled() -> None:
+    cancelled = []
+    result = asyncio.run(hedged_call_async(('a', _async('A', sleep=2, name='a', cancelled=cancelled)),
+                                           ('b', _async('B', sleep=DELAY)), DELAY))
+    assert result == ('B', 'b', True)
+    assert cancelled == ['a']
+
+
+def test_async_secondary_starts_right_away_when_primary_fails() -> None:
+    async def run():
+        start = time.perf_counter()
+        result = await hedged_call_async(('a', _async(error=ValueError("down"))), ('b', _async('B')), delay=5.0)
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result == ('B', 'b', True)
+    assert elapsed < 1.0
+
+
+def test_async_primary_error_raised_when_both_fail() -> None:
+    with pytest.raises(ValueError, match="primary"):
+        asyncio.run(hedged_call_async(('a', _async(error=ValueError("primary"), sleep=2 * DELAY)),
+                                      ('b', _async(error=KeyError("secondary"))), DELAY))
+
+
+def test_latency_percentile_scales_with_audio_length() -> None:
+    tracker = LatencyTracker()
+    # Requests take about 0.2 s per second of audio
+    for i in range(MIN_SAMPLES - 1):
+        seconds = 5 * (i + 1)
+        tracker.record('openai', 0.2 * seconds, seconds)
+    assert tracker.percentile('openai', 0.9, 5.0) is None
+    tracker.record('openai', 0.2 * 60, 60)
+
+    assert tracker.percentile('openai', 0.9, 5.0) == pytest.approx(1.0)
+    # A 3-minute dictation is expected to take longer, it's not hedged after the 5-second latency
+    assert tracker.percentile('openai', 0.9, 180.0) == pytest.approx(36.0)
+    # Very short clips are dominated by the request overhead
+    assert tracker.percentile('openai', 0.9, 0.1) == tracker.percentile('openai', 0.9, 1.0)
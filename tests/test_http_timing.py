@@ -0,0 +1,77 @@
+"""Connect time of requests, measured apart from the rest of the request."""
+import asyncio
+import io
+import logging
+
+import httpx
+import numpy as np
+import requests
+import soundfile as sf
+
+from services.custom_stt import CustomTranscriber
+from services.http_timing import ConnectTiming, TimedHTTPAdapter
+from tests.reference_stt_server import ReferenceServer
+
+
+def _wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, np.zeros(int(seconds * 16000), dtype=np.int16), 16000, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def test_sync_connect_is_timed_only_for_new_connections() -> None:
+    server = ReferenceServer().start()
+    session = requests.Session()
+    session.mount('http://', TimedHTTPAdapter())
+    try:
+        timings = []
+        for _ in range(2):
+            timing = ConnectTiming()
+            with timing.measure():
+                session.head(server.url)
+            timings.append(timing)
+    finally:
+        session.close()
+        server.stop()
+
+    assert not timings[0].reused and timings[0].connect_s > 0
+    assert timings[1].reused and timings[1].summary() == "connection reused"
+    assert server.connections == 1
+
+
+def test_async_connect_is_timed_with_trace() -> None:
+    server = ReferenceServer().start()
+
+    async def requests_on_one_client():
+        timings = []
+        async with httpx.AsyncClient() as client:
+            for _ in range(2):
+                timing = ConnectTiming()
+                await client.head(server.url, extensions={'trace': timing.trace})
+                timings.append(timing)
+        return timings
+
+    try:
+        timings = asyncio.run(requests_on_one_client())
+    finally:
+        server.stop()
+
+    assert not timings[0].reused and timings[0].connect_s > 0
+    assert timings[1].reused
+
+
+def test_upload_log_reports_connect_time(caplog) -> None:
+    server = ReferenceServer(streaming=False).start()
+    discovery = {'endpoint': '/v1/audio/transcriptions', 'send_model': False, 'response_field': 'text'}
+    transcriber = CustomTranscriber(base_url=server.url, stream_protocol=False, discovery=discovery)
+    try:
+        with caplog.at_level(logging.INFO, logger='voice_typing'):
+            transcriber.transcribe(_wav(0.5))
+            transcriber.transcribe(_wav(0.5))
+    finally:
+        transcriber.close()
+        server.stop()
+
+    uploads = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Custom STT /v1/audio")]
+    assert "HTTP 200: connect " in uploads[0]
+    assert "HTTP 200: connection reused" in uploads[1]
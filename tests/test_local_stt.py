@@ -0,0 +1,120 @@
+"""Local in-process transcriber with a stub backend (no model download needed)."""
+import io
+import threading
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from services import local_stt
+from services.local_stt import MODEL_SAMPLE_RATE, LocalBackend, LocalTranscriber, _load_samples, register_backend
+
+
+@register_backend('stub')
+class StubBackend(LocalBackend):
+    """Reports what it was given instead of running a model."""
+
+    loads = []
+
+    def load(self) -> None:
+        StubBackend.loads.append((self.model_path, self.int8, self.threads))
+
+    def transcribe(self, samples: np.ndarray, language: str) -> str:
+        return f"{len(samples)} samples in {language}, peak {np.abs(samples).max():.2f}"
+
+
+@register_backend('slow-stub')
+class SlowStubBackend(StubBackend):
+    """Stub whose model only finishes loading once `release` is set."""
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def load(self) -> None:
+        SlowStubBackend.started.set()
+        assert SlowStubBackend.release.wait(5)
+        super().load()
+
+
+@pytest.fixture(autouse=True)
+def fresh_models():
+    local_stt.unload_models()
+    StubBackend.loads.clear()
+    SlowStubBackend.started.clear()
+    SlowStubBackend.release.clear()
+    yield
+    local_stt.unload_models()
+
+
+def _wav(seconds: float, samplerate: int, channels: int = 1) -> bytes:
+    buffer = io.BytesIO()
+    tone = np.sin(np.arange(int(seconds * samplerate)) * 0.05) * 0.5
+    sf.write(buffer, np.repeat(tone[:, np.newaxis], channels, axis=1), samplerate, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def test_model_loads_lazily_and_stays_resident(tmp_path) -> None:
+    transcriber = LocalTranscriber(str(tmp_path), backend='stub', int8=True, threads=4)
+    assert StubBackend.loads == []
+
+    assert transcriber.transcribe(_wav(1.0, MODEL_SAMPLE_RATE)) == "16000 samples in en, peak 0.50"
+    transcriber.transcribe(_wav(0.5, MODEL_SAMPLE_RATE))
+    # A new instance (e.g. after the transcriber cache was cleared) reuses the loaded model
+    LocalTranscriber(str(tmp_path), backend='stub', int8=True, threads=4).transcribe(_wav(0.5, MODEL_SAMPLE_RATE))
+    assert StubBackend.loads == [(str(tmp_path), True, 4)]
+
+    # Different options load their own model
+    LocalTranscriber(str(tmp_path), backend='stub', int8=False, threads=4).warm_up()
+    assert StubBackend.loads[-1] == (str(tmp_path), False, 4)
+
+
+def test_audio_is_converted_to_model_format(tmp_path) -> None:
+    transcriber = LocalTranscriber(str(tmp_path), backend='stub', language='fr')
+    path = tmp_path / 'recording.wav'
+    path.write_bytes(_wav(1.0, 48000, channels=2))
+    assert transcriber.transcribe(path).startswith("16000 samples in fr")
+
+
+def test_downsampling_filters_out_aliases(tmp_path) -> None:
+    # A 10 kHz tone is above the 8 kHz Nyquist frequency of the model rate
+    t = np.arange(48000) / 48000
+    buffer = io.BytesIO()
+    sf.write(buffer, np.sin(2 * np.pi * 10000 * t) * 0.5, 48000, format='WAV', subtype='PCM_16')
+    samples = _load_samples(buffer.getvalue())
+    assert samples.dtype == np.float32 and abs(len(samples) - MODEL_SAMPLE_RATE) <= 1
+    assert np.sqrt(np.mean(samples ** 2)) < 0.05 * 0.5 / np.sqrt(2)
+
+
+def test_backends_must_implement_the_interface() -> None:
+    class Incomplete(LocalBackend):
+        def load(self) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete('model')
+
+
+def test_loading_doesnt_block_other_models(tmp_path) -> None:
+    resident = LocalTranscriber(str(tmp_path), backend='stub')
+    resident.warm_up()
+    slow = LocalTranscriber(str(tmp_path), backend='slow-stub')
+    loaders = [threading.Thread(target=slow.warm_up) for _ in range(2)]
+    for loader in loaders:
+        loader.start()
+    assert SlowStubBackend.started.wait(5)
+
+    # The resident model still transcribes while the other one loads
+    assert resident.transcribe(_wav(0.5, MODEL_SAMPLE_RATE)).startswith("8000 samples")
+
+    SlowStubBackend.release.set()
+    for loader in loaders:
+        loader.join(timeout=5)
+    # The stub model, then the slow one once: both warm-ups waited for the same load
+    assert len(StubBackend.loads) == 2
+
+
+def test_rejects_unknown_backend_and_missing_model(tmp_path) -> None:
+    with pytest.raises(ValueError, match="Unknown local STT backend"):
+        LocalTranscriber(str(tmp_path), backend='nope')
+    with pytest.raises(ValueError, match="model not found"):
+        LocalTranscriber(str(tmp_path / 'missing'), backend='stub')
@@ -0,0 +1,206 @@
+"""OpenAI Realtime transcriber against a local WebSocket stand-in of the realtime API."""
+import asyncio
+import base64
+import io
+import json
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+from websockets.asyncio.server import serve
+
+from modules.async_runtime import AsyncRuntime
+import pytest
+
+from services.errors import ProviderError
+from services.openai_realtime_stt import REALTIME_SAMPLE_RATE, OpenAIRealtimeTranscriber, _load_pcm16
+from services.streaming_upload import LiveAudioSource
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = REALTIME_SAMPLE_RATE * 2
+
+
+class RealtimeStandIn:
+    """Answers like the realtime API. Its "VAD" ends a segment every `segment_bytes` of audio
+    (or after every append without `segment_bytes`). With `error`, the first append is answered
+    with that error instead."""
+
+    def __init__(self, segment_bytes: Optional[int] = None, error: Optional[str] = None) -> None:
+        self.segment_bytes = segment_bytes
+        self.error = error
+        self.sessions = []
+        self.runtime = AsyncRuntime(name='realtime-stand-in')
+        self.runtime.start()
+        self.server = self.runtime.run(self._start())
+        self.url = f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def _start(self):
+        return await serve(self._handle, '127.0.0.1', 0)
+
+    async def _handle(self, ws) -> None:
+        session = {'headers': ws.request.headers, 'config': None, 'segments': [], 'appends': 0}
+        self.sessions.append(session)
+        buffered = 0
+
+        async def commit(size: int) -> None:
+            item_id = f"item_{len(session['segments'])}"
+            session['segments'].append(size)
+            await ws.send(json.dumps({'type': 'input_audio_buffer.committed', 'item_id': item_id}))
+            await ws.send(json.dumps({'type': 'conversation.item.input_audio_transcription.delta',
+                                      'item_id': item_id, 'delta': 'partial'}))
+            await ws.send(json.dumps({'type': 'conversation.item.input_audio_transcription.completed',
+                                      'item_id': item_id, 'transcript': f"{size}"}))
+
+        async for message in ws:
+            event = json.loads(message)
+            if event['type'] == 'transcription_session.update':
+                session['config'] = event['session']
+            elif event['type'] == 'input_audio_buffer.append':
+                session['appends'] += 1
+                if self.error:
+                    await ws.send(json.dumps({'type': 'error', 'error': {'message': self.error}}))
+                    continue
+                buffered += len(base64.b64decode(event['audio']))
+                segment_bytes = self.segment_bytes or buffered
+                while buffered and buffered >= segment_bytes:
+                    await ws.send(json.dumps({'type': 'input_audio_buffer.speech_stopped'}))
+                    await commit(segment_bytes)
+                    buffered -= segment_bytes
+            elif event['type'] == 'input_audio_buffer.commit':
+                if buffered == 0:
+                    await ws.send(json.dumps({'type': 'error', 'error': {
+                        'code': 'input_audio_buffer_commit_empty', 'message': 'buffer is empty'}}))
+                else:
+                    await commit(buffered)
+                    buffered = 0
+
+    def close(self) -> None:
+        self.server.close()
+        self.runtime.stop()
+
+
+def _wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    tone = (np.sin(np.arange(int(seconds * SAMPLE_RATE)) * 0.05) * 8000).astype(np.int16)
+    sf.write(buffer, tone, SAMPLE_RATE, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def test_transcribes_recording_in_segments() -> None:
+    server = RealtimeStandIn(segment_bytes=BYTES_PER_SECOND)
+    try:
+        transcriber = OpenAIRealtimeTranscriber(model='gpt-4o-mini-transcribe', url=server.url, api_key='test')
+        text = transcriber.transcribe(_wav(2.5))
+    finally:
+        server.close()
+
+    session = server.sessions[0]
+    assert session['headers']['Authorization'] == 'Bearer test'
+    assert session['config']['input_audio_format'] == 'pcm16'
+    assert session['config']['input_audio_transcription']['model'] == 'gpt-4o-mini-transcribe'
+    # Two segments cut by the server VAD, the rest committed at the end, joined in order
+    assert session['segments'][:2] == [BYTES_PER_SECOND, BYTES_PER_SECOND]
+    assert abs(sum(session['segments']) - 2.5 * BYTES_PER_SECOND) <= 4
+    assert text == ' '.join(str(size) for size in session['segments'])
+
+
+def test_blocking_calls_run_on_the_runtime() -> None:
+    server = RealtimeStandIn(segment_bytes=BYTES_PER_SECOND)
+    runtime = AsyncRuntime(name='test-runtime')
+    try:
+        transcriber = OpenAIRealtimeTranscriber(url=server.url, api_key='test', runtime=runtime)
+        transcriber.transcribe(_wav(0.5))
+        loop = runtime.loop
+
+        # Works from code already running an event loop, and sessions keep the runtime's loop
+        async def from_a_loop() -> str:
+            return transcriber.transcribe(_wav(0.5))
+
+        assert asyncio.run(from_a_loop()) == ' '.join(str(size) for size in server.sessions[1]['segments'])
+        assert runtime.loop is loop and len(server.sessions) == 2
+    finally:
+        runtime.stop()
+        server.close()
+
+
+def test_streams_while_recording_and_finalizes_quickly() -> None:
+    # Every block ends a segment, so nothing is left for the final commit (empty commit error)
+    block = np.full(SAMPLE_RATE // 10, 1000, dtype=np.int16).tobytes()
+    server = RealtimeStandIn()
+    source = LiveAudioSource()
+    result = {}
+
+    def upload() -> None:
+        transcriber = OpenAIRealtimeTranscriber(url=server.url, api_key='test')
+        result['text'] = transcriber.transcribe_stream(source, SAMPLE_RATE)
+        result['done_at'] = time.perf_counter()
+
+    thread = threading.Thread(target=upload)
+    thread.start()
+    try:
+        for _ in range(5):
+            source.write(block)
+            time.sleep(0.05)
+        time.sleep(0.1)
+        # Segments were transcribed while recording
+        assert len(server.sessions[0]['segments']) == 5
+
+        stopped_at = time.perf_counter()
+        source.finish()
+        thread.join(timeout=5)
+    finally:
+        server.close()
+
+    assert result['done_at'] - stopped_at < 0.5
+    assert result['text'] == ' '.join(str(size) for size in server.sessions[0]['segments'])
+
+
+def test_server_error_stops_streaming() -> None:
+    block = np.full(SAMPLE_RATE // 10, 1000, dtype=np.int16).tobytes()
+    server = RealtimeStandIn(error="Incorrect API key provided")
+    source = LiveAudioSource()
+    result = {}
+
+    def upload() -> None:
+        transcriber = OpenAIRealtimeTranscriber(url=server.url, api_key='bad')
+        try:
+            transcriber.transcribe_stream(source, SAMPLE_RATE)
+        except ProviderError as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=upload)
+    thread.start()
+    try:
+        # Still recording: the upload gives up on the error instead of streaming until stop
+        for _ in range(20):
+            source.write(block)
+            time.sleep(0.05)
+            if not thread.is_alive():
+                break
+        assert not thread.is_alive()
+    finally:
+        source.finish()
+        thread.join(timeout=5)
+        server.close()
+
+    assert "Incorrect API key" in str(result['error'])
+    assert server.sessions[0]['appends'] < 5
+
+
+def test_capture_rate_is_resampled_without_aliasing() -> None:
+    # 48 kHz capture: a 20 kHz tone is above the 12 kHz Nyquist frequency of the realtime API
+    t = np.arange(48000) / 48000
+    buffer = io.BytesIO()
+    sf.write(buffer, (np.sin(2 * np.pi * 20000 * t) * 10000).astype(np.int16), 48000, format='WAV', subtype='PCM_16')
+    aliased = np.frombuffer(_load_pcm16(buffer.getvalue()), dtype='<i2').astype(np.float32)
+    assert abs(len(aliased) - REALTIME_SAMPLE_RATE) <= 1
+    # Filtered out rather than folded back to 4 kHz
+    assert np.sqrt(np.mean(aliased ** 2)) < 0.05 * 10000 / np.sqrt(2)
+
+    # Speech band audio is kept
+    buffer = io.BytesIO()
+    sf.write(buffer, (np.sin(2 * np.pi * 1000 * t) * 10000).astype(np.int16), 48000, format='WAV', subtype='PCM_16')
+    kept = np.frombuffer(_load_pcm16(buffer.getvalue()), dtype='<i2').astype(np.float32)
+    assert np.sqrt(np.mean(kept[100:] ** 2)) == pytest.approx(10000 / np.sqrt(2), rel=0.05)
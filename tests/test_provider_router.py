@@ -0,0 +1,100 @@
+"""Circuit breaker of the provider router: failing providers are skipped until a probe succeeds."""
+import threading
+
+from modules.provider_router import CLOSED, OPEN, ProviderRouter
+
+PROBE_INTERVAL = 0.02
+
+
+class FakeProbe:
+    """Probe function failing until `healthy` is set, recording the probed providers."""
+
+    def __init__(self) -> None:
+        self.healthy = threading.Event()
+        self.probed = []
+        self.succeeded = threading.Event()
+
+    def __call__(self, provider: str) -> None:
+        self.probed.append(provider)
+        if not self.healthy.is_set():
+            raise ConnectionError("still down")
+        self.succeeded.set()
+
+
+def test_circuit_opens_after_consecutive_failures() -> None:
+    router = ProviderRouter(failure_threshold=3)
+    for _ in range(2):
+        router.record_failure('openai')
+    assert router.is_available('openai')
+
+    router.record_failure('openai', timeout=True)
+    health = router.health('openai')
+    assert health.state == OPEN and health.timeouts == 1
+    assert not router.is_available('openai')
+
+
+def test_success_resets_consecutive_failures() -> None:
+    router = ProviderRouter(failure_threshold=2)
+    router.record_failure('openai')
+    router.record_success('openai', 0.5)
+    router.record_failure('openai')
+    assert router.is_available('openai')
+    assert router.health('openai').consecutive_failures == 1
+
+
+def test_error_rate_ignores_a_short_blip() -> None:
+    router = ProviderRouter(failure_threshold=5)
+    for _ in range(5):
+        router.record_success('openai', 0.5)
+    router.record_failure('openai')
+    router.record_failure('openai')
+    health = router.health('openai')
+    assert health.error_rate >= 0.5
+    assert health.state == CLOSED
+
+
+def test_circuit_opens_on_error_rate() -> None:
+    router = ProviderRouter(failure_threshold=3)
+    for _ in range(2):
+        router.record_failure('openai')
+        router.record_success('openai', 0.5)
+    assert router.is_available('openai')
+
+    # Failing every other request never reaches 3 consecutive failures
+    router.record_failure('openai')
+    health = router.health('openai')
+    assert health.consecutive_failures == 1
+    assert health.state == OPEN
+
+
+def test_order_skips_open_circuits() -> None:
+    router = ProviderRouter(failure_threshold=1)
+    router.record_failure('openai')
+    assert router.order(['openai', 'custom', 'google']) == ['custom', 'google']
+    # With every circuit open, all providers are still tried
+    router.record_failure('custom')
+    router.record_failure('google')
+    assert router.order(['openai', 'custom', 'google']) == ['openai', 'custom', 'google']
+
+
+def test_circuit_closes_after_successful_probe() -> None:
+    probe = FakeProbe()
+    router = ProviderRouter(probe_fn=probe, failure_threshold=1, probe_interval=PROBE_INTERVAL)
+    try:
+        router.record_failure('custom')
+        assert router.order(['custom', 'openai']) == ['openai']
+
+        # Failed probes keep it open
+        while len(probe.probed) < 2:
+            threading.Event().wait(PROBE_INTERVAL)
+        assert not router.is_available('custom')
+
+        probe.healthy.set()
+        assert probe.succeeded.wait(1.0)
+        while router.health('custom').state != CLOSED:
+            threading.Event().wait(PROBE_INTERVAL / 4)
+        assert router.order(['custom', 'openai']) == ['custom', 'openai']
+        assert set(probe.probed) == {'custom'}
+        assert router.health('custom').consecutive_failures == 0
+    finally:
+        router.stop()
@@ -0,0 +1,113 @@
+"""Timing test: AudioRecorder.stop() must finalize the recording without waiting on any polling interval.
+
+Drives a real AudioRecorder with sd.InputStream replaced by a fake device. Without PortAudio the
+sounddevice package can't be imported, so a stand-in module is used for the import: the test
+never opens a real device either way.
+"""
+import io
+import sys
+import threading
+import time
+import types
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+
+def _import_recorder():
+    try:
+        from modules import recorder
+        return recorder
+    except OSError:  # sounddevice raises OSError when PortAudio is missing
+        pass
+    stand_in = types.ModuleType('sounddevice')
+    stand_in.InputStream = None  # Replaced by FakeInputStream in each test
+    stand_in.CallbackFlags = object
+    stand_in.query_devices = lambda *args, **kwargs: []
+    stand_in.default = SimpleNamespace(device=[None, None])
+    sys.modules['sounddevice'] = stand_in
+    try:
+        from modules import recorder
+        return recorder
+    finally:
+        # Only the modules imported above keep the stand-in
+        del sys.modules['sounddevice']
+
+
+recorder = _import_recorder()
+
+SAMPLE_RATE = recorder.SAMPLE_RATE
+BLOCK_SIZE = SAMPLE_RATE // 100  # 10 ms, a small PortAudio callback block
+# Stop-to-finalized budget: stop event, stream close and the worker's final pass, no polling
+MAX_STOP_LATENCY = 0.05
+
+
+class FakeInputStream:
+    """Calls the audio callback with blocks in real time from its own thread, like PortAudio."""
+
+    instances = []
+
+    def __init__(self, samplerate, channels, dtype, callback) -> None:
+        self.channels = channels
+        self.dtype = dtype
+        self.callback = callback
+        self.frames = 0
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        FakeInputStream.instances.append(self)
+
+    def _run(self) -> None:
+        block = np.full((BLOCK_SIZE, self.channels), 1000, dtype=self.dtype)
+        status = SimpleNamespace(input_overflow=False)
+        while not self._closed.wait(BLOCK_SIZE / SAMPLE_RATE):
+            self.callback(block, BLOCK_SIZE, None, status)
+            self.frames += BLOCK_SIZE
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeInputStream':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@pytest.fixture
+def fake_device(monkeypatch):
+    FakeInputStream.instances.clear()
+    monkeypatch.setattr(recorder.sd, 'InputStream', FakeInputStream)
+    monkeypatch.setattr(recorder, 'get_native_input_format',
+                        lambda: (SAMPLE_RATE, recorder.CAPTURE_CHANNELS))
+    monkeypatch.setattr(recorder, 'UPLOAD_FORMAT', 'wav')
+    return FakeInputStream.instances
+
+
+def test_stop_finalizes_recording_quickly(fake_device, tmp_path) -> None:
+    audio = recorder.AudioRecorder(filename=str(tmp_path / 'temp_audio.wav'), capture_mode='memory',
+                                   warm_mic=False)
+    audio.start()
+    time.sleep(0.3)
+
+    start = time.perf_counter()
+    audio.stop()
+    latency = time.perf_counter() - start
+
+    assert latency < MAX_STOP_LATENCY
+    assert not audio.thread.is_alive()
+    # Every block delivered before the stream closed is in the finalized recording
+    assert audio.buffer.frames == fake_device[0].frames > 0
+    assert audio.stats.duration == pytest.approx(fake_device[0].frames / SAMPLE_RATE)
+
+    recording, samplerate = sf.read(io.BytesIO(audio.get_recording()), dtype='int16')
+    assert samplerate == SAMPLE_RATE
+    assert len(recording) == fake_device[0].frames
+    assert np.all(recording == 1000)
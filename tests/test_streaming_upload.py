@@ -0,0 +1,105 @@
+"""Streaming (chunked) multipart upload of a recording in progress."""
+import email.parser
+import io
+import threading
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from modules.streaming_transcription import SpeculativeUpload
+from services.custom_stt import CustomTranscriber
+from services.streaming_upload import LiveAudioSource, UploadAborted, multipart_stream, streaming_wav_header
+from tests.reference_stt_server import ReferenceServer
+
+SAMPLE_RATE = 16000
+BLOCK = np.full(SAMPLE_RATE // 10, 1000, dtype=np.int16).tobytes()
+
+
+def _parse_multipart(content_type: str, body: bytes) -> dict:
+    message = email.parser.BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    return {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+            for part in message.get_payload()}
+
+
+def test_body_follows_the_recording() -> None:
+    source = LiveAudioSource()
+    body, content_type = multipart_stream(source, streaming_wav_header(SAMPLE_RATE), 'audio.wav', 'audio/wav',
+                                          fields={'model': 'test-model'})
+    chunks = [next(body), next(body)]  # The model field, then the file part headers and WAV header
+
+    # Each recorded block is available to the upload as soon as it's written
+    for _ in range(3):
+        source.write(BLOCK)
+        chunks.append(next(body))
+        assert chunks[-1] == BLOCK
+
+    source.finish()
+    chunks.extend(body)
+    parts = _parse_multipart(content_type, b''.join(chunks))
+    assert parts['model'] == b'test-model'
+    assert parts['file'] == streaming_wav_header(SAMPLE_RATE) + 3 * BLOCK
+
+
+def test_abort_raises_upload_aborted() -> None:
+    source = LiveAudioSource()
+    body, _ = multipart_stream(source, b'', 'audio.wav', 'audio/wav')
+    next(body)
+    threading.Timer(0.05, source.abort).start()
+    with pytest.raises(UploadAborted):
+        list(body)  # Blocked waiting for audio until the abort
+    # Audio written after the abort is dropped
+    source.write(BLOCK)
+    assert source.bytes_written == 0
+
+
+def test_cancel_aborts_speculative_upload() -> None:
+    received = []
+
+    def upload(source: LiveAudioSource) -> str:
+        for chunk in source.iter_chunks():
+            received.append(chunk)
+        return "finished"
+
+    speculative = SpeculativeUpload(upload)
+    speculative.feed(np.frombuffer(BLOCK, dtype=np.int16))
+    time.sleep(0.05)
+    speculative.cancel()
+    with pytest.raises(UploadAborted):
+        speculative.finish()
+    assert received == [BLOCK]
+
+
+def test_live_multipart_upload_waits_for_discovery() -> None:
+    # OpenAI-style server without the streaming protocol: nothing is known about its endpoint
+    server = ReferenceServer(streaming=False).start()
+    try:
+        transcriber = CustomTranscriber(base_url=server.url, stream_protocol=False)
+        assert not transcriber.stream_ready
+        with pytest.raises(RuntimeError, match="discovered or pinned endpoint"):
+            transcriber.transcribe_stream(LiveAudioSource(), SAMPLE_RATE)
+        assert server.uploads == []
+
+        # The first dictation is uploaded whole, which discovers the endpoint
+        wav = io.BytesIO()
+        sf.write(wav, np.frombuffer(2 * BLOCK, dtype=np.int16), SAMPLE_RATE, format='WAV', subtype='PCM_16')
+        transcriber.transcribe(wav.getvalue())
+        assert transcriber.stream_ready
+
+        source = LiveAudioSource()
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(text=transcriber.transcribe_stream(source, SAMPLE_RATE)))
+        thread.start()
+        for _ in range(5):
+            source.write(BLOCK)
+        source.finish()
+        thread.join(timeout=5)
+    finally:
+        server.stop()
+
+    upload = server.uploads[-1]
+    assert upload['chunked']
+    assert result['text'] == f"multipart upload of {upload['bytes']} bytes"
+    assert _parse_multipart(upload['content_type'], upload['body'])['file'] == \
+        streaming_wav_header(SAMPLE_RATE) + 5 * BLOCK
@@ -1,9 +1,12 @@
+import asyncio
 import os
 import sys
 import threading
 import subprocess
 import traceback
-from typing import Any, Callable, Optional, Tuple
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Tuple, Union
 import logging
 from datetime import datetime
 from pathlib import Path
@@ -13,17 +16,22 @@ import json
 from pynput import keyboard
 import pyperclip
 
-from modules.clean_text import clean_transcription
+from modules.clean_text import clean_transcription, warm_up_llm
 from modules.history import TranscriptionHistory
-from modules.recorder import AudioRecorder, DEFAULT_SILENT_START_TIMEOUT
+from modules.recorder import (AudioRecorder, DEFAULT_SILENT_START_TIMEOUT, DEFAULT_SMART_CAPTURE_SILENCE,
+                             SAMPLE_RATE, CAPTURE_CHANNELS, SILENCE_THRESHOLD)
 from modules.settings import Settings
-from modules.transcribe import transcribe_audio
+from modules.transcribe import (transcribe_audio, transcribe_audio_async, warm_up_transcriber, warm_up_transcriber_async,
+                               get_stream_transcriber, transcriber_in_use, record_stream_outcome)
 from modules.tray import setup_tray_icon
 from modules.ui import UIFeedback
 from modules.audio_manager import set_input_device, get_default_device_id, DeviceIdentifier, find_device_by_identifier
 from modules.status_manager import StatusManager, AppStatus
+from modules.streaming_transcription import SegmentedTranscriber, SpeculativeUpload
 from modules.screen_utils import set_process_dpi_awareness, hide_console_window
 from modules.logger import setup_logging
+from modules.async_runtime import shared_runtime
+from services.streaming_upload import LiveAudioSource
 
 class VoiceTypingApp:
     def __init__(self) -> None:
@@ -45,7 +53,8 @@ class VoiceTypingApp:
         self.update_icon_menu: Optional[Callable] = None
 
         # Initialize last_recording before tray setup
-        self.last_recording: Optional[str] = None
+        # WAV bytes for in-memory capture, or a file path
+        self.last_recording: Optional[Union[bytes, str]] = None
 
         silent_start_timeout = self.settings.get('silent_start_timeout')
         ui_position = self.settings.get('ui_indicator_position')
@@ -53,7 +62,10 @@ class VoiceTypingApp:
         self.ui_feedback = UIFeedback(position=ui_position, size=ui_size)
         self.recorder = AudioRecorder(
             level_callback=self.ui_feedback.update_audio_level,
-            silent_start_timeout=silent_start_timeout
+            silent_start_timeout=silent_start_timeout,
+            smart_capture_silence=self._smart_capture_silence(),
+            # Called from the capture thread, hand off to the Tk thread
+            auto_stop_callback=lambda reason: self.ui_feedback.root.after(0, self._handle_auto_stop)
         )
         self.ui_feedback.set_click_callback(self.handle_ui_click)
         self.recording = False
@@ -61,8 +73,17 @@ class VoiceTypingApp:
         self.clean_transcription_enabled = self.settings.get('clean_transcription')
         self.history = TranscriptionHistory()
 
+        # Transcribes finished segments while recording (streaming_transcription setting)
+        self.segmenter: Optional[SegmentedTranscriber] = None
+        # Uploads the recording while recording, for providers supporting it (streaming_upload setting)
+        self.live_upload: Optional[SpeculativeUpload] = None
+        self.live_upload_provider: Optional[str] = None
+
+        # Processing and retry jobs run on one background event loop (shared with the services).
+        # Cancelling the job's Future aborts the requests it is waiting on.
+        self.async_runtime = shared_runtime()
+        self.processing_job: Optional[Future] = None
         # Add a flag for canceling processing
-        self.processing_thread: Optional[threading.Thread] = None
         self.cancel_flag = threading.Event()
 
         # Log settings information
@@ -70,6 +91,7 @@ class VoiceTypingApp:
 
         # Initialize microphone
         self._initialize_microphone()
+        self.recorder.warm_up()
 
         # Initialize status manager first
         self.status_manager = StatusManager()
@@ -174,6 +196,7 @@ class VoiceTypingApp:
                 identifier = create_device_identifier(device)
                 set_input_device(device_id)
                 self.settings.set('selected_microphone', identifier._asdict())
+                self.rewarm_microphone()
                 self.logger.info(f"Microphone changed to: {device['name']} (ID: {device_id}, Channels: {device['max_input_channels']}, Sample Rate: {device['default_samplerate']} Hz)")
             else:
                 raise ValueError(f"Device with ID {device_id} not found")
@@ -185,6 +208,12 @@ class VoiceTypingApp:
             self.logger.debug(f"Failed device_id: {device_id}")
             self.ui_feedback.show_warning("⚠️ Error changing microphone")
 
+    def rewarm_microphone(self) -> None:
+        """Reopen the warm mic stream on the currently selected device"""
+        if self.recorder.warm_stream is not None and not self.recording:
+            self.recorder.release_warm_stream()
+            self.recorder.warm_up()
+
     def refresh_microphones(self) -> None:
         """Refresh the microphone list and update the tray menu"""
         if self.update_icon_menu:
@@ -196,20 +225,55 @@ class VoiceTypingApp:
             # Clear last recording when starting a new one
             self.last_recording = None
             self.recording = True
+            self._start_segmenter()
             self.recorder.start()
             self.status_manager.set_status(AppStatus.RECORDING)
-            # Start periodic status checks
-            self._check_recorder_status()
+            self._prewarm_connections()
         else:
             self._stop_recording()
 
+    def _prewarm_connections(self) -> None:
+        """Connect to the STT (and LLM) endpoints in the background while the user is speaking"""
+        if not self.settings.get('prewarm_connections'):
+            return
+        if self.segmenter is not None or self.live_upload is not None:
+            # Segments and live uploads are sent with the transcribers' blocking HTTP clients
+            threading.Thread(target=warm_up_transcriber, name='warm-up', daemon=True).start()
+        else:
+            # The recording is transcribed on the async runtime, whose connections belong to its loop
+            self.async_runtime.submit(warm_up_transcriber_async())
+        if self.clean_transcription_enabled:
+            threading.Thread(target=warm_up_llm, args=(self.settings.get('llm_model'),),
+                             name='warm-up-llm', daemon=True).start()
+
     def _stop_recording(self) -> None:
         """Helper method to handle recording stop logic"""
         self.recording = False
         self.recorder.stop()
-        self.logger.info("Recording stopped via keyboard shortcut")
-
-        if self.recorder.was_auto_stopped():
+        self._detach_segmenter()
+        if self.recorder.overflow_count:
+            self.logger.warning(f"Audio input was lost while recording: {self.recorder.input_overflows} device "
+                                f"overflow(s), {self.recorder.dropped_blocks} block(s) dropped by the capture queue")
+
+        if self.recorder.auto_stop_reason == 'smart_capture':
+            # Hands-free dictation: the speech ended, transcribe right away
+            self.logger.info("Recording stopped by Smart Capture")
+            self.recorder.auto_stopped = False
+            self.status_manager.set_status(AppStatus.PROCESSING)
+            self.process_audio()
+        elif self.recorder.auto_stop_reason == 'error':
+            # The input device failed: keep what was captured until then
+            self.logger.error("Recording stopped by an audio capture error")
+            self.recorder.auto_stopped = False
+            self.ui_feedback.show_warning("⚠️ Microphone error: recording stopped", 3000)
+            if self.recorder.stats is not None and self.recorder.stats.duration > 0:
+                self.status_manager.set_status(AppStatus.PROCESSING)
+                self.process_audio()
+            else:
+                self._discard_segmenter()
+                self.status_manager.set_status(AppStatus.ERROR, "⚠️ Microphone error")
+        elif self.recorder.was_auto_stopped():
+            self._discard_segmenter()
             self.status_manager.set_status(
                 AppStatus.ERROR,
                 "⚠️ Recording stopped: No audio detected"
@@ -218,40 +282,144 @@ class VoiceTypingApp:
             # Clear the auto-stopped flag
             self.recorder.auto_stopped = False
         else:
+            self.logger.info("Recording stopped via keyboard shortcut")
             self.status_manager.set_status(AppStatus.PROCESSING)
             self.process_audio()
 
-    # Add this method to check recorder status periodically
-    def _check_recorder_status(self) -> None:
-        """Periodically check if recorder has auto-stopped"""
+    def _start_segmenter(self) -> None:
+        """Start transcribing finished segments (or uploading) while recording, if enabled"""
+        self._discard_segmenter()
+        if not self.settings.get('streaming_transcription'):
+            self._start_live_upload()
+            return
+        self.segmenter = SegmentedTranscriber(
+            samplerate=SAMPLE_RATE,
+            channels=CAPTURE_CHANNELS,
+            transcribe_fn=transcribe_audio,
+            silence_threshold=SILENCE_THRESHOLD,
+            min_segment_s=self.settings.get('streaming_min_segment'),
+            pause_s=self.settings.get('streaming_pause')
+        )
+        self.recorder.add_block_listener(self.segmenter.feed)
+
+    def _start_live_upload(self) -> None:
+        """Start uploading the recording while recording, if enabled and supported by the provider"""
+        stream_transcriber = get_stream_transcriber()
+        if stream_transcriber is None:
+            return
+        provider, transcriber = stream_transcriber
+        # Streaming providers (OpenAI Realtime) always stream, others only with streaming_upload
+        if not (self.settings.get('streaming_upload') or getattr(transcriber, 'streams_by_default', False)):
+            return
+        if not getattr(transcriber, 'stream_ready', True):
+            self.logger.debug("Streaming upload skipped: the provider's endpoint isn't discovered yet")
+            return
+
+        def upload(source: LiveAudioSource) -> str:
+            # A settings change while recording must not close the connection being streamed to
+            with transcriber_in_use(transcriber):
+                return transcriber.transcribe_stream(source, SAMPLE_RATE, CAPTURE_CHANNELS)
+
+        self.live_upload = SpeculativeUpload(upload)
+        self.live_upload_provider = provider
+        self.recorder.add_block_listener(self.live_upload.feed)
+
+    def _detach_segmenter(self) -> None:
+        """Stop feeding recorded audio to the segmenter, keeping its in-flight segments"""
+        if self.segmenter is not None:
+            self.recorder.remove_block_listener(self.segmenter.feed)
+        if self.live_upload is not None:
+            self.recorder.remove_block_listener(self.live_upload.feed)
+            # The recorder has flushed every block, only the end of the body is left to send
+            self.live_upload.end_of_audio()
+
+    def _discard_segmenter(self) -> None:
+        """Cancel streaming transcription (or upload) of the current recording"""
+        if self.segmenter is not None:
+            self._detach_segmenter()
+            self.segmenter.cancel()
+            self.segmenter = None
+        if self.live_upload is not None:
+            self.recorder.remove_block_listener(self.live_upload.feed)
+            self.live_upload.cancel()
+            self.live_upload = None
+
+    def _trim_recording(self) -> Optional[Union[bytes, str]]:
+        """Return the last recording without leading/trailing silence, or None if not trimmed.
+
+        Only the upload is trimmed, last_recording keeps the original for retries.
+        """
+        if not self.settings.get('trim_silence'):
+            return None
+        try:
+            trimmed, leading, trailing = self.recorder.get_trimmed_recording(self.settings.get('trim_silence_margin'))
+        except Exception as e:
+            self.logger.warning(f"Silence trimming failed, uploading the full recording. Error: {e}")
+            return None
+        if trimmed is not None:
+            self.logger.info(f"Trimmed {leading + trailing:.1f}s of silence before upload "
+                             f"({leading:.1f}s leading, {trailing:.1f}s trailing)")
+        return trimmed
+
+    async def _transcribe_last_recording(self, trim: bool = False) -> str:
+        """Transcribe the last recording, stitching streamed segments when available"""
+        # Streamed segments are only used once, retries transcribe the full recording
+        segmenter, self.segmenter = self.segmenter, None
+        if segmenter is not None:
+            try:
+                start = time.perf_counter()
+                text = await asyncio.to_thread(segmenter.finish)
+                self.logger.info(f"Streaming transcription stitched {segmenter.segment_count} segment(s), "
+                                 f"{time.perf_counter() - start:.2f}s after processing started")
+                return text
+            except Exception as e:
+                self.logger.warning(f"Streaming transcription failed, transcribing the full recording. Error: {e}")
+        live_upload = self.live_upload
+        if live_upload is not None:
+            start = time.perf_counter()
+            try:
+                text = await asyncio.to_thread(live_upload.finish)
+                latency = time.perf_counter() - start
+                self.logger.info(f"Streaming upload transcribed {latency:.2f}s after processing started")
+                record_stream_outcome(self.live_upload_provider, latency)
+                return text
+            except Exception as e:
+                if self.cancel_flag.is_set():
+                    raise
+                self.logger.warning(f"Streaming upload failed, uploading the full recording. Error: {e}")
+                # Only provider errors count against its health (a cancelled upload doesn't)
+                record_stream_outcome(self.live_upload_provider, time.perf_counter() - start, error=e)
+            finally:
+                self.live_upload = None
+        trimmed = await asyncio.to_thread(self._trim_recording) if trim else None
+        return await transcribe_audio_async(trimmed or self.last_recording)
+
+    def _handle_auto_stop(self) -> None:
+        """Finish a recording the recorder stopped on its own (silent start, Smart Capture or error)"""
         if self.recording and self.recorder.was_auto_stopped():
             self._stop_recording()
 
-        if self.recording:
-            # Schedule next check in 100ms
-            self.ui_feedback.root.after(100, self._check_recorder_status)
-
     def process_audio(self) -> None:
         try:
             self.cancel_flag.clear()  # Reset flag before starting
-            self.processing_thread = threading.Thread(target=self._process_audio_thread)
-            self.processing_thread.start()
+            self.processing_job = self.async_runtime.submit(self._process_audio_job())
         except Exception as e:
-            self.logger.error("Failed to start processing thread", exc_info=True)
-            self.logger.debug(f"Thread state: {threading.current_thread().name}")
+            self.logger.error("Failed to start processing job", exc_info=True)
             self.ui_feedback.insert_text(f"Error: {str(e)[:50]}...")
 
-    def _process_audio_thread(self) -> None:
+    async def _process_audio_job(self) -> None:
         try:
             self.logger.info("Starting audio processing")
-            is_valid, reason = self.recorder.analyze_recording()
+            is_valid, reason = await asyncio.to_thread(self.recorder.analyze_recording)
 
             if self.cancel_flag.is_set():
                 self.logger.info("Processing cancelled before transcription.")
+                self._discard_segmenter()
                 self.status_manager.set_status(AppStatus.IDLE)
                 return
 
             if not is_valid:
+                self._discard_segmenter()
                 self.logger.warning(f"Skipping transcription: {reason}")
                 self.status_manager.set_status(
                     AppStatus.ERROR,
@@ -259,11 +427,11 @@ class VoiceTypingApp:
                 )
                 return
 
-            # Store recording path for retry functionality
-            self.last_recording = self.recorder.filename
+            # Store recording for retry functionality
+            self.last_recording = await asyncio.to_thread(self.recorder.get_recording)
 
             self.logger.info("Starting transcription")
-            success, result = self._attempt_transcription()
+            success, result = await self._attempt_transcription(trim=True)
 
             if self.cancel_flag.is_set():
                 self.logger.info("Processing cancelled after transcription.")
@@ -289,8 +457,12 @@ class VoiceTypingApp:
                 preview = result[:preview_len] + "..." if len(result) > preview_len else result
                 self.logger.info(f"Transcription completed ({len(result)} chars): {preview}")
 
+        except asyncio.CancelledError:
+            self.logger.info("Processing cancelled.")
+            self.status_manager.set_status(AppStatus.IDLE)
+            raise
         except Exception as e:
-            self.logger.error("Error in _process_audio_thread:", exc_info=True)
+            self.logger.error("Error in _process_audio_job:", exc_info=True)
             # Check if it's a timeout exception
             if 'timeout' in str(e).lower():
                 self.ui_feedback.show_error_with_retry("⏱️ Request timed out - try again")
@@ -299,8 +471,12 @@ class VoiceTypingApp:
                 self.ui_feedback.show_error_with_retry("⚠️ Transcription failed")
                 self.status_manager.set_status(AppStatus.ERROR, "⚠️ Error processing audio")
 
-    def _attempt_transcription(self) -> Tuple[bool, Optional[str]]:
-        """Attempt transcription and return (success, result or error_type)"""
+    async def _attempt_transcription(self, trim: bool = False) -> Tuple[bool, Optional[str]]:
+        """Attempt transcription and return (success, result or error_type)
+
+        Args:
+            trim: Upload the recording without leading/trailing silence (not used for retries)
+        """
         try:
             if not self.last_recording:
                 self.logger.error("Attempted transcription with no recording available.")
@@ -308,7 +484,7 @@ class VoiceTypingApp:
 
             # Update status to show we're transcribing
             self.status_manager.set_status(AppStatus.TRANSCRIBING)
-            text = transcribe_audio(self.last_recording)
+            text = await self._transcribe_last_recording(trim)
 
             if self.cancel_flag.is_set():
                 return False, "cancelled"
@@ -322,7 +498,9 @@ class VoiceTypingApp:
                     llm_model = self.settings.get('llm_model')
                     cleaning_timeout = self.settings.get('cleaning_timeout')
 
-                    cleaned_text = clean_transcription(text, model=llm_model, timeout=cleaning_timeout)
+                    cleaned_text = await asyncio.to_thread(
+                        clean_transcription, text, model=llm_model, timeout=cleaning_timeout
+                    )
                     self.logger.info("Transcription cleaned successfully")
                     return True, cleaned_text
                 except Exception as e:
@@ -346,9 +524,14 @@ class VoiceTypingApp:
         if not self.last_recording:
             return
 
-        def retry_thread():
+        async def retry_job():
             self.status_manager.set_status(AppStatus.PROCESSING)
-            success, result = self._attempt_transcription()
+            try:
+                success, result = await self._attempt_transcription()
+            except asyncio.CancelledError:
+                self.logger.info("Retry cancelled.")
+                self.status_manager.set_status(AppStatus.IDLE)
+                raise
 
             if success and result:
                 self.history.add(result)
@@ -362,7 +545,8 @@ class VoiceTypingApp:
                 self.ui_feedback.show_error_with_retry("⚠️ Retry failed")
                 self.status_manager.set_status(AppStatus.ERROR)
 
-        threading.Thread(target=retry_thread).start()
+        self.cancel_flag.clear()
+        self.processing_job = self.async_runtime.submit(retry_job())
 
     def toggle_clean_transcription(self) -> None:
         self.clean_transcription_enabled = not self.clean_transcription_enabled
@@ -387,6 +571,8 @@ class VoiceTypingApp:
         self.listener.stop()
         if self.recording:
             self.recorder.stop()
+        self.recorder.release_warm_stream()
+        self.async_runtime.stop()
         self.ui_feedback.cleanup()
 
     def handle_ui_click(self) -> None:
@@ -395,13 +581,17 @@ class VoiceTypingApp:
         if status == AppStatus.RECORDING:
             self.logger.info("Canceling recording...")
             self.recording = False
+            self._discard_segmenter()
             threading.Thread(target=self._stop_recorder).start()
             self.status_manager.set_status(AppStatus.IDLE)
         elif status in (AppStatus.PROCESSING, AppStatus.TRANSCRIBING, AppStatus.CLEANING):
             self.logger.info("Canceling processing...")
-            if self.processing_thread and self.processing_thread.is_alive():
+            if self.processing_job and not self.processing_job.done():
                 self.cancel_flag.set()
-                # The processing thread will set the status to IDLE upon graceful exit
+                if self.live_upload is not None:
+                    self.live_upload.cancel()
+                # Aborts the requests in flight, the job sets the status to IDLE as it exits
+                self.processing_job.cancel()
 
     def _stop_recorder(self) -> None:
         """Helper method to stop recorder in a separate thread"""
@@ -433,6 +623,20 @@ class VoiceTypingApp:
         status = "enabled" if new_timeout is not None else "disabled"
         self.logger.info(f"Silence detection {status}")
 
+    def _smart_capture_silence(self) -> Optional[float]:
+        """Seconds of trailing silence that end a Smart Capture recording, or None if disabled"""
+        if not self.settings.get('smart_capture'):
+            return None
+        return self.settings.get('smart_capture_silence') or DEFAULT_SMART_CAPTURE_SILENCE
+
+    def toggle_smart_capture(self) -> None:
+        """Toggle Smart Capture (auto-stop and transcribe once speech is followed by silence)"""
+        self.settings.set('smart_capture', not self.settings.get('smart_capture'))
+        self.recorder.smart_capture_silence = self._smart_capture_silence()
+
+        status = "enabled" if self.settings.get('smart_capture') else "disabled"
+        self.logger.info(f"Smart Capture {status}")
+
     def restart_app(self) -> None:
         """Restart the application by launching a new instance and closing the current one."""
         self.logger.info("Attempting to restart application...")